@@ -0,0 +1,76 @@
+"""
+Порівняння швидкості серіалізації списку контактів: загальний
+`jsonable_encoder` + `JSONResponse` (без `response_model`) проти
+`response_model` (pydantic-core) + `ORJSONResponse`.
+
+Запуск (з кореня проєкту, з налаштованим `.env`)::
+
+    python benchmarks/bench_contacts_serialization.py
+"""
+
+import pathlib
+import sys
+import timeit
+from datetime import date, datetime
+from typing import List
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.joinpath("src")))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from database import Contact  # noqa: E402
+from schemas import Contact as ContactSchema  # noqa: E402
+
+SIZES = (1000, 10000)
+REPEAT = 5
+
+
+def make_contacts(count: int) -> list[Contact]:
+    return [
+        Contact(
+            id=i,
+            first_name=f"First{i}",
+            last_name=f"Last{i}",
+            email=f"contact{i}@example.com",
+            phone_number=f"+38050{i:07d}",
+            birthday=date(1980 + i % 30, 1 + i % 12, 1 + i % 28),
+            additional_data="Some additional data",
+            user_id=1,
+            version=i,
+            updated_at=datetime(2024, 1, 1, 12, 0),
+        )
+        for i in range(count)
+    ]
+
+
+def before(contacts: list[Contact]) -> bytes:
+    return JSONResponse(jsonable_encoder(contacts)).body
+
+
+def after(contacts: list[Contact], adapter=TypeAdapter(List[ContactSchema])) -> bytes:
+    # Те саме, що робить FastAPI для маршруту з response_model
+    value = adapter.validate_python(contacts, from_attributes=True)
+    return ORJSONResponse(adapter.dump_python(value, mode="json")).body
+
+
+def main():
+    for size in SIZES:
+        contacts = make_contacts(size)
+        results = {}
+        for name, func in (("jsonable_encoder", before), ("response_model", after)):
+            best = min(timeit.repeat(lambda: func(contacts), number=1, repeat=REPEAT))
+            results[name] = best
+            print(
+                f"{size:>6} contacts  {name:<17} {best * 1e3:9.2f} ms"
+                f"  {size / best:12,.0f} contacts/s"
+            )
+        print(
+            f"{size:>6} contacts  speedup           "
+            f"{results['jsonable_encoder'] / results['response_model']:9.1f}x\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Вартість підпису та перевірки токену доступу для різних алгоритмів JWT.
+
+Порівнює HMAC (HS256, поточний режим без ключів), ES256 (рекомендований
+асиметричний режим) та RS256 (для довідки) через `KeyRing`, тобто з тими ж
+накладними витратами, що й у застосунку. Кеш перевірених токенів
+(`Auth.decode_access_token`) не використовується.
+
+Запуск (з кореня проєкту, з налаштованим `.env`)::
+
+    python benchmarks/bench_jwt_algorithms.py
+"""
+
+import pathlib
+import sys
+import time
+import timeit
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.joinpath("src")))
+
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ec, rsa  # noqa: E402
+
+from services.jwt_keys import KeyRing  # noqa: E402
+
+NUMBER = 5000
+CLAIMS = {
+    "sub": "user@example.com",
+    "uid": 1,
+    "ver": 0,
+    "fam": "N2Q3ZjE5YjQ4ZTdkNGM1Yg",
+    "scope": "access_token",
+}
+
+
+def pem(key) -> bytes:
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+def rings() -> dict[str, KeyRing]:
+    hmac = dict(secret="benchmark-secret-key", hmac_algorithm="HS256")
+    return {
+        "HS256": KeyRing([], **hmac),
+        "ES256": KeyRing(
+            [("es", pem(ec.generate_private_key(ec.SECP256R1())))], **hmac
+        ),
+        "RS256": KeyRing(
+            [("rs", pem(rsa.generate_private_key(65537, 2048)))],
+            algorithm="RS256",
+            **hmac,
+        ),
+    }
+
+
+def main():
+    claims = {**CLAIMS, "exp": int(time.time()) + 900}
+    print(f"{'algorithm':<10}{'sign, us':>12}{'verify, us':>14}{'token, B':>12}")
+    for name, ring in rings().items():
+        token = ring.encode(claims)
+        assert ring.decode(token)["sub"] == claims["sub"]
+        sign = timeit.timeit(lambda: ring.encode(claims), number=NUMBER)
+        verify = timeit.timeit(lambda: ring.decode(token), number=NUMBER)
+        print(
+            f"{name:<10}{sign / NUMBER * 1e6:12.2f}"
+            f"{verify / NUMBER * 1e6:14.2f}{len(token):12d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
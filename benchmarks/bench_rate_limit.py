@@ -0,0 +1,83 @@
+"""
+Накладні витрати обмеження частоти запитів на один запит.
+
+Порівнює час перевірки ліміту (Lua-скрипт token bucket) з простим `PING` до
+того ж Redis, а також час відхилення запиту з локального кешу заблокованих
+відер. Ціль - не більше 0.3 мс на запит до локального Redis.
+
+Запуск (з кореня проєкту, з налаштованим `.env` та запущеним Redis)::
+
+    python benchmarks/bench_rate_limit.py [redis://localhost:6379/0]
+"""
+
+import asyncio
+import pathlib
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.joinpath("src")))
+
+import redis.asyncio as redis  # noqa: E402
+
+from conf import settings  # noqa: E402
+from conf.config import RateLimitPolicy  # noqa: E402
+from services.cache import TTLCache  # noqa: E402
+from services.rate_limit import RateLimiter  # noqa: E402
+
+NUMBER = 20000
+TARGET_MS = 0.3
+
+
+async def measure(call, number: int = NUMBER) -> list[float]:
+    timings = []
+    for index in range(number):
+        start = time.perf_counter()
+        await call(index)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: list[float]) -> float:
+    timings.sort()
+    mean = statistics.fmean(timings)
+    p99 = timings[int(len(timings) * 0.99)]
+    print(f"{name:<22} mean {mean:7.4f} ms   p99 {p99:7.4f} ms")
+    return mean
+
+
+async def main(url: str):
+    client = redis.from_url(url)
+    limiter = RateLimiter(client, local=TTLCache(NUMBER, ttl=1))
+    allow = RateLimitPolicy(times=10**9, seconds=1)
+    block = RateLimitPolicy(times=1, seconds=3600)
+
+    await client.ping()
+    await limiter.hit("bench", "warmup", allow)
+
+    ping = report("PING", await measure(lambda _: client.ping()))
+    hit = report(
+        "rate limit (allowed)",
+        await measure(lambda index: limiter.hit("bench", str(index % 1000), allow)),
+    )
+
+    await limiter.hit("bench-block", "ip", block)
+    await limiter.hit("bench-block", "ip", block)
+    report(
+        "rate limit (local)",
+        await measure(lambda _: limiter.hit("bench-block", "ip", block)),
+    )
+
+    await client.delete(
+        *[limiter.key("bench", str(index)) for index in range(1000)],
+        limiter.key("bench", "warmup"),
+        limiter.key("bench-block", "ip"),
+    )
+    await client.close()
+
+    print(f"script over PING:      {hit - ping:7.4f} ms")
+    print(f"target:                {TARGET_MS:7.4f} ms -> {'OK' if hit <= TARGET_MS else 'FAIL'}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else settings.redis_host))
@@ -0,0 +1,35 @@
+"""
+Порівняння вартості перевірки токену доступу з кешем та без нього.
+
+Запуск (з кореня проєкту, з налаштованим `.env`)::
+
+    python benchmarks/bench_token_cache.py
+"""
+
+import asyncio
+import pathlib
+import sys
+import timeit
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.joinpath("src")))
+
+from services.auth import auth_service  # noqa: E402
+
+NUMBER = 20000
+
+
+def main():
+    token = asyncio.run(auth_service.create_access_token({"sub": "user@example.com"}))
+
+    uncached = timeit.timeit(lambda: auth_service.keys.decode(token), number=NUMBER)
+
+    auth_service.decode_access_token(token)
+    cached = timeit.timeit(lambda: auth_service.decode_access_token(token), number=NUMBER)
+
+    print(f"keys.decode:          {uncached / NUMBER * 1e6:8.2f} us/request")
+    print(f"decode_access_token:  {cached / NUMBER * 1e6:8.2f} us/request (cache hit)")
+    print(f"saved per request:    {(uncached - cached) / NUMBER * 1e6:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""add contacts.birthday_md with (user_id, birthday_md) index
+
+Revision ID: 0002_contacts_birthday_md
+Revises: 0001_initial
+Create Date: 2026-10-17 12:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_contacts_birthday_md"
+down_revision: Union[str, None] = "0001_initial"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("contacts", sa.Column("birthday_md", sa.Integer(), nullable=True))
+
+    contacts = sa.table(
+        "contacts",
+        sa.column("birthday", sa.Date),
+        sa.column("birthday_md", sa.Integer),
+    )
+    op.execute(
+        contacts.update().values(
+            birthday_md=sa.cast(sa.extract("month", contacts.c.birthday), sa.Integer)
+            * 100
+            + sa.cast(sa.extract("day", contacts.c.birthday), sa.Integer)
+        )
+    )
+
+    op.create_index(
+        "ix_contacts_user_id_birthday_md", "contacts", ["user_id", "birthday_md"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_contacts_user_id_birthday_md", table_name="contacts")
+    op.drop_column("contacts", "birthday_md")
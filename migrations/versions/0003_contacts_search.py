@@ -0,0 +1,71 @@
+"""add full-text search index for contacts
+
+Revision ID: 0003_contacts_search
+Revises: 0002_contacts_birthday_md
+Create Date: 2026-10-17 12:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_contacts_search"
+down_revision: Union[str, None] = "0002_contacts_birthday_md"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR = (
+    "to_tsvector('simple'::regconfig, first_name || ' ' || last_name || ' ' "
+    "|| email || ' ' || phone_number || ' ' || coalesce(additional_data, ''))"
+)
+FTS_COLUMNS = "first_name, last_name, email, phone_number, additional_data"
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            f"CREATE INDEX ix_contacts_search ON contacts USING gin ({SEARCH_VECTOR})"
+        )
+        return
+
+    op.execute(
+        f"CREATE VIRTUAL TABLE contacts_fts USING fts5({FTS_COLUMNS}, "
+        "content='contacts', content_rowid='id')"
+    )
+    op.execute(
+        f"""CREATE TRIGGER contacts_fts_ai AFTER INSERT ON contacts BEGIN
+            INSERT INTO contacts_fts(rowid, {FTS_COLUMNS})
+            VALUES (new.id, new.first_name, new.last_name, new.email,
+                    new.phone_number, new.additional_data);
+        END"""
+    )
+    op.execute(
+        f"""CREATE TRIGGER contacts_fts_ad AFTER DELETE ON contacts BEGIN
+            INSERT INTO contacts_fts(contacts_fts, rowid, {FTS_COLUMNS})
+            VALUES ('delete', old.id, old.first_name, old.last_name, old.email,
+                    old.phone_number, old.additional_data);
+        END"""
+    )
+    op.execute(
+        f"""CREATE TRIGGER contacts_fts_au AFTER UPDATE ON contacts BEGIN
+            INSERT INTO contacts_fts(contacts_fts, rowid, {FTS_COLUMNS})
+            VALUES ('delete', old.id, old.first_name, old.last_name, old.email,
+                    old.phone_number, old.additional_data);
+            INSERT INTO contacts_fts(rowid, {FTS_COLUMNS})
+            VALUES (new.id, new.first_name, new.last_name, new.email,
+                    new.phone_number, new.additional_data);
+        END"""
+    )
+    op.execute("INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_contacts_search", table_name="contacts")
+        return
+
+    for trigger in ("contacts_fts_ai", "contacts_fts_ad", "contacts_fts_au"):
+        op.execute(f"DROP TRIGGER {trigger}")
+    op.execute("DROP TABLE contacts_fts")
@@ -0,0 +1,41 @@
+"""add lookup indexes and per-user contact email uniqueness
+
+Revision ID: 0004_lookup_indexes
+Revises: 0003_contacts_search
+Create Date: 2026-10-17 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_lookup_indexes"
+down_revision: Union[str, None] = "0003_contacts_search"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_contacts_user_id_id", "contacts", ["user_id", "id"])
+    op.create_index("ix_users_reset_token", "users", ["reset_token"])
+    op.create_index("ix_users_refresh_token", "users", ["refresh_token"])
+
+    # SQLite cannot alter constraints in place; local SQLite databases are
+    # created from the models and already have the per-user constraint.
+    if op.get_bind().dialect.name == "postgresql":
+        op.create_unique_constraint(
+            "uq_contacts_user_id_email", "contacts", ["user_id", "email"]
+        )
+        op.drop_constraint("contacts_email_key", "contacts", type_="unique")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.create_unique_constraint("contacts_email_key", "contacts", ["email"])
+        op.drop_constraint("uq_contacts_user_id_email", "contacts", type_="unique")
+
+    op.drop_index("ix_users_refresh_token", table_name="users")
+    op.drop_index("ix_users_reset_token", table_name="users")
+    op.drop_index("ix_contacts_user_id_id", table_name="contacts")
@@ -0,0 +1,29 @@
+"""add contacts version counter to users
+
+Revision ID: 0005_users_contacts_version
+Revises: 0004_lookup_indexes
+Create Date: 2026-10-17 12:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_users_contacts_version"
+down_revision: Union[str, None] = "0004_lookup_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("contacts_version", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "contacts_version")
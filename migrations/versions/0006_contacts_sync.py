@@ -0,0 +1,57 @@
+"""add change tracking and soft delete to contacts
+
+Revision ID: 0006_contacts_sync
+Revises: 0005_users_contacts_version
+Create Date: 2026-10-17 12:50:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_contacts_sync"
+down_revision: Union[str, None] = "0005_users_contacts_version"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "contacts",
+        sa.Column("version", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column("contacts", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE contacts SET updated_at = CURRENT_TIMESTAMP")
+    op.add_column("contacts", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+    op.create_index(
+        "ix_contacts_user_id_version", "contacts", ["user_id", "version", "id"]
+    )
+
+    # Email uniqueness only applies to live contacts. SQLite cannot alter
+    # constraints in place; local SQLite databases are created from the models.
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_constraint("uq_contacts_user_id_email", "contacts", type_="unique")
+        op.create_index(
+            "uq_contacts_user_id_email",
+            "contacts",
+            ["user_id", "email"],
+            unique=True,
+            postgresql_where=sa.text("deleted_at IS NULL"),
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DELETE FROM contacts WHERE deleted_at IS NOT NULL")
+        op.drop_index("uq_contacts_user_id_email", table_name="contacts")
+        op.create_unique_constraint(
+            "uq_contacts_user_id_email", "contacts", ["user_id", "email"]
+        )
+
+    op.drop_index("ix_contacts_user_id_version", table_name="contacts")
+    op.drop_column("contacts", "deleted_at")
+    op.drop_column("contacts", "updated_at")
+    op.drop_column("contacts", "version")
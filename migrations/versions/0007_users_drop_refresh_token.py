@@ -0,0 +1,30 @@
+"""drop users.refresh_token, refresh tokens are stored in Redis
+
+Revision ID: 0007_users_drop_refresh_token
+Revises: 0006_contacts_sync
+Create Date: 2026-10-17 13:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_users_drop_refresh_token"
+down_revision: Union[str, None] = "0006_contacts_sync"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index("ix_users_refresh_token", table_name="users")
+    op.drop_column("users", "refresh_token")
+
+
+def downgrade() -> None:
+    op.add_column(
+        "users", sa.Column("refresh_token", sa.String(length=255), nullable=True)
+    )
+    op.create_index("ix_users_refresh_token", "users", ["refresh_token"])
@@ -1,17 +1,31 @@
 import pathlib
+from typing import Literal
+
 from pydantic_settings import BaseSettings
-from pydantic import ConfigDict
+from pydantic import BaseModel, ConfigDict
 
 
 file_env = pathlib.Path(__file__).parent.parent.parent.joinpath(".env")
 
 
+class RateLimitPolicy(BaseModel):
+    """
+    Token bucket policy: a burst of up to `times` requests, refilled at
+    `times` requests per `seconds`, counted per client IP or per user.
+    """
+
+    times: int
+    seconds: float
+    per: Literal["ip", "user"] = "ip"
+
+
 class Settings(BaseSettings):
     """
     Settings for the project.
     """
 
     sqlalchemy_database_url: str
+    sqlalchemy_replica_url: str | None = None
     secret_key: str
     algorithm: str
     mail_username: str
@@ -22,8 +36,60 @@ class Settings(BaseSettings):
     cloudinary_name: str
     cloudinary_api_key: str
     cloudinary_api_secret: str
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_query_cache_size: int = 500
+    db_statement_cache_size: int = 100
+    contacts_import_batch_size: int = 1000
+    contacts_import_max_errors: int = 1000
+    contacts_export_chunk_size: int = 500
     redis_host: str = 'localhost'
     redis_port: int = 6379
+    user_cache_ttl: int = 900
+    user_cache_local_ttl: int = 30
+    user_cache_local_size: int = 10000
+    contacts_cache_enabled: bool = False
+    contacts_cache_ttl: int = 300
+    storage_backend: str = "cloudinary"
+    storage_local_root: str = "media"
+    storage_local_url: str = "/media"
+    avatar_max_size: int = 5 * 1024 * 1024
+    avatar_content_types: list[str] = ["image/jpeg", "image/png", "image/gif", "image/webp"]
+    avatar_max_pixels: int = 40_000_000
+    avatar_sizes: list[int] = [64, 128, 256]
+    avatar_default_size: int = 256
+    email_worker_id: str = "default"
+    email_batch_size: int = 50
+    email_max_attempts: int = 6
+    email_retry_base_delay: float = 10
+    email_retry_max_delay: float = 3600
+    token_cache_size: int = 10000
+    refresh_token_ttl: int = 7 * 24 * 3600
+    jwt_key_files: list[str] = []
+    jwt_key_algorithm: str = "ES256"
+    jwt_accept_hmac: bool = True
+    token_version_local_ttl: float = 5
+    rate_limit_enabled: bool = True
+    rate_limit_local_size: int = 10000
+    rate_limit_policies: dict[str, RateLimitPolicy] = {
+        "root": RateLimitPolicy(times=2, seconds=5),
+        "signup": RateLimitPolicy(times=5, seconds=60),
+        "login": RateLimitPolicy(times=10, seconds=60),
+        "email": RateLimitPolicy(times=5, seconds=300),
+        "reset_password": RateLimitPolicy(times=5, seconds=300),
+        "contacts_bulk": RateLimitPolicy(times=10, seconds=60, per="user"),
+    }
+    login_max_failures_account: int = 5
+    login_max_failures_ip: int = 20
+    login_failure_window: int = 900
+    login_lockout_base: float = 30
+    login_lockout_max: float = 3600
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 64
     
     model_config = ConfigDict(env_file = file_env, env_file_encoding = "utf-8")
 
@@ -1,2 +1,2 @@
-from .connect import get_session, DatabaseSessionManager
+from .connect import get_session, get_read_session, DatabaseSessionManager
 from .models import User, Contact, Base
\ No newline at end of file
@@ -1,35 +1,226 @@
 import contextlib
+import time
+from contextvars import ContextVar
 from typing import AsyncIterator
 
+from sqlalchemy import Select, event, exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from conf import settings
 
 SQLALCHEMY_DATABASE_URL = settings.sqlalchemy_database_url
+SQLALCHEMY_REPLICA_URL = settings.sqlalchemy_replica_url
+
+# Set once anything is written in the current request (task), so that later
+# reads in the same request are served by the primary and see the write.
+_primary_pinned: ContextVar[bool] = ContextVar("primary_pinned", default=False)
 
 
 class Base(DeclarativeBase):
     pass
 
 
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long callers wait for a free connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.waits += 1
+            self.wait_seconds += elapsed
+            self.max_wait_seconds = max(self.max_wait_seconds, elapsed)
+
+
+@event.listens_for(Session, "after_flush")
+def _pin_after_flush(session, flush_context):
+    _primary_pinned.set(True)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _pin_after_dml(orm_execute_state):
+    if not orm_execute_state.is_select:
+        _primary_pinned.set(True)
+
+
+class RoutingSession(Session):
+    """
+    Session that sends SELECT statements to the read replica.
+
+    Everything else, and every statement issued after a write in the same
+    request, goes to the primary, which gives read-your-writes semantics.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        replica = self.info.get("replica")
+        if (
+            replica is not None
+            and isinstance(clause, Select)
+            and not self._flushing
+            and not _primary_pinned.get()
+        ):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+def engine_options(url: str) -> tuple[str, dict]:
+    """
+    Builds the engine URL and keyword arguments from the pool settings.
+
+    SQLite uses its own single-connection pools, so queue pool sizing is
+    applied only to server databases.
+    """
+    url = make_url(url)
+    options = {
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+        "query_cache_size": settings.db_query_cache_size,
+    }
+
+    if url.get_backend_name() != "sqlite":
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+
+    if (
+        url.get_driver_name() == "asyncpg"
+        and "prepared_statement_cache_size" not in url.query
+    ):
+        url = url.update_query_dict(
+            {"prepared_statement_cache_size": str(settings.db_statement_cache_size)}
+        )
+
+    return url.render_as_string(hide_password=False), options
+
+
 class DatabaseSessionManager:
-    def __init__(self, url: str):
-        self._engine: AsyncEngine | None = create_async_engine(url)
-        self._session_maker: async_sessionmaker | None = async_sessionmaker(
+    def __init__(self, url: str, replica_url: str | None = None):
+        self._url = url
+        self._replica_url = replica_url
+        self._engine: AsyncEngine | None = None
+        self._replica_engine: AsyncEngine | None = None
+        self._session_maker: async_sessionmaker | None = None
+        self._read_session_maker: async_sessionmaker | None = None
+
+    def init(self) -> None:
+        """
+        Creates the engine and the session factory, if not created yet.
+        """
+        if self._engine is not None:
+            return
+        url, options = engine_options(self._url)
+        self._engine = create_async_engine(url, **options)
+        self._session_maker = async_sessionmaker(
             autocommit=False, expire_on_commit=False, autoflush=False, bind=self._engine
         )
+        self._read_session_maker = self._session_maker
+
+        if self._replica_url:
+            url, options = engine_options(self._replica_url)
+            self._replica_engine = create_async_engine(url, **options)
+            self._read_session_maker = async_sessionmaker(
+                autocommit=False,
+                expire_on_commit=False,
+                autoflush=False,
+                bind=self._engine,
+                sync_session_class=RoutingSession,
+                info={"replica": self._replica_engine.sync_engine},
+            )
+
+    async def close(self) -> None:
+        """
+        Disposes the engines and closes all pooled connections.
+        """
+        if self._engine is None:
+            return
+        await self._engine.dispose()
+        if self._replica_engine is not None:
+            await self._replica_engine.dispose()
+        self._engine = None
+        self._replica_engine = None
+        self._session_maker = None
+        self._read_session_maker = None
+
+    def stats(self) -> dict:
+        """
+        Returns connection pool statistics for monitoring.
+        """
+        if self._engine is None:
+            return {"initialized": False}
+
+        result = {"initialized": True, **self._pool_stats(self._engine)}
+        if self._replica_engine is not None:
+            result["replica"] = self._pool_stats(self._replica_engine)
+        return result
+
+    @staticmethod
+    def _pool_stats(engine: AsyncEngine) -> dict:
+        pool = engine.pool
+        result = {"pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            result.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=max(0, pool.overflow()),
+            )
+        if isinstance(pool, TimedQueuePool):
+            result.update(
+                waits=pool.waits,
+                timeouts=pool.timeouts,
+                avg_wait_ms=round(pool.wait_seconds * 1000 / pool.waits, 3)
+                if pool.waits
+                else 0.0,
+                max_wait_ms=round(pool.max_wait_seconds * 1000, 3),
+            )
+        return result
 
     @contextlib.asynccontextmanager
     async def session(self) -> AsyncIterator[AsyncSession]:
-        if self._session_maker is None:
-            raise Exception("DatabaseSessionManager is not initialized.")
-        session = self._session_maker()
+        # The application initializes the manager on startup; scripts and
+        # tests that skip the lifespan get a lazily created engine instead.
+        self.init()
+        async with self._managed(self._session_maker()) as session:
+            yield session
+
+    @contextlib.asynccontextmanager
+    async def read_session(self) -> AsyncIterator[AsyncSession]:
+        """
+        Session for read-mostly work: reads go to the replica when one is
+        configured, writes and reads after a write go to the primary.
+        """
+        self.init()
+        async with self._managed(self._read_session_maker()) as session:
+            yield session
+
+    @staticmethod
+    @contextlib.asynccontextmanager
+    async def _managed(session: AsyncSession) -> AsyncIterator[AsyncSession]:
         try:
             yield session
         except Exception as err:
@@ -39,10 +230,16 @@ class DatabaseSessionManager:
             await session.close()
 
 
-sessionmanager = DatabaseSessionManager(SQLALCHEMY_DATABASE_URL)
+sessionmanager = DatabaseSessionManager(SQLALCHEMY_DATABASE_URL, SQLALCHEMY_REPLICA_URL)
 
 
 # Dependency
 async def get_session():
     async with sessionmanager.session() as session:
         yield session
+
+
+# Dependency for read-only routes
+async def get_read_session():
+    async with sessionmanager.read_session() as session:
+        yield session
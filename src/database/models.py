@@ -17,8 +17,13 @@ from sqlalchemy import (
     func,
     DateTime,
     MetaData,
+    Index,
+    DDL,
+    event,
+    text,
 )
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import validates
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
@@ -27,22 +32,119 @@ metadata = MetaData()
 Base = declarative_base(metadata=metadata)
 
 
+CONTACT_SEARCH_VECTOR = (
+    "to_tsvector('simple'::regconfig, first_name || ' ' || last_name || ' ' "
+    "|| email || ' ' || phone_number || ' ' || coalesce(additional_data, ''))"
+)
+
+
 class Contact(Base):
     """
     Represents a contact in the contacts table.
     """
 
     __tablename__ = "contacts"
+    __table_args__ = (
+        # Soft-deleted contacts keep their email, so uniqueness only applies
+        # to live rows.
+        Index(
+            "uq_contacts_user_id_email",
+            "user_id",
+            "email",
+            unique=True,
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+        Index("ix_contacts_user_id_id", "user_id", "id"),
+        Index("ix_contacts_user_id_version", "user_id", "version", "id"),
+        Index("ix_contacts_user_id_birthday_md", "user_id", "birthday_md"),
+        Index(
+            "ix_contacts_search", text(CONTACT_SEARCH_VECTOR), postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     first_name: Mapped[str] = mapped_column(nullable=False)
     last_name: Mapped[str] = mapped_column(nullable=False)
-    email: Mapped[str] = mapped_column(nullable=False, unique=True)
+    email: Mapped[str] = mapped_column(nullable=False)
     phone_number: Mapped[str] = mapped_column(nullable=False)
     birthday: Mapped[datetime] = mapped_column(Date, nullable=False)
+    birthday_md: Mapped[int] = mapped_column(Integer, nullable=True)
     additional_data: Mapped[str] = mapped_column(nullable=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     user: Mapped["User"] = relationship("User", back_populates="contacts", lazy=True)
+    # Value of User.contacts_version written by the change that last touched
+    # this row; the delta sync feed is ordered by it.
+    version: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=func.now(), onupdate=func.now(), nullable=True
+    )
+    deleted_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+
+    @validates("birthday")
+    def _sync_birthday_md(self, key, value):
+        """
+        Keeps ``birthday_md`` (month * 100 + day) in sync with ``birthday``,
+        so upcoming birthdays can be selected by an index range scan.
+        """
+        self.birthday_md = birthday_md(value)
+        return value
+
+
+def birthday_md(birthday) -> int | None:
+    """
+    Returns the month/day key (``month * 100 + day``) of a birthday date.
+    """
+    if not hasattr(birthday, "month"):
+        return None
+    return birthday.month * 100 + birthday.day
+
+
+# Full-text search -----------------------------------------------------------
+#
+# PostgreSQL: a GIN index over CONTACT_SEARCH_VECTOR (declared on Contact).
+# repository.contacts.search_contacts uses the very same expression, and it
+# contains only literals, so the planner can match it against the index.
+#
+# SQLite (tests, local development): an external-content FTS5 table kept in
+# sync with contacts by triggers.
+
+CONTACTS_FTS_COLUMNS = "first_name, last_name, email, phone_number, additional_data"
+
+for statement in (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+        {CONTACTS_FTS_COLUMNS}, content='contacts', content_rowid='id'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS contacts_fts_ai AFTER INSERT ON contacts BEGIN
+        INSERT INTO contacts_fts(rowid, {CONTACTS_FTS_COLUMNS})
+        VALUES (new.id, new.first_name, new.last_name, new.email,
+                new.phone_number, new.additional_data);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS contacts_fts_ad AFTER DELETE ON contacts BEGIN
+        INSERT INTO contacts_fts(contacts_fts, rowid, {CONTACTS_FTS_COLUMNS})
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email,
+                old.phone_number, old.additional_data);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS contacts_fts_au AFTER UPDATE ON contacts BEGIN
+        INSERT INTO contacts_fts(contacts_fts, rowid, {CONTACTS_FTS_COLUMNS})
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email,
+                old.phone_number, old.additional_data);
+        INSERT INTO contacts_fts(rowid, {CONTACTS_FTS_COLUMNS})
+        VALUES (new.id, new.first_name, new.last_name, new.email,
+                new.phone_number, new.additional_data);
+    END""",
+):
+    event.listen(
+        Contact.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
+
+event.listen(
+    Contact.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS contacts_fts").execute_if(dialect="sqlite"),
+)
 
 
 class User(Base):
@@ -60,7 +162,9 @@ class User(Base):
         "created_at", default=func.now(), nullable=True
     )
     avatar: Mapped[str] = mapped_column(String(255), nullable=True)
-    refresh_token: Mapped[str] = mapped_column(String(255), nullable=True)
     confirmed: Mapped[bool] = mapped_column(default=False)
     contacts: Mapped["Contact"] = relationship("Contact", back_populates="user")
-    reset_token: Mapped[str] = mapped_column(String(255), nullable=True)
+    reset_token: Mapped[str] = mapped_column(String(255), nullable=True, index=True)
+    contacts_version: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
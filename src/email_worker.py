@@ -0,0 +1,25 @@
+"""
+Run the outbound email worker.
+
+The worker takes email jobs queued by the API from Redis and sends them over
+a single reused SMTP connection, retrying failed messages with exponential
+backoff and moving permanently failing ones to the ``email:dead`` list.
+
+Example::
+
+    To start the worker, run::
+
+        python src/email_worker.py
+"""
+
+import asyncio
+import logging
+
+from services.mail_queue import create_worker
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    asyncio.run(create_worker().run())
@@ -16,14 +16,16 @@ Example::
         python src/main.py
 """
 
+import asyncio
+import contextlib
+
 import uvicorn
 
-from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.staticfiles import StaticFiles
 
-from fastapi_limiter.depends import RateLimiter
-from fastapi_limiter import FastAPILimiter
-import redis.asyncio as redis
 
 
 
@@ -32,13 +34,17 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from conf import settings
 
 
-from database.connect import get_session
+from database.connect import get_session, sessionmanager
 
 from routes.auth_routs import router as auth_router
 from routes.contacts_routs import router as contacts_router
+from services.cache import response_cache, user_cache
+from services.auth import auth_service
+from services.rate_limit import login_guard, rate_limit, rate_limiter
 
 
 app = FastAPI(
+    default_response_class=ORJSONResponse,
     title="Contacts Dadabase",
     description="API for Connecting with Contacts Dadabase",
      exclude=["Body_login_users_login_post", "TokenModel"]
@@ -56,14 +62,29 @@ app.add_middleware(
 app.include_router(auth_router, prefix='/users')
 app.include_router(contacts_router, prefix='/contacts')
 
+if settings.storage_backend == "local":
+    app.mount(
+        settings.storage_local_url,
+        StaticFiles(directory=settings.storage_local_root, check_dir=False),
+        name="media",
+    )
+
 @app.on_event("startup")
 async def startup():
-    r = redis.from_url(settings.redis_host, encoding="utf-8", decode_responses=True)
-    await  FastAPILimiter.init(r)
+    sessionmanager.init()
+    app.state.user_cache_listener = asyncio.create_task(user_cache.listen())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.user_cache_listener.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await app.state.user_cache_listener
+    await sessionmanager.close()
 
 
 @app.get("/", tags=["Root"],
-dependencies=[Depends(RateLimiter(times=2, seconds=5))]
+dependencies=[Depends(rate_limit("root"))]
 )
 async def root():
     """
@@ -79,6 +100,22 @@ async def root():
     return {"message": "Hello World!"}
 
 
+@app.get("/.well-known/jwks.json", tags=["Root"])
+async def jwks(response: Response):
+    """
+    # Відкриті ключі JWT
+
+    Повертає відкриті ключі, якими перевіряються підписи токенів, у форматі
+    JWKS. Ключ токена визначається за заголовком `kid`. Список порожній, якщо
+    токени підписуються HMAC.
+
+    ## Відповідь
+    - **keys**: Список відкритих ключів (JWK)
+    """
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return auth_service.keys.jwks()
+
+
 @app.get("/api/healthchecker", tags=["Root"])
 async def healthchecker(session: AsyncSession = Depends(get_session)):
     """
@@ -112,4 +149,33 @@ async def healthchecker(session: AsyncSession = Depends(get_session)):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error connecting to the database",
-        )
\ No newline at end of file
+        )
+
+@app.get("/api/metrics", tags=["Root"])
+async def metrics():
+    """
+    # Метрики воркера
+
+    Повертає внутрішні метрики поточного процесу для моніторингу.
+
+    ## Відповідь
+    - **db_pool**: Стан пулу з'єднань з базою даних (розмір, видані з'єднання,
+      переповнення, кількість та час очікування вільного з'єднання)
+    - **password_hashing**: Стан пулу хешування паролів (потоки, запити в роботі
+      та в черзі, відхилені та завершені запити, середній час хешування)
+    - **contacts_cache**: Стан кешу відповідей зі списками контактів (чи увімкнено,
+      влучання, промахи, помилки Redis)
+    - **rate_limit**: Стан обмеження частоти запитів (пропущені, відхилені,
+      відхилені без звернення до Redis, помилки Redis)
+    - **login_guard**: Стан захисту входу (невдалі спроби, заблоковані запити,
+      заблоковані без звернення до Redis, помилки Redis)
+    - **refresh_tokens**: Кількість виявлених повторних використань токенів оновлення
+    """
+    return {
+        "db_pool": sessionmanager.stats(),
+        "password_hashing": auth_service.hasher.stats(),
+        "contacts_cache": response_cache.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "login_guard": login_guard.stats(),
+        "refresh_tokens": auth_service.refresh_tokens.stats(),
+    }
@@ -1,23 +1,24 @@
-from .contacts import (
-    create_contact,
-    get_all_contacts,
-    delete_contact,
-    update_contact,
-    is_upcoming_birthday,
-    get_upcoming_birthdays,
-)
-
 from .users import (
     get_user_by_email,
     create_user,
-    update_token,
     confirmed_email,
     get_user_by_reset_token,
     update_avatar,
-    save_reset_token
+    save_reset_token,
+    update_password,
+)
+
+from .contacts import (
+    create_contact,
+    get_all_contacts,
+    delete_contact,
+    update_contact,
+    get_upcoming_birthdays,
 )
 
-from .cloudinary import (
-    upload_to_cloudinary,
+from .avatars import (
+    upload_avatar,
+    read_avatar,
+    avatar_url,
     update_user_avatar,
 )
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""
+Файл `avatars.py` містить функції завантаження аватарів користувачів та
+збереження їх адрес.
+
+Із завантаженого зображення на сервері створюються квадратні мініатюри
+розмірів `avatar_sizes` у форматах JPEG та WebP. Мініатюри зберігаються у
+сховищі файлів (`services.storage`) під ключами з версією аватара, тому їх
+можна віддавати клієнтам з довготривалими заголовками кешування.
+"""
+
+import asyncio
+import io
+import secrets
+from typing import BinaryIO
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image, ImageOps
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from repository import update_avatar
+from conf import settings
+from database import User
+from services import storage as storage_service
+
+
+# Формати мініатюр: розширення -> (формат Pillow, MIME-тип, параметри збереження)
+AVATAR_FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 85, "optimize": True, "progressive": True}),
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+}
+
+# Початкові байти файлів дозволених типів зображень
+AVATAR_SIGNATURES = {
+    "image/jpeg": (b"\xff\xd8\xff",),
+    "image/png": (b"\x89PNG\r\n\x1a\n",),
+    "image/gif": (b"GIF87a", b"GIF89a"),
+    "image/webp": (b"RIFF",),
+}
+
+
+def check_avatar(file: UploadFile) -> None:
+    """
+    Перевіряє тип і розмір файлу аватара до його завантаження в сховище.
+
+    Parameters:
+        file (UploadFile): Завантажений файл.
+
+    Raises:
+        HTTPException: 415, якщо тип файлу не дозволений або вміст файлу не
+        відповідає заявленому типу; 413, якщо файл перевищує `avatar_max_size`.
+    """
+    if file.content_type not in settings.avatar_content_types:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported file type, expected one of: "
+            f"{', '.join(settings.avatar_content_types)}",
+        )
+
+    size = file.size
+    if size is None:
+        size = file.file.seek(0, 2)
+    if size > settings.avatar_max_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File is too large, maximum size is {settings.avatar_max_size} bytes",
+        )
+
+    file.file.seek(0)
+    head = file.file.read(12)
+    file.file.seek(0)
+    signatures = AVATAR_SIGNATURES.get(file.content_type, ())
+    if not any(head.startswith(signature) for signature in signatures) or (
+        file.content_type == "image/webp" and head[8:12] != b"WEBP"
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="File content does not match its type",
+        )
+
+
+def avatar_key(user_id: int, version: str, name: str) -> str:
+    """
+    Повертає ключ мініатюри у сховищі, наприклад `avatars/1/ab12cd34/64.webp`.
+    """
+    return f"avatars/{user_id}/{version}/{name}"
+
+
+def render_thumbnails(file: BinaryIO) -> dict[str, bytes]:
+    """
+    Створює мініатюри аватара всіх розмірів і форматів.
+
+    Виконується в пулі потоків, оскільки декодування та стиснення зображень
+    блокують процесор.
+
+    Parameters:
+        file (BinaryIO): Файл зображення.
+
+    Returns:
+        dict[str, bytes]: Вміст мініатюр за іменами файлів, наприклад `64.webp`.
+
+    Raises:
+        HTTPException: 415, якщо файл не вдалося декодувати як зображення;
+        413, якщо зображення містить більше ніж `avatar_max_pixels` пікселів.
+    """
+    try:
+        with Image.open(file) as image:
+            if image.width * image.height > settings.avatar_max_pixels:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="Image dimensions are too large",
+                )
+            # Для JPEG декодуємо одразу у зменшеному масштабі
+            image.draft("RGB", (max(settings.avatar_sizes),) * 2)
+            image = ImageOps.exif_transpose(image)
+            if image.mode in ("RGBA", "LA", "P"):
+                image = image.convert("RGBA")
+                background = Image.new("RGBA", image.size, (255, 255, 255, 255))
+                image = Image.alpha_composite(background, image)
+            image = image.convert("RGB")
+
+            thumbnails = {}
+            for size in settings.avatar_sizes:
+                thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+                for extension, (image_format, _, options) in AVATAR_FORMATS.items():
+                    buffer = io.BytesIO()
+                    thumbnail.save(buffer, image_format, **options)
+                    thumbnails[f"{size}.{extension}"] = buffer.getvalue()
+            return thumbnails
+    except (OSError, Image.DecompressionBombError, SyntaxError) as err:
+        print(err)
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="File is not a valid image",
+        )
+
+
+async def upload_avatar(file: UploadFile, current_user: User) -> str:
+    """
+    Створює мініатюри аватара та зберігає їх у сховищі.
+
+    Parameters:
+        file (UploadFile): Завантажений файл.
+        current_user (User): Поточний користувач.
+
+    Returns:
+        str: Версія аватара, що входить у ключі та URL-адреси мініатюр.
+    """
+    check_avatar(file)
+    thumbnails = await run_in_threadpool(render_thumbnails, file.file)
+
+    version = secrets.token_hex(4)
+    await asyncio.gather(
+        *(
+            storage_service.storage.save(
+                avatar_key(current_user.id, version, name),
+                io.BytesIO(data),
+                AVATAR_FORMATS[name.rsplit(".", 1)[1]][1],
+            )
+            for name, data in thumbnails.items()
+        )
+    )
+    return version
+
+
+async def read_avatar(user_id: int, version: str, name: str) -> bytes | None:
+    """
+    Читає мініатюру аватара зі сховища.
+
+    Parameters:
+        user_id (int): Ідентифікатор користувача.
+        version (str): Версія аватара.
+        name (str): Ім'я мініатюри, наприклад `64.webp`.
+
+    Returns:
+        bytes | None: Вміст мініатюри або None, якщо її немає.
+    """
+    return await storage_service.storage.read(avatar_key(user_id, version, name))
+
+
+def avatar_url(user_id: int, version: str, name: str) -> str | None:
+    """
+    Повертає публічну адресу мініатюри в CDN сховища.
+
+    Parameters:
+        user_id (int): Ідентифікатор користувача.
+        version (str): Версія аватара.
+        name (str): Ім'я мініатюри, наприклад `64.webp`.
+
+    Returns:
+        str | None: Адреса мініатюри або None, якщо сховище не має CDN і
+        мініатюру слід читати через `read_avatar`.
+    """
+    return storage_service.storage.url(avatar_key(user_id, version, name))
+
+
+async def update_user_avatar(src_url: str, current_user: User, session: AsyncSession):
+    user = await update_avatar(current_user.email, src_url, session)
+    return user
@@ -1,16 +1,88 @@
-from datetime import date, datetime
+import base64
+import binascii
+import calendar
+import codecs
+import csv
+import io
+import itertools
+import json
+import re
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, BinaryIO, Iterator
 
 from fastapi import Depends, HTTPException
 from fastapi import status
-
-from sqlalchemy import select
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+
+from sqlalchemy import (
+    column,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    table,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
+from conf import settings
 from database import get_session
 from database import Contact, User
+from database.models import CONTACT_SEARCH_VECTOR, birthday_md
+
+from schemas import ContactBatchOperation, ContactCreate
+from services.cache import response_cache
+
+
+async def _bump_contacts_version(user_id: int, session: AsyncSession) -> int:
+    """
+    Збільшити лічильник версії контактів користувача.
+
+    :param user_id: Ідентифікатор власника контактів.
+    :type user_id: int
+    :param session: Об'єкт сеансу бази даних.
+    :type session: AsyncSession
+    :return: Нова версія, якою позначаються змінені контакти.
+    :rtype: int
+
+    Викликається на початку транзакції, що змінює контакти. `UPDATE` блокує
+    рядок користувача до `commit`, тому зміни контактів одного користувача
+    фіксуються в порядку зростання версій, і версія слугує монотонним
+    курсором для `get_contact_changes`.
+    """
+
+    return await session.scalar(
+        update(User)
+        .filter(User.id == user_id)
+        .values(contacts_version=User.contacts_version + 1)
+        .returning(User.contacts_version)
+    )
 
-from schemas import ContactCreate
+
+async def get_contacts_version(user: User, session: AsyncSession) -> int:
+    """
+    Отримати поточну версію контактів користувача.
+
+    :param user: Об'єкт поточного користувача.
+    :type user: User
+    :param session: Об'єкт сеансу бази даних.
+    :type session: AsyncSession
+    :return: Значення лічильника, що змінюється при кожній зміні контактів.
+    :rtype: int
+
+    Запит читає один рядок таблиці `users` за первинним ключем і не звертається
+    до таблиці контактів.
+    """
+
+    version = await session.scalar(
+        select(User.contacts_version).filter(User.id == user.id)
+    )
+    return version or 0
 
 
 async def create_contact(
@@ -38,6 +110,7 @@ async def create_contact(
         )
 
     try:
+        version = await _bump_contacts_version(user.id, session)
         new_contact = Contact(
             first_name=contact.first_name,
             last_name=contact.last_name,
@@ -45,12 +118,14 @@ async def create_contact(
             phone_number=contact.phone_number,
             birthday=datetime.strptime(contact.birthday, "%Y-%m-%d").date(),
             additional_data=contact.additional_data,
-            user=user,
+            user_id=user.id,
+            version=version,
         )
         session.add(new_contact)
         await session.flush()
         await session.refresh(new_contact)
         await session.commit()
+        await response_cache.invalidate(user.id)
         return new_contact
     except IntegrityError:
         await session.rollback()
@@ -60,24 +135,354 @@ async def create_contact(
         )
 
 
-async def get_all_contacts(user: User, session: AsyncSession):
+async def batch_contacts(
+    operations: list[ContactBatchOperation], user: User, session: AsyncSession
+):
     """
-    Отримати всі контакти.
+    Виконати пакет операцій створення, оновлення та видалення контактів.
 
+    :param operations: Список операцій.
+    :type operations: List[ContactBatchOperation]
     :param user: Об'єкт поточного користувача.
     :type user: User
     :param session: Об'єкт сеансу бази даних.
     :type session: AsyncSession
-    :return: Список контактів.
-    :rtype: List[Contact]
+    :return: Результати операцій у порядку їх передачі.
+    :rtype: List[dict]
+
+    Власники всіх контактів, що оновлюються або видаляються, визначаються
+    одним запитом `IN`. Операції над чужими або неіснуючими контактами, а
+    також повторні операції над тим самим контактом, пропускаються з
+    відповідним статусом. Решта операцій виконується пакетними запитами
+    (`INSERT`, `UPDATE` за первинним ключем, `DELETE ... IN`) в одній
+    транзакції з одним `commit`.
+
+    Викидає:
+    - HTTPException: Якщо пакет порушує унікальність електронної пошти
+      (жодна операція тоді не застосовується).
+    """
+
+    ids = {operation.id for operation in operations if operation.id is not None}
+    owners = {}
+    if ids:
+        rows = await session.execute(
+            select(Contact.id, Contact.user_id).filter(
+                Contact.id.in_(ids), Contact.deleted_at.is_(None)
+            )
+        )
+        owners = dict(rows.all())
+
+    results = [None] * len(operations)
+    creates, updates, deletes, seen = [], [], [], set()
+
+    for index, operation in enumerate(operations):
+        if operation.op == "create":
+            creates.append((index, operation.contact))
+            continue
+
+        if operation.id not in owners:
+            results[index] = {"index": index, "status": 404, "detail": "Contact not found"}
+        elif owners[operation.id] != user.id:
+            results[index] = {"index": index, "status": 403, "detail": "Access denied"}
+        elif operation.id in seen:
+            detail = "Duplicate operation for contact"
+            results[index] = {"index": index, "status": 409, "detail": detail}
+        else:
+            seen.add(operation.id)
+            results[index] = {"index": index, "status": 200, "id": operation.id}
+            if operation.op == "update":
+                updates.append((operation.id, operation.contact))
+            else:
+                deletes.append(operation.id)
+
+    if not (creates or updates or deletes):
+        return results
+
+    try:
+        version = await _bump_contacts_version(user.id, session)
+        if creates:
+            new_ids = await session.scalars(
+                insert(Contact).returning(Contact.id, sort_by_parameter_order=True),
+                [_contact_values(contact, user.id, version) for _, contact in creates],
+            )
+            for (index, _), new_id in zip(creates, new_ids.all()):
+                results[index] = {"index": index, "status": 201, "id": new_id}
+        if updates:
+            await session.execute(
+                update(Contact),
+                [
+                    {"id": contact_id, **_contact_values(contact, user.id, version)}
+                    for contact_id, contact in updates
+                ],
+            )
+        if deletes:
+            await session.execute(
+                update(Contact)
+                .filter(Contact.id.in_(deletes))
+                .values(deleted_at=func.now(), updated_at=func.now(), version=version)
+            )
+        await session.commit()
+        await response_cache.invalidate(user.id)
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Contact with the same email already exists",
+        )
+
+    return results
+
+
+def _encode_cursor(payload: dict) -> str:
+    """
+    Закодувати курсор пагінації у непрозорий рядок.
+
+    :param payload: Дані курсора (наприклад, ідентифікатор останнього контакту).
+    :type payload: dict
+    :return: Рядок курсора у форматі base64url без доповнення.
+    :rtype: str
+    """
+
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _decode_cursor(cursor: str) -> dict:
+    """
+    Розкодувати непрозорий курсор пагінації.
+
+    :param cursor: Рядок курсора, отриманий від `_encode_cursor`.
+    :type cursor: str
+    :return: Дані курсора.
+    :rtype: dict
+
+    Викидає:
+    - HTTPException: Якщо курсор пошкоджений.
+    """
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, ValueError):
+        payload = None
+
+    if not isinstance(payload, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return payload
+
+
+async def get_all_contacts(
+    user: User,
+    session: AsyncSession,
+    limit: int = 50,
+    after: str | None = None,
+    name: str | None = None,
+    email: str | None = None,
+    phone: str | None = None,
+):
+    """
+    Отримати сторінку контактів.
+
+    :param user: Об'єкт поточного користувача.
+    :type user: User
+    :param session: Об'єкт сеансу бази даних.
+    :type session: AsyncSession
+    :param limit: Максимальна кількість контактів на сторінці.
+    :type limit: int
+    :param after: Курсор попередньої сторінки (`next_cursor`), або `None` для першої.
+    :type after: str | None
+    :param name: Префікс імені або прізвища для фільтрації.
+    :type name: str | None
+    :param email: Префікс електронної пошти для фільтрації.
+    :type email: str | None
+    :param phone: Префікс номера телефону для фільтрації.
+    :type phone: str | None
+    :return: Словник зі списком контактів `items` та курсором наступної сторінки `next_cursor`.
+    :rtype: dict
+
+    Використовує пагінацію за ключем `(user_id, id)` замість OFFSET, тому час
+    отримання сторінки не залежить від її глибини. `next_cursor` дорівнює `None`,
+    якщо сторінка остання.
+    """
+
+    query = select(Contact).filter(
+        Contact.user_id == user.id, Contact.deleted_at.is_(None)
+    )
+
+    if after is not None:
+        last_id = _decode_cursor(after).get("id")
+        if not isinstance(last_id, int):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+        query = query.filter(Contact.id > last_id)
+
+    if name:
+        query = query.filter(
+            or_(
+                Contact.first_name.istartswith(name, autoescape=True),
+                Contact.last_name.istartswith(name, autoescape=True),
+            )
+        )
+    if email:
+        query = query.filter(Contact.email.istartswith(email, autoescape=True))
+    if phone:
+        query = query.filter(Contact.phone_number.startswith(phone, autoescape=True))
+
+    # Вибираємо на один рядок більше, щоб дізнатися, чи є наступна сторінка
+    results = await session.execute(query.order_by(Contact.id).limit(limit + 1))
+    contacts = results.scalars().all()
+
+    next_cursor = None
+    if len(contacts) > limit:
+        contacts = contacts[:limit]
+        next_cursor = _encode_cursor({"id": contacts[-1].id})
+
+    return {"items": contacts, "next_cursor": next_cursor}
+
+
+async def search_contacts(
+    q: str,
+    user: User,
+    session: AsyncSession,
+    limit: int = 20,
+    after: str | None = None,
+):
+    """
+    Шукати контакти за префіксами слів.
+
+    :param q: Пошуковий запит; кожне слово шукається як префікс.
+    :type q: str
+    :param user: Об'єкт поточного користувача.
+    :type user: User
+    :param session: Об'єкт сеансу бази даних.
+    :type session: AsyncSession
+    :param limit: Максимальна кількість контактів на сторінці.
+    :type limit: int
+    :param after: Курсор попередньої сторінки (`next_cursor`), або `None` для першої.
+    :type after: str | None
+    :return: Словник зі списком контактів `items` та курсором наступної сторінки `next_cursor`.
+    :rtype: dict
 
-    Отримує всі контакти, які належать користувачу з вказаною електронною поштою.
+    Шукає за іменем, прізвищем, електронною поштою, телефоном та додатковими
+    даними. У PostgreSQL використовується GIN-індекс за `tsvector`
+    (`CONTACT_SEARCH_VECTOR`), у SQLite - таблиця FTS5 `contacts_fts`.
+    Результати впорядковані за релевантністю, тому курсор містить зсув.
     """
 
-    results = await session.execute(select(Contact).filter(Contact.user_id == user.id))
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return {"items": [], "next_cursor": None}
+
+    offset = 0
+    if after is not None:
+        offset = _decode_cursor(after).get("offset")
+        if not isinstance(offset, int) or offset < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+
+    if session.get_bind().dialect.name == "postgresql":
+        vector = literal_column(CONTACT_SEARCH_VECTOR)
+        query = func.to_tsquery(
+            literal_column("'simple'::regconfig"),
+            " & ".join(f"{term}:*" for term in terms),
+        )
+        statement = (
+            select(Contact)
+            .filter(vector.op("@@")(query))
+            .order_by(func.ts_rank(vector, query).desc(), Contact.id)
+        )
+    else:
+        fts = table("contacts_fts", column("rowid"))
+        statement = (
+            select(Contact)
+            .join(fts, fts.c.rowid == Contact.id)
+            .filter(
+                literal_column("contacts_fts").match(
+                    " ".join(f'"{term}"*' for term in terms)
+                )
+            )
+            .order_by(func.bm25(literal_column("contacts_fts")), Contact.id)
+        )
 
+    results = await session.execute(
+        statement.filter(Contact.user_id == user.id, Contact.deleted_at.is_(None))
+        .offset(offset)
+        .limit(limit + 1)
+    )
     contacts = results.scalars().all()
-    return contacts
+
+    next_cursor = None
+    if len(contacts) > limit:
+        contacts = contacts[:limit]
+        next_cursor = _encode_cursor({"offset": offset + limit})
+
+    return {"items": contacts, "next_cursor": next_cursor}
+
+
+async def get_contact_changes(
+    user: User,
+    session: AsyncSession,
+    since: str | None = None,
+    limit: int = 500,
+):
+    """
+    Отримати контакти, змінені після курсора синхронізації.
+
+    :param user: Об'єкт поточного користувача.
+    :type user: User
+    :param session: Об'єкт сеансу бази даних.
+    :type session: AsyncSession
+    :param since: Курсор попередньої синхронізації (`next_cursor`), або `None` для повної.
+    :type since: str | None
+    :param limit: Максимальна кількість змін у відповіді.
+    :type limit: int
+    :return: Словник зі зміненими контактами `upserts`, ідентифікаторами видалених
+        контактів `deleted`, курсором `next_cursor` та ознакою `has_more`.
+    :rtype: dict
+
+    Зміни впорядковані за `(version, id)` і вибираються за індексом
+    `(user_id, version, id)`. Повна синхронізація (без курсора) не повертає
+    ідентифікаторів видалених контактів, але курсор переходить і через них. Якщо `has_more` дорівнює `True`, наступну порцію слід
+    запросити одразу з отриманим `next_cursor`.
+    """
+
+    version, last_id = 0, 0
+    if since is not None:
+        cursor = _decode_cursor(since)
+        version, last_id = cursor.get("v"), cursor.get("id")
+        if not isinstance(version, int) or not isinstance(last_id, int):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+
+    results = await session.execute(
+        select(Contact)
+        .filter(
+            Contact.user_id == user.id,
+            tuple_(Contact.version, Contact.id) > tuple_(version, last_id),
+        )
+        .order_by(Contact.version, Contact.id)
+        .limit(limit + 1)
+    )
+    changes = results.scalars().all()
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    if changes:
+        version, last_id = changes[-1].version, changes[-1].id
+
+    deleted = [contact.id for contact in changes if contact.deleted_at is not None]
+    return {
+        "upserts": [contact for contact in changes if contact.deleted_at is None],
+        # Клієнт без курсора ще не бачив видалених контактів
+        "deleted": deleted if since is not None else [],
+        "next_cursor": _encode_cursor({"v": version, "id": last_id}),
+        "has_more": has_more,
+    }
 
 
 async def delete_contact(
@@ -95,12 +500,14 @@ async def delete_contact(
     :rtype: dict
 
     Видаляє контакт з вказаним ідентифікатором, якщо користувач з вказаною
-    електронною поштою є власником контакту.
+    електронною поштою є власником контакту. Рядок залишається в таблиці з
+    позначкою `deleted_at`, щоб клієнти дізналися про видалення з
+    `get_contact_changes`.
     """
 
     contact = await session.get(Contact, contact_id)
 
-    if not contact:
+    if not contact or contact.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Contact not found")
     
     if contact.user_id != user.id:
@@ -108,8 +515,13 @@ async def delete_contact(
             status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
         )
 
-    await session.delete(contact)
+    contact.version = await _bump_contacts_version(user.id, session)
+    # Час бази даних, як і в `onupdate` для `updated_at`, щоб стрічка змін
+    # не змішувала годинник застосунку та бази
+    contact.deleted_at = contact.updated_at = func.now()
     await session.commit()
+    await session.refresh(contact)
+    await response_cache.invalidate(user.id)
     return {"message": "Contact deleted", "contact": contact}
 
 
@@ -144,7 +556,7 @@ async def update_contact(
 
     existing_contact = await session.get(Contact, contact_id)
 
-    if not existing_contact:
+    if not existing_contact or existing_contact.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Contact not found")
 
     if existing_contact.user_id != user.id:
@@ -153,6 +565,7 @@ async def update_contact(
         )
 
     try:
+        existing_contact.version = await _bump_contacts_version(user.id, session)
         existing_contact.first_name = contact.first_name
         existing_contact.last_name = contact.last_name
         existing_contact.email = contact.email
@@ -163,6 +576,7 @@ async def update_contact(
         existing_contact.additional_data = contact.additional_data
 
         await session.commit()
+        await response_cache.invalidate(user.id)
         await session.refresh(existing_contact)
     except IntegrityError:
         await session.rollback()
@@ -174,33 +588,336 @@ async def update_contact(
     return existing_contact
 
 
-def is_upcoming_birthday(birthday: date, start_date: date, end_date: date) -> bool:
+def _contact_values(contact: ContactCreate, user_id: int, version: int) -> dict:
     """
-    Визначити, чи наступає день народження.
+    Перетворити схему контакту на словник значень стовпців таблиці.
 
-    :param birthday: Дата дня народження.
-    :type birthday: date
-    :param start_date: Початкова дата для визначення наступаючих днів народження.
-    :type start_date: date
-    :param end_date: Кінцева дата для визначення наступаючих днів народження.
-    :type end_date: date
-    :return: `True`, якщо день народження наступає, інакше `False`.
-    :rtype: bool
+    :param contact: Дані контакту.
+    :type contact: ContactCreate
+    :param user_id: Ідентифікатор власника контакту.
+    :type user_id: int
+    :param version: Версія контактів користувача, що записується в рядок.
+    :type version: int
+    :return: Значення стовпців для вставки або оновлення.
+    :rtype: dict
+
+    Використовується для пакетних операцій, що оминають ORM, тому похідні
+    стовпці (`birthday_md`) обчислюються тут явно.
+    """
+
+    birthday = datetime.strptime(contact.birthday, "%Y-%m-%d").date()
+    return {
+        "first_name": contact.first_name,
+        "last_name": contact.last_name,
+        "email": contact.email,
+        "phone_number": contact.phone_number,
+        "birthday": birthday,
+        "birthday_md": birthday_md(birthday),
+        "additional_data": contact.additional_data,
+        "user_id": user_id,
+        "version": version,
+    }
+
+
+def _insert_ignoring_conflicts(session: AsyncSession):
+    """
+    Побудувати `INSERT ... ON CONFLICT DO NOTHING` для діалекту сесії.
+    """
+
+    dialect = session.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    return insert(Contact).on_conflict_do_nothing()
+
+
+def _read_rows(file: BinaryIO, file_format: str) -> Iterator[tuple[int, dict | None]]:
+    """
+    Потоково прочитати рядки CSV або NDJSON з файлу.
+
+    :param file: Бінарний файл завантаження.
+    :type file: BinaryIO
+    :param file_format: Формат файлу: `csv` або `ndjson`.
+    :type file_format: str
+    :return: Генератор пар (номер рядка, словник полів або `None`, якщо рядок не розібрано).
+    :rtype: Iterator[tuple]
+    """
+
+    # `io.TextIOWrapper` не підходить: у Python 3.10 `SpooledTemporaryFile`
+    # (`UploadFile.file`) не має `readable()`. Бінарний файл ітерується
+    # рядками за `\n`, тож `\r\n` та переноси в лапках CSV зберігаються.
+    text = codecs.iterdecode(file, "utf-8-sig")
+    if file_format == "csv":
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            # Порожні клітинки пропускаються, щоб спрацювали значення за замовчуванням
+            yield number, {key: value for key, value in row.items() if key and value}
+        return
+
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+def _read_batch(
+    rows: Iterator[tuple[int, dict | None]], size: int
+) -> tuple[list[tuple[int, dict | None]], Exception | None]:
+    """
+    Прочитати до `size` рядків файлу.
+
+    :param rows: Генератор рядків з `_read_rows`.
+    :type rows: Iterator[tuple]
+    :param size: Максимальна кількість рядків.
+    :type size: int
+    :return: Прочитані рядки та помилку файлу (`UnicodeDecodeError` або
+        `csv.Error`), на якій читання зупинилося, або `None`.
+    :rtype: tuple
+    """
+
+    batch = []
+    try:
+        for row in itertools.islice(rows, size):
+            batch.append(row)
+    except (UnicodeDecodeError, csv.Error) as err:
+        return batch, err
+    return batch, None
+
+
+async def import_contacts(
+    file: BinaryIO, file_format: str, user: User, session: AsyncSession
+):
+    """
+    Імпортувати контакти з файлу CSV або NDJSON.
+
+    :param file: Бінарний файл завантаження.
+    :type file: BinaryIO
+    :param file_format: Формат файлу: `csv` або `ndjson`.
+    :type file_format: str
+    :param user: Користувач, для якого імпортуються контакти.
+    :type user: User
+    :param session: Об'єкт сеансу бази даних.
+    :type session: AsyncSession
+    :return: Кількість вставлених та відхилених рядків і звіт про помилки.
+    :rtype: dict
+
+    Файл читається та перевіряється схемою `ContactCreate` пакетами по
+    `contacts_import_batch_size` рядків у пулі потоків, тому цілий файл не
+    завантажується в пам'ять. Кожен пакет вставляється одним запитом
+    `INSERT ... ON CONFLICT DO NOTHING` і фіксується окремо. Рядки, що
+    конфліктують з наявними контактами, потрапляють у звіт про помилки,
+    розмір якого обмежений `contacts_import_max_errors`.
+
+    Якщо файл пошкоджений (неправильне кодування або синтаксис CSV), імпорт
+    зупиняється на місці помилки: попередні пакети вже зафіксовані, тому
+    повертається частковий звіт з помилкою файлу для рядка, який не вдалося
+    прочитати.
+    """
+
+    rows = _read_rows(file, file_format)
+    report = {"inserted": 0, "failed": 0, "errors": [], "errors_truncated": False}
+
+    def add_error(number: int, errors: list[str]):
+        report["failed"] += 1
+        if len(report["errors"]) < settings.contacts_import_max_errors:
+            report["errors"].append({"row": number, "errors": errors})
+        else:
+            report["errors_truncated"] = True
+
+    last_number, file_error = 0, None
+    while file_error is None:
+        batch, file_error = await run_in_threadpool(
+            _read_batch, rows, settings.contacts_import_batch_size
+        )
+        if batch:
+            last_number = batch[-1][0]
+        elif file_error is None:
+            break
+
+        values, numbers = [], {}
+        for number, row in batch:
+            if row is None:
+                add_error(number, ["Invalid row"])
+                continue
+            try:
+                contact = ContactCreate.model_validate(row)
+            except ValidationError as err:
+                add_error(
+                    number,
+                    [f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in err.errors()],
+                )
+                continue
+            if contact.email in numbers:
+                add_error(number, ["Duplicate email in file"])
+                continue
+            numbers[contact.email] = number
+            values.append(contact)
+
+        if not values:
+            continue
+
+        version = await _bump_contacts_version(user.id, session)
+        values = [_contact_values(contact, user.id, version) for contact in values]
+        result = await session.execute(
+            _insert_ignoring_conflicts(session).returning(Contact.email), values
+        )
+        inserted = set(result.scalars().all())
+        await session.commit()
+        await response_cache.invalidate(user.id)
+
+        report["inserted"] += len(inserted)
+        for email, number in numbers.items():
+            if email not in inserted:
+                add_error(number, ["Contact with the same email already exists"])
+
+    if file_error is not None:
+        # Помилка файлу потрапляє у звіт навіть понад `contacts_import_max_errors`
+        report["failed"] += 1
+        report["errors"].append(
+            {
+                "row": last_number + 1,
+                "errors": [f"Invalid {file_format} file, import stopped: {file_error}"],
+            }
+        )
+
+    report["errors"].sort(key=lambda error: error["row"])
+    return report
+
+
+EXPORT_FIELDS = (
+    "first_name",
+    "last_name",
+    "email",
+    "phone_number",
+    "birthday",
+    "additional_data",
+)
+
+
+def _vcard_escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace(",", "\\,")
+        .replace(";", "\\;")
+    )
+
+
+def _to_vcard(contact: Contact) -> str:
+    lines = [
+        "BEGIN:VCARD",
+        "VERSION:3.0",
+        f"N:{_vcard_escape(contact.last_name)};{_vcard_escape(contact.first_name)};;;",
+        f"FN:{_vcard_escape(f'{contact.first_name} {contact.last_name}')}",
+        f"EMAIL;TYPE=INTERNET:{_vcard_escape(contact.email)}",
+        f"TEL:{_vcard_escape(contact.phone_number)}",
+        f"BDAY:{contact.birthday.isoformat()}",
+    ]
+    if contact.additional_data:
+        lines.append(f"NOTE:{_vcard_escape(contact.additional_data)}")
+    lines.append("END:VCARD")
+    return "\r\n".join(lines) + "\r\n"
+
+
+async def export_contacts(
+    user: User, session: AsyncSession, file_format: str
+) -> AsyncIterator[str]:
+    """
+    Потоково експортувати всі контакти користувача.
+
+    :param user: Об'єкт поточного користувача.
+    :type user: User
+    :param session: Об'єкт сеансу бази даних.
+    :type session: AsyncSession
+    :param file_format: Формат експорту: `csv`, `ndjson` або `vcard`.
+    :type file_format: str
+    :return: Асинхронний генератор фрагментів файлу.
+    :rtype: AsyncIterator[str]
+
+    Контакти читаються курсором на боці сервера порціями по
+    `contacts_export_chunk_size` рядків, і кожна порція одразу серіалізується,
+    тому пам'ять не залежить від кількості контактів.
     """
 
-    birthday_this_year = start_date.replace(
-        year=start_date.year, month=birthday.month, day=birthday.day
+    chunk_size = settings.contacts_export_chunk_size
+    results = await session.stream_scalars(
+        select(Contact)
+        .filter(Contact.user_id == user.id, Contact.deleted_at.is_(None))
+        .order_by(Contact.id)
+        .execution_options(yield_per=chunk_size)
     )
 
-    if start_date <= birthday_this_year <= end_date:
-        return True
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if file_format == "csv":
+        writer.writerow(EXPORT_FIELDS)
+
+    async for partition in results.partitions(chunk_size):
+        for contact in partition:
+            if file_format == "csv":
+                writer.writerow(
+                    [
+                        contact.first_name,
+                        contact.last_name,
+                        contact.email,
+                        contact.phone_number,
+                        contact.birthday.isoformat(),
+                        contact.additional_data or "",
+                    ]
+                )
+            elif file_format == "ndjson":
+                row = {field: getattr(contact, field) for field in EXPORT_FIELDS}
+                row["id"] = contact.id
+                row["birthday"] = contact.birthday.isoformat()
+                buffer.write(json.dumps(row, ensure_ascii=False) + "\n")
+            else:
+                buffer.write(_to_vcard(contact))
+        # Порцію обробили - ORM-об'єкти більше не потрібні сесії
+        session.expunge_all()
+
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _birthday_md_ranges(start_date: date, end_date: date) -> list[tuple[int, int]]:
+    """
+    Обчислити діапазони ключів `birthday_md` для вікна дат.
+
+    :param start_date: Початкова дата вікна (включно).
+    :type start_date: date
+    :param end_date: Кінцева дата вікна (включно).
+    :type end_date: date
+    :return: Список діапазонів `(від, до)` значень `month * 100 + day`.
+    :rtype: List[tuple]
 
-    birthday_next_year = birthday_this_year.replace(year=start_date.year + 1)
+    Вікно, що переходить через кінець року, розбивається на два діапазони.
+    У невисокосний рік день народження 29 лютого святкується 1 березня, тому
+    діапазон, що починається з 1 березня такого року, розширюється до 0229.
+    """
 
-    if start_date <= birthday_next_year <= end_date:
-        return True
+    if (end_date - start_date).days >= 365:
+        return [(101, 1231)]
 
-    return False
+    if start_date.year == end_date.year:
+        ranges = [(start_date, end_date)]
+    else:
+        ranges = [
+            (start_date, date(start_date.year, 12, 31)),
+            (date(end_date.year, 1, 1), end_date),
+        ]
+
+    result = []
+    for low, high in ranges:
+        low_md = birthday_md(low)
+        if low_md == 301 and not calendar.isleap(low.year):
+            low_md = 229
+        result.append((low_md, birthday_md(high)))
+    return result
 
 
 async def get_upcoming_birthdays(
@@ -217,12 +934,12 @@ async def get_upcoming_birthdays(
     :type user: User
     :param session: Об'єкт сесії бази даних (за замовчуванням отримується з `get_session`).
     :type session: AsyncSession, optional
-    :return: Список результатів запиту до бази даних.
-    :rtype: List[dict]
+    :return: Список контактів, у яких дні народження наступають протягом вказаної кількості днів.
+    :rtype: List[Contact]
 
-    Визначає наближені дні народження контактів для заданого користувача.
-    Результати запиту повертаються у вигляді списку словників з контактами,
-    у яких дні народження наступають протягом вказаної кількості днів.
+    Фільтрація виконується в базі даних за індексом `(user_id, birthday_md)`,
+    тому з бази повертаються лише відповідні контакти. Перехід через кінець
+    року та дні народження 29 лютого враховуються в `_birthday_md_ranges`.
 
     Викидає:
     - HTTPException: Якщо користувач не автентифікований.
@@ -233,23 +950,17 @@ async def get_upcoming_birthdays(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated"
         )
 
-    today = datetime.now().date()
-
-    upcoming_birthdays = []
-    results = await session.execute(select(Contact).filter(Contact.user_id == user.id))
-    contacts = results.scalars().all()
+    if days < 0:
+        return []
 
-    for contact in contacts:
-        birthday = contact.birthday
-        next_birthday = datetime(today.year, birthday.month, birthday.day).date()
-
-        if next_birthday < today:
-            next_birthday = datetime(
-                today.year + 1, birthday.month, birthday.day
-            ).date()
-
-        days_until_birthday = (next_birthday - today).days
-        if days_until_birthday <= days:
-            upcoming_birthdays.append(contact)
+    today = datetime.now().date()
+    ranges = _birthday_md_ranges(today, today + timedelta(days=min(days, 366)))
 
-    return upcoming_birthdays
+    results = await session.execute(
+        select(Contact).filter(
+            Contact.user_id == user.id,
+            Contact.deleted_at.is_(None),
+            or_(*(Contact.birthday_md.between(low, high) for low, high in ranges)),
+        )
+    )
+    return results.scalars().all()
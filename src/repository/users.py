@@ -1,7 +1,7 @@
 """
 Файл `users.py` містить функції, пов'язані з операціями користувачів, такі як
 тримання користувача за електронною поштою, створення нового користувача та
-новлення токену оновлення для користувача.
+новлення його даних. Токени оновлення зберігаються в Redis (`services.tokens`).
 """
 
 from datetime import datetime
@@ -17,7 +17,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_session
 from database import User
 
-from services.auth import auth_service
+from services.cache import user_cache
 
 from schemas import UserModel
 
@@ -61,15 +61,12 @@ async def create_user(body: UserModel, session: AsyncSession) -> User:
     except Exception as e:
         print(e)
 
-    refresh_token = await auth_service.create_refresh_token({"sub": body.email})
-
     new_user = User(
         username=body.username,
         email=body.email,
         password=body.password,
         created_at=datetime.now(),
         avatar=avatar,
-        refresh_token=refresh_token,
     )
 
     session.add(new_user)
@@ -79,24 +76,11 @@ async def create_user(body: UserModel, session: AsyncSession) -> User:
     return new_user
 
 
-async def update_token(user: User, token: str | None, session: AsyncSession) -> None:
-    """
-    Оновлює токен оновлення для користувача.
-
-    Parameters:
-        user (User): Об'єкт користувача.
-        token (str | None): Токен оновлення або None, якщо токен не вказаний.
-        session (AsyncSession): Об'єкт сесії бази даних.
-
-    """
-    user.refresh_token = token
-    await session.commit()
-
-
 async def confirmed_email(email: str, session: AsyncSession) -> None:
     user = await get_user_by_email(email, session)
     user.confirmed = True
     await session.commit()
+    await user_cache.invalidate(email)
 
 
 async def save_reset_token(user: User, reset_token: str, session: AsyncSession) -> None:
@@ -111,6 +95,22 @@ async def save_reset_token(user: User, reset_token: str, session: AsyncSession)
     """
     user.reset_token = reset_token
     await session.commit()
+    await user_cache.invalidate(user.email)
+
+
+async def update_password(user: User, password: str, session: AsyncSession) -> None:
+    """
+    Оновлює хеш пароля користувача.
+
+    Parameters:
+        user (User): Об'єкт користувача.
+        password (str): Новий хеш пароля.
+        session (AsyncSession): Об'єкт сесії бази даних.
+
+    """
+    user.password = password
+    await session.commit()
+    await user_cache.invalidate(user.email)
 
 
 async def get_user_by_reset_token(
@@ -141,4 +141,5 @@ async def update_avatar(email, url: str, session: AsyncSession) -> User:
     user = await get_user_by_email(email, session)
     user.avatar = url
     await session.commit()
+    await user_cache.invalidate(email)
     return user
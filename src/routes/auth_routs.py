@@ -7,10 +7,10 @@ from fastapi import (
     Response,
     status,
     Security,
-    BackgroundTasks,
     Request,
     UploadFile,
     File,
+    Path,
 )
 
 from fastapi.security import (
@@ -18,6 +18,7 @@ from fastapi.security import (
     HTTPAuthorizationCredentials,
     HTTPBearer,
 )
+from fastapi.responses import RedirectResponse
 
 from pydantic import EmailStr
 
@@ -30,24 +31,33 @@ from schemas import LoginResponse, RequestEmail, UserDb, UserModel, UserResponse
 from repository import users as repository_users
 from services import auth_service
 from services import send_email, reset_password_by_email
-
-import cloudinary
-import cloudinary.uploader
+from services.rate_limit import client_ip, login_guard, rate_limit
 
 from conf import settings
 
-from repository import upload_to_cloudinary, update_user_avatar
+from repository import upload_avatar, read_avatar, avatar_url, update_user_avatar
+from repository.avatars import AVATAR_FORMATS
 
 router = APIRouter(tags=["User"])
 security = HTTPBearer()
 
 
+def _email_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Email delivery is temporarily unavailable",
+        headers={"Retry-After": "60"},
+    )
+
+
 @router.post(
-    "/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED
+    "/signup",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("signup"))],
 )
 async def signup(
     body: UserModel,
-    background_tasks: BackgroundTasks,
     request: Request,
     session: AsyncSession = Depends(get_session),
 ):
@@ -56,13 +66,14 @@ async def signup(
 
     ## Параметри:
     - body (UserModel): Модель користувача, що містить дані для створення користувача.
-    - background_tasks (BackgroundTasks): Об'єкт для виконання фонових задач асинхронно.
     - request (Request): Об'єкт запиту FastAPI.
     - session (AsyncSession): Об'єкт сесії бази даних.
 
     ## Повертає:
     - UserResponse: Об'єкт відповіді, який містить створеного користувача та
-      повідомлення про успішне створення.
+      повідомлення про успішне створення. Якщо лист підтвердження не вдалося
+      надіслати, повідомлення просить запросити його пізніше через
+      `/request_email`: обліковий запис уже створено.
 
     Викликає:
     - HTTPException: Якщо обліковий запис вже існує.
@@ -73,55 +84,82 @@ async def signup(
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Account already exists"
         )
-    body.password = auth_service.get_password_hash(body.password)
+    body.password = await auth_service.get_password_hash(body.password)
     new_user = await repository_users.create_user(body, session)
-    background_tasks.add_task(
-        send_email, new_user.email, new_user.username, request.base_url
-    )
+    if not await send_email(new_user.email, new_user.username, request.base_url):
+        return {
+            "user": new_user,
+            "detail": "User successfully created, but the confirmation email could "
+            "not be sent. Request it again later.",
+        }
     return {
         "user": new_user,
         "detail": "User successfully created. Check your email for confirmation.",
     }
 
 
-@router.post("/login", response_model=LoginResponse)
+@router.post(
+    "/login",
+    response_model=LoginResponse,
+    dependencies=[Depends(rate_limit("login"))],
+)
 async def login(
+    request: Request,
     body: OAuth2PasswordRequestForm = Depends(),
     session: AsyncSession = Depends(get_session),
 ):
     """
     # Аутентифікація користувача та отримання токенів доступу.
 
+    Після серії невдалих спроб вхід для облікового запису або IP-адреси
+    блокується на час, що зростає з кожною невдачею. Заблоковані запити
+    відхиляються до звернення до бази даних і перевірки паролю.
+
     ## Параметри:
     - body (OAuth2PasswordRequestForm): Форма запиту аутентифікації, яка
       містить дані електронної пошти та пароля.
     - session (SAsyncSession): Об'єкт сесії бази даних.
 
     ## Повертає:
-    - dict: Об'єкт, що містить користувача та токен доступу.
+    - dict: Об'єкт, що містить користувача, токен доступу та токен оновлення.
 
     ## Raises:
-    - HTTPException: Якщо недійсна електронна пошта або пароль.
+    - HTTPException: Якщо недійсна електронна пошта або пароль (401) чи вхід
+      тимчасово заблоковано (429).
 
     """
 
+    ip = client_ip(request)
+    await login_guard.check(body.username, ip)
+
     user = await repository_users.get_user_by_email(body.username, session)
+    valid, new_hash = False, None
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email"
+        # Невідома адреса перевіряється так само довго, як і відома
+        await auth_service.hasher.verify_dummy(body.password)
+    else:
+        valid, new_hash = await auth_service.verify_and_update_password(
+            body.password, user.password
         )
-    if not auth_service.verify_password(body.password, user.password):
+    if not valid:
+        await login_guard.failed(body.username, ip)
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password"
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid email or password",
         )
+    await login_guard.succeeded(body.username)
     if not user.confirmed:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not confirmed"
         )
+    # Перехешовуємо пароль, якщо змінилась вартість bcrypt
+    if new_hash:
+        await repository_users.update_password(user, new_hash, session)
     # Generate JWT
-    access_token = await auth_service.create_access_token(data={"sub": user.email})
-    refresh_token = await auth_service.create_refresh_token(data={"sub": user.email})
-    repository_users.update_token(user, refresh_token, session)
+    family, jti = await auth_service.refresh_tokens.start(user.id)
+    access_token, refresh_token = await auth_service.create_session_tokens(
+        user, family, jti
+    )
 
     return LoginResponse(
         user={"username": user.username, "email": user.email, "avatar": user.avatar},
@@ -138,32 +176,43 @@ async def refresh_token(
     """
     # Оновлює токен доступу за допомогою токена оновлення.
 
+    Кожен токен оновлення можна використати лише один раз: у відповідь
+    видається нова пара токенів. Повторне використання токена відкликає всю
+    сесію. Маршрут не змінює базу даних.
+
     ## Параметри:
     - credentials (HTTPAuthorizationCredentials): Об'єкт, що містить
     відправлені HTTP-заголовки авторизації.
-    - session (AsyncSession): Об'єкт сесії бази даних.
+    - session (AsyncSession): Об'єкт сесії бази даних (лише читання, основна
+    база, бо користувач кешується).
 
     ## Повертає:
-    - TokenModel: Модель токена, яка містить новий токен доступу та оновлення.
+    - LoginResponse: Користувач, новий токен доступу та новий токен оновлення.
 
     ## Raises:
-    - HTTPException: Якщо недійсний токен оновлення або помилка під час декодування.
+    - HTTPException: Якщо недійсний, відкликаний або вже використаний токен оновлення.
 
     """
-    token = credentials.credentials
-    email = await auth_service.decode_refresh_token(token)
-    user = await repository_users.get_user_by_email(email, session)
-    if user.refresh_token != token:
-        await repository_users.update_token(user, None, session)
+    claims = await auth_service.decode_refresh_token(credentials.credentials)
+    email, family = claims["sub"], claims["fam"]
+
+    user = await auth_service.get_user(email, session)
+    if user is None:
+        await auth_service.refresh_tokens.revoke(family)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token"
         )
+    jti = await auth_service.refresh_tokens.rotate(
+        family, claims.get("jti", ""), user.id
+    )
 
-    access_token = await auth_service.create_access_token(data={"sub": email})
-    refresh_token = await auth_service.create_refresh_token(data={"sub": email})
-    repository_users.update_token(user, refresh_token, session)
+    access_token, refresh_token = await auth_service.create_session_tokens(
+        user, family, jti
+    )
     return LoginResponse(
-        user={"username": user.username, "email": user.email}, access_token=access_token
+        user={"username": user.username, "email": user.email},
+        access_token=access_token,
+        refresh_token=refresh_token,
     )
 
 
@@ -175,17 +224,21 @@ async def read_users_me(current_user: User = Depends(auth_service.get_current_us
 @router.get("/logout")
 async def logout(
     response: Response,
+    token: str = Depends(auth_service.oauth2_scheme),
     current_user: User = Depends(auth_service.get_current_user),
-    session: AsyncSession = Depends(get_session),
 ):
     """
-    # Вихід користувача з видаленням токена доступу та закриття сесії бази даних.
+    # Вихід користувача з відкликанням сесії.
+
+    Вихід відкликає всі видані користувачу токени доступу (на інших
+    пристроях їх буде отримано знову за токеном оновлення) та токени
+    оновлення поточної сесії.
 
     ## Параметри:
 
     - `response` (Response): Об'єкт відповіді HTTP.
+    - `token` (str): Токен доступу, який видаляється з кешу перевірених токенів.
     - `current_user` (User): Поточний користувач, отриманий залежностями.
-    - `session` (AsyncSession): Об'єкт сесії бази даних.
 
     ## Повертає:
 
@@ -196,8 +249,15 @@ async def logout(
     # Видалення токена із заголовка запиту
     response.headers["Authorization"] = ""
 
-    # Закрытие сессии базы данных
-    await session.close()
+    # Відкликання токенів доступу користувача та токенів оновлення сесії
+    await auth_service.token_versions.bump(current_user.id)
+    family = auth_service.decode_access_token(token).get("fam")
+    if family:
+        await auth_service.refresh_tokens.revoke(family, current_user.id)
+
+    # Видалення токена та користувача з кешів
+    auth_service.revoke_access_token(token)
+    await auth_service.user_cache.invalidate(current_user.email)
 
     return {"message": f"Logged out: {current_user.username}"}
 
@@ -237,10 +297,9 @@ async def confirmed_email(token: str, session: AsyncSession = Depends(get_sessio
     return {"message": "Email confirmed"}
 
 
-@router.post("/request_email")
+@router.post("/request_email", dependencies=[Depends(rate_limit("email"))])
 async def request_email(
     body: RequestEmail,
-    background_tasks: BackgroundTasks,
     request: Request,
     session: AsyncSession = Depends(get_session),
 ):
@@ -250,7 +309,6 @@ async def request_email(
     ## Параметри:
 
     - `body` (RequestEmail): Об'єкт, що містить дані запиту електронної пошти.
-    - `background_tasks` (BackgroundTasks): Об'єкт фонових задач FastAPI.
     - `request` (Request): Об'єкт запиту HTTP.
     - `session` (AsyncSession): Об'єкт сесії бази даних.
 
@@ -259,6 +317,8 @@ async def request_email(
     - Словник з повідомленням про надіслання запиту на підтвердження електронної пошти:
     `{"message": "Check your email for confirmation."}`.
 
+    ## Raises:
+    - HTTPException: 503, якщо лист не вдалося надіслати.
     """
 
     user = await repository_users.get_user_by_email(body.email, session)
@@ -266,16 +326,14 @@ async def request_email(
     if user.confirmed:
         return {"message": "Your email is already confirmed"}
     if user:
-        background_tasks.add_task(
-            send_email, user.email, user.username, request.base_url
-        )
+        if not await send_email(user.email, user.username, request.base_url):
+            raise _email_unavailable()
     return {"message": "Check your email for confirmation."}
 
 
-@router.post("/forgot-password")
+@router.post("/forgot-password", dependencies=[Depends(rate_limit("email"))])
 async def forgot_password(
     email: EmailStr,
-    background_tasks: BackgroundTasks,
     request: Request,
     session: AsyncSession = Depends(get_session),
 ):
@@ -291,14 +349,17 @@ async def forgot_password(
     # Зберігаємо токен скидання паролю у базу даних для подальшої перевірки
     await repository_users.save_reset_token(user, reset_token, session)
 
-    background_tasks.add_task(
-        reset_password_by_email, email, user.username, reset_token, request.base_url
-    )
+    if not await reset_password_by_email(
+        email, user.username, reset_token, request.base_url
+    ):
+        raise _email_unavailable()
 
     return {"message": "Password reset initiated"}
 
 
-@router.post("/reset-password")
+@router.post(
+    "/reset-password", dependencies=[Depends(rate_limit("reset_password"))]
+)
 async def reset_password(
     reset_token: str, new_password: str, session: AsyncSession = Depends(get_session)
 ):
@@ -308,7 +369,6 @@ async def reset_password(
     ## Параметри:
 
     - `email` (EmailStr): Електронна пошта користувача.
-    - `background_tasks` (BackgroundTasks): Об'єкт фонових задач FastAPI.
     - `request` (Request): Об'єкт запиту HTTP.
     - `session` (AsyncSession): Об'єкт сесії бази даних.
 
@@ -329,17 +389,19 @@ async def reset_password(
             status_code=status.HTTP_404_NOT_FOUND, detail="Invalid reset token"
         )
 
-    # Оновлюємо пароль користувача
-    user.password = auth_service.get_password_hash(new_password)
+    # Оновлюємо пароль користувача та відкликаємо всі його сесії
     user.reset_token = None
-
-    await session.commit()
+    await repository_users.update_password(
+        user, await auth_service.get_password_hash(new_password), session
+    )
+    await auth_service.revoke_sessions(user.id)
 
     return {"message": "Password reset successfully"}
 
 
 @router.patch("/avatar", response_model=UserDb)
 async def update_avatar_user(
+    request: Request,
     file: UploadFile = File(),
     current_user: User = Depends(auth_service.get_current_user),
     session: AsyncSession = Depends(get_session),
@@ -369,8 +431,73 @@ async def update_avatar_user(
     ```
     з оновленими даними користувача.
 
+    На сервері створюються мініатюри розмірів `avatar_sizes` у форматах JPEG
+    та WebP. Поле `avatar` містить адресу JPEG-мініатюри розміру
+    `avatar_default_size`; інші мініатюри доступні за тією ж адресою з іншим
+    іменем файлу, наприклад `64.webp`.
+
+    Дозволені типи файлів та максимальний розмір задаються налаштуваннями
+    `avatar_content_types` та `avatar_max_size`.
+
+    ## Raises:
+    - HTTPException: 415, якщо файл не є підтримуваним зображенням; 413, якщо
+      файл або зображення завеликі.
     """
 
-    src_url = upload_to_cloudinary(file, current_user)
+    version = await upload_avatar(file, current_user)
+    src_url = str(
+        request.url_for(
+            "get_avatar",
+            user_id=current_user.id,
+            version=version,
+            name=f"{settings.avatar_default_size}.jpeg",
+        )
+    )
     user = await update_user_avatar(src_url, current_user, session)
     return user
+
+
+@router.get("/avatars/{user_id}/{version}/{name}", name="get_avatar")
+async def get_avatar(
+    user_id: int,
+    version: str = Path(pattern="^[0-9a-f]{8}$"),
+    name: str = Path(pattern=r"^\d+\.(jpeg|webp)$"),
+):
+    """
+    # Повертає мініатюру аватара.
+
+    ## Параметри:
+    - `user_id` (int): Ідентифікатор користувача.
+    - `version` (str): Версія аватара.
+    - `name` (str): Розмір і формат мініатюри, наприклад `128.webp`.
+
+    ## Повертає:
+    - Якщо сховище має CDN (Cloudinary) - перенаправлення 308 на адресу
+      мініатюри в CDN, без звернення застосунку до сховища.
+    - Інакше - зображення зі сховища.
+
+    Обидві відповіді мають заголовок `Cache-Control: public, max-age=31536000, immutable`:
+    нова версія аватара має нову адресу, тому мініатюру можна кешувати назавжди.
+
+    ## Raises:
+    - HTTPException: 404, якщо мініатюри немає; 502, якщо сховище недоступне.
+    """
+
+    headers = {"Cache-Control": "public, max-age=31536000, immutable"}
+    size, extension = name.split(".")
+    if int(size) not in settings.avatar_sizes:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
+
+    url = avatar_url(user_id, version, name)
+    if url is not None:
+        return RedirectResponse(
+            url, status_code=status.HTTP_308_PERMANENT_REDIRECT, headers=headers
+        )
+
+    data = await read_avatar(user_id, version, name)
+    if data is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
+
+    return Response(
+        content=data, media_type=AVATAR_FORMATS[extension][1], headers=headers
+    )
@@ -1,22 +1,92 @@
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from fastapi import APIRouter, Depends, status
+import hashlib
+from datetime import date
+from typing import List
 
-from database import get_session
-from database import User
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from schemas import ContactCreate
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import StreamingResponse
+
+from database import get_session, get_read_session
+
+from schemas import (
+    Contact,
+    ContactBatchRequest,
+    ContactBatchResponse,
+    ContactChanges,
+    ContactCreate,
+    ContactDeleteResponse,
+    ContactImportReport,
+    ContactPage,
+    TokenPrincipal,
+)
 
 from repository import contacts
 from services.auth import auth_service
+from services.cache import response_cache
+from services.rate_limit import rate_limit
 
 router = APIRouter(tags=["Contacts"])
 
+EXPORT_MEDIA_TYPES = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "vcard": ("text/vcard", "vcf"),
+}
+
+
+def _contacts_etag(user_id: int, version: int, *params) -> str:
+    """
+    Побудувати сильний ETag для відповіді зі списком контактів.
+
+    :param user_id: Ідентифікатор власника контактів.
+    :param version: Поточна версія контактів користувача.
+    :param params: Параметри запиту, від яких залежить тіло відповіді.
+    :return: ETag у лапках.
+    """
+
+    key = ":".join(map(str, (user_id, version, *params)))
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def _etag_headers(etag: str) -> dict:
+    """
+    Заголовки кешування для відповіді з ETag.
+    """
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    """
+    Порівняти ETag із заголовком `If-None-Match`.
+
+    :param request: Поточний запит.
+    :param etag: ETag актуального представлення.
+    :return: `True`, якщо клієнт має актуальну копію.
+    """
+
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags or "*" in tags
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED, response_model=Contact)
 async def create_contact(
     contact: ContactCreate,
-    current_user: User = Depends(auth_service.get_current_user),
+    current_user: TokenPrincipal = Depends(auth_service.get_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -37,32 +107,254 @@ async def create_contact(
     return await contacts.create_contact(contact, current_user, session)
 
 
-@router.get("/")
-async def get_all_contacts(
-    current_user: User = Depends(auth_service.get_current_user),
+@router.post(
+    "/batch",
+    response_model=ContactBatchResponse,
+    response_model_exclude_none=True,
+    dependencies=[Depends(rate_limit("contacts_bulk"))],
+)
+async def batch_contacts(
+    body: ContactBatchRequest,
+    current_user: TokenPrincipal = Depends(auth_service.get_principal),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    # Пакетно створити, оновити та видалити контакти.
+
+    Маршрут виконує до 1000 операцій за один запит в одній транзакції.
+    Операції над неіснуючими, чужими або повторно вказаними контактами
+    пропускаються, і для них повертається статус помилки.
+
+    ## Параметри:
+    - body (ContactBatchRequest): Список операцій `create` (з `contact`),
+      `update` (з `id` та `contact`) і `delete` (з `id`).
+    - access_token (str): Токен доступу для аутентифікації користувача.
+    - session (AsyncSession): Об'єкт сеансу для з'єднання з базою даних.
+
+    ## Повертає:
+    - results (List[dict]): Для кожної операції - `index`, `status`
+      (201, 200, 403, 404 або 409) та `id` контакту або `detail` помилки.
+
+    ## Raise:
+    - HTTPException: Якщо пакет порушує унікальність електронної пошти.
+    """
+
+    results = await contacts.batch_contacts(body.operations, current_user, session)
+    return {"results": results}
+
+
+@router.post(
+    "/import",
+    response_model=ContactImportReport,
+    dependencies=[Depends(rate_limit("contacts_bulk"))],
+)
+async def import_contacts(
+    file: UploadFile = File(),
+    format: str | None = Query(None, pattern="^(csv|ndjson)$"),
+    current_user: TokenPrincipal = Depends(auth_service.get_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
-    # Отримати всі контакти.
+    # Імпортувати контакти з файлу.
+
+    Маршрут потоково читає файл CSV (із заголовком) або NDJSON (один JSON-об'єкт
+    на рядок) з полями контакту, перевіряє рядки пакетами та вставляє їх у базу
+    даних пакетними запитами.
+
+    ## Параметри:
+    - file (UploadFile): Файл з контактами.
+    - format (str, опціонально): `csv` або `ndjson`. Якщо не вказано, формат
+      визначається за розширенням файлу.
+    - access_token (str): Токен доступу для аутентифікації користувача.
+    - session (AsyncSession): Об'єкт сеансу для з'єднання з базою даних.
+
+    ## Повертає:
+    - inserted (int): Кількість вставлених контактів.
+    - failed (int): Кількість відхилених рядків.
+    - errors (List[dict]): Номери рядків та причини відхилення.
+    - errors_truncated (bool): Чи був звіт про помилки обрізаний.
+
+    Якщо файл пошкоджений, імпорт зупиняється, а звіт містить помилку файлу
+    для першого непрочитаного рядка. Контакти з попередніх рядків уже збережено.
+
+    ## Raise:
+    - HTTPException: Якщо формат файлу не вдалося визначити.
+    """
+
+    if format is None:
+        extension = (file.filename or "").rsplit(".", 1)[-1].lower()
+        format = {"csv": "csv", "ndjson": "ndjson", "jsonl": "ndjson"}.get(extension)
+    if format is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown file format, expected csv or ndjson",
+        )
+
+    return await contacts.import_contacts(file.file, format, current_user, session)
+
+
+@router.get("/export")
+async def export_contacts(
+    format: str = Query("csv", pattern="^(csv|ndjson|vcard)$"),
+    current_user: TokenPrincipal = Depends(auth_service.get_principal),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """
+    # Експортувати всі контакти.
+
+    Маршрут потоково віддає всі контакти користувача у вибраному форматі.
+    Контакти читаються з бази даних курсором порціями, тому відповідь не
+    формується в пам'яті повністю.
+
+    ## Параметри:
+    - format (str): `csv` (за замовчуванням), `ndjson` або `vcard`.
+    - access_token (str): Токен доступу для аутентифікації користувача.
+    - session (AsyncSession): Об'єкт сеансу для з'єднання з базою даних.
+
+    ## Повертає:
+    - Файл з контактами у вибраному форматі.
+    """
+
+    media_type, extension = EXPORT_MEDIA_TYPES[format]
+    return StreamingResponse(
+        contacts.export_contacts(current_user, session, format),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="contacts.{extension}"'
+        },
+    )
+
+
+@router.get("/", response_model=ContactPage)
+async def get_all_contacts(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    after: str | None = Query(None),
+    name: str | None = Query(None),
+    email: str | None = Query(None),
+    phone: str | None = Query(None),
+    current_user: TokenPrincipal = Depends(auth_service.get_principal),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """
+    # Отримати контакти посторінково.
+
+    Маршрут отримує контакти, які належать користувачу, за допомогою введеного токену доступу.
+    Пагінація виконується за курсором: щоб отримати наступну сторінку, передайте
+    значення `next_cursor` з попередньої відповіді у параметрі `after`.
+
+    ## Параметри:
+    - limit (int): Кількість контактів на сторінці (від 1 до 500, за замовчуванням 50).
+    - after (str, опціонально): Курсор попередньої сторінки.
+    - name (str, опціонально): Префікс імені або прізвища.
+    - email (str, опціонально): Префікс електронної пошти.
+    - phone (str, опціонально): Префікс номера телефону.
+    - access_token (str): Токен доступу для аутентифікації користувача.
+    - session (AsyncSession): Об'єкт сеансу для з'єднання з базою даних.
+
+    ## Повертає:
+    - items (List[Contact]): Список контактів сторінки.
+    - next_cursor (str | None): Курсор наступної сторінки або `null`, якщо сторінка остання.
+
+    Відповідь містить заголовок `ETag`. Якщо заголовок `If-None-Match` запиту
+    збігається з ним, повертається `304 Not Modified` без читання контактів.
+    Якщо увімкнено `contacts_cache_enabled`, готове тіло відповіді береться з
+    кешу Redis.
+
+    ## Raise:
+    - HTTPException: Якщо курсор недійсний.
+    """
+
+    version = await contacts.get_contacts_version(current_user, session)
+    params = (limit, after, name, email, phone)
+    etag = _contacts_etag(current_user.id, version, *params)
+    headers = _etag_headers(etag)
+    if _not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    field = ":".join(map(str, (version, *params)))
+    body = await response_cache.get(current_user.id, field)
+    if body is None:
+        page = await contacts.get_all_contacts(
+            current_user, session, limit=limit, after=after, name=name, email=email, phone=phone
+        )
+        body = ContactPage.model_validate(page).model_dump_json().encode()
+        await response_cache.set(current_user.id, field, body)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/search", response_model=ContactPage)
+async def search_contacts(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    after: str | None = Query(None),
+    current_user: TokenPrincipal = Depends(auth_service.get_principal),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """
+    # Шукати контакти.
 
-    Маршрут отримує всі контакти, які належать користувачу, за допомогою введеного токену доступу.
+    Маршрут шукає контакти користувача за префіксами слів запиту в імені,
+    прізвищі, електронній пошті, телефоні та додаткових даних. Результати
+    впорядковані за релевантністю.
 
     ## Параметри:
+    - q (str): Пошуковий запит, наприклад `joh do`.
+    - limit (int): Кількість контактів на сторінці (від 1 до 100, за замовчуванням 20).
+    - after (str, опціонально): Курсор попередньої сторінки.
     - access_token (str): Токен доступу для аутентифікації користувача.
     - session (AsyncSession): Об'єкт сеансу для з'єднання з базою даних.
 
     ## Повертає:
-    - List[Contact]: Список контактів.
+    - items (List[Contact]): Знайдені контакти.
+    - next_cursor (str | None): Курсор наступної сторінки або `null`.
+    """
+
+    return await contacts.search_contacts(
+        q, current_user, session, limit=limit, after=after
+    )
 
+
+@router.get("/changes", response_model=ContactChanges)
+async def get_contact_changes(
+    since: str | None = Query(None),
+    limit: int = Query(500, ge=1, le=1000),
+    current_user: TokenPrincipal = Depends(auth_service.get_principal),
+    session: AsyncSession = Depends(get_read_session),
+):
     """
+    # Отримати зміни контактів для синхронізації.
 
-    return await contacts.get_all_contacts(current_user, session)
+    Маршрут повертає лише контакти, створені, змінені або видалені після
+    курсора `since`. Без курсора повертаються всі наявні контакти. Значення
+    `next_cursor` відповіді слід зберегти і передати в наступному запиті.
+
+    ## Параметри:
+    - since (str, опціонально): Курсор попередньої синхронізації.
+    - limit (int): Максимальна кількість змін (від 1 до 1000, за замовчуванням 500).
+    - access_token (str): Токен доступу для аутентифікації користувача.
+    - session (AsyncSession): Об'єкт сеансу для з'єднання з базою даних.
+
+    ## Повертає:
+    - upserts (List[Contact]): Створені або змінені контакти.
+    - deleted (List[int]): Ідентифікатори видалених контактів.
+    - next_cursor (str): Курсор для наступної синхронізації.
+    - has_more (bool): `true`, якщо є ще зміни, які не вмістилися у відповідь.
+
+    ## Raise:
+    - HTTPException: Якщо курсор недійсний.
+    """
+
+    return await contacts.get_contact_changes(
+        current_user, session, since=since, limit=limit
+    )
 
 
-@router.delete("/{contact_id}")
+@router.delete("/{contact_id}", response_model=ContactDeleteResponse)
 async def delete_contact(
     contact_id: int,
-    current_user: User = Depends(auth_service.get_current_user),
+    current_user: TokenPrincipal = Depends(auth_service.get_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -83,11 +375,11 @@ async def delete_contact(
     return await contacts.delete_contact(contact_id, current_user, session)
 
 
-@router.put("/{contact_id}")
+@router.put("/{contact_id}", response_model=Contact)
 async def update_contact(
     contact_id: int,
     contact: ContactCreate,
-    current_user: User = Depends(auth_service.get_current_user),
+    current_user: TokenPrincipal = Depends(auth_service.get_principal),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -108,11 +400,13 @@ async def update_contact(
     return await contacts.update_contact(contact_id, contact, current_user, session)
 
 
-@router.get("/birthdays/{days}")
+@router.get("/birthdays/{days}", response_model=List[Contact])
 async def get_upcoming_birthdays(
     days: int,
-    current_user: User = Depends(auth_service.get_current_user),
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    response: Response,
+    current_user: TokenPrincipal = Depends(auth_service.get_principal),
+    session: AsyncSession = Depends(get_read_session),
 ):
     """
     # Отримати наближені дні народження контактів.
@@ -125,8 +419,19 @@ async def get_upcoming_birthdays(
     ## Повертає:
     - результати (ResultProxy): Об'єкт, що містить результати запиту до бази даних.
 
+    Відповідь містить заголовок `ETag`, що залежить також від поточної дати.
+    Якщо заголовок `If-None-Match` запиту збігається з ним, повертається
+    `304 Not Modified` без читання контактів.
+
     ## Raise:
     - HTTPException: Якщо користувач не автентифікований.
     """
 
+    version = await contacts.get_contacts_version(current_user, session)
+    etag = _contacts_etag(current_user.id, version, "birthdays", days, date.today())
+    headers = _etag_headers(etag)
+    if _not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
     return await contacts.get_upcoming_birthdays(days, current_user, session)
@@ -1,7 +1,14 @@
-from datetime import datetime
-from typing import Dict, Union
+from datetime import date, datetime
+from typing import Dict, List, Literal, Union
 
-from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_validator
+from pydantic import (
+    BaseModel,
+    EmailStr,
+    Field,
+    ConfigDict,
+    field_validator,
+    model_validator,
+)
 
 
 class ContactBase(BaseModel):
@@ -40,10 +47,96 @@ class ContactCreate(ContactBase):
     pass
 
 
-class Contact(ContactBase):
+class Contact(BaseModel):
+    """
+    Контакт у відповідях API. Службові стовпці таблиці (`user_id`,
+    `birthday_md`, `version`, `deleted_at`) у відповідь не потрапляють.
+    """
+
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+    phone_number: str
+    birthday: date
+    additional_data: str | None = None
+    updated_at: datetime | None = None
+
     model_config = ConfigDict(from_attributes=True)
 
 
+class ContactPage(BaseModel):
+    items: List[Contact]
+    next_cursor: str | None = None
+
+
+class ContactChanges(BaseModel):
+    upserts: List[Contact]
+    deleted: List[int]
+    next_cursor: str
+    has_more: bool
+
+
+class ContactDeleteResponse(BaseModel):
+    message: str = "Contact deleted"
+    contact: Contact
+
+
+class ContactBatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: int | None = None
+    contact: ContactCreate | None = None
+
+    @model_validator(mode="after")
+    def validate_operation(self):
+        if self.op in ("update", "delete") and self.id is None:
+            raise ValueError(f"'{self.op}' operation requires id")
+        if self.op in ("create", "update") and self.contact is None:
+            raise ValueError(f"'{self.op}' operation requires contact")
+        return self
+
+
+class ContactBatchResult(BaseModel):
+    index: int
+    status: int
+    id: int | None = None
+    detail: str | None = None
+
+
+class ContactBatchResponse(BaseModel):
+    results: List[ContactBatchResult]
+
+
+class ContactImportError(BaseModel):
+    row: int
+    errors: List[str]
+
+
+class ContactImportReport(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[ContactImportError]
+    errors_truncated: bool
+
+
+class ContactBatchRequest(BaseModel):
+    operations: List[ContactBatchOperation] = Field(..., min_length=1, max_length=1000)
+
+    model_config = ConfigDict(
+        json_schema_extra = {
+            "example": {
+                "operations": [
+                    {
+                        "op": "create",
+                        "contact": ContactBase.model_config["json_schema_extra"]["example"],
+                    },
+                    {"op": "delete", "id": 42},
+                ]
+            }
+        }
+    )
+
+
 class UserModel(BaseModel):
     username: str
     email: EmailStr
@@ -82,6 +175,34 @@ class UserDb(BaseModel):
     )
 
 
+class UserPrincipal(BaseModel):
+    """
+    Легка проєкція користувача, що зберігається в кеші та повертається
+    залежністю `get_current_user` замість ORM-об'єкта.
+    """
+
+    id: int
+    email: str
+    username: str
+    confirmed: bool = False
+    avatar: str | None = None
+    created_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+class TokenPrincipal(BaseModel):
+    """
+    Користувач, відновлений лише з даних токена доступу, без звернення до
+    кешу чи бази даних. Повертається залежністю `get_principal`.
+    """
+
+    id: int
+    email: str
+
+    model_config = ConfigDict(frozen=True)
+
+
 class UserResponse(BaseModel):
     user: UserDb
     detail: str = "User successfully created"
@@ -98,6 +219,7 @@ class LoginResponse(BaseModel):
         default={"username": "sergiokapone", "email": "user@example.com"}
     )
     access_token: str = Field(...)
+    refresh_token: str | None = None
 
 
 class CucrrentUserResponse(BaseModel):
@@ -1,11 +1,9 @@
+import hashlib
 import pathlib
-import pickle
+import time
 
-import redis
-
-from passlib.context import CryptContext
 from environs import Env
-from jose import JWTError, jwt
+from jose import JWTError
 
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
@@ -15,10 +13,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from conf import settings
 
-from database import  get_session
+from database import get_session
 
 from repository import users as repository_users
 
+from services.cache import TTLCache, user_cache
+from services.passwords import password_hasher
+from services.jwt_keys import key_ring
+from services.tokens import refresh_tokens, token_versions
+from schemas import TokenPrincipal
+
 
 # Environment ==============================================
 
@@ -34,30 +38,49 @@ class Auth:
     Клас, що надає функціонал автентифікації та генерації токенів.
 
     Attributes:
-        pwd_context (CryptContext): Контекст шифрування паролей.
+        hasher (PasswordHasher): Хешувальник паролів з обмеженим пулом потоків.
         SECRET_KEY (str): Секретний ключ для підпису токенів.
         ALGORITHM (str): Алгоритм шифрування для підпису токенів.
+        keys (KeyRing): Ключі для підпису та перевірки токенів (ES256 з `kid`
+            або HMAC з `SECRET_KEY`, якщо ключі не налаштовано).
         oauth2_scheme (OAuth2PasswordBearer): Залежність для отримання токену з HTTP запиту.
+        user_cache (UserCache): Асинхронний кеш користувачів у Redis.
+        refresh_tokens (RefreshTokenStore): Сховище сімейств оновлювальних токенів.
+        token_versions (TokenVersionStore): Версії токенів доступу користувачів.
+        token_cache (TTLCache): Кеш перевірених токенів доступу до їх закінчення.
 
     Methods:
         verify_password(plain_password, hashed_password): Перевіряє валідність паролю.
+        verify_and_update_password(plain_password, hashed_password): Перевіряє
+            пароль та повертає новий хеш, якщо змінилась вартість bcrypt.
         get_password_hash(password): Генерує хеш паролю.
         create_access_token(data, expires_delta): Генерує новий токен доступу.
         create_refresh_token(data, expires_delta): Генерує новий оновлювальний токен.
-        decode_refresh_token(refresh_token): Розшифровує оновлювальний токен.
+        create_session_tokens(user, family, jti): Генерує пару токенів сесії.
+        revoke_sessions(user_id): Відкликає всі токени користувача.
+        decode_refresh_token(refresh_token): Перевіряє оновлювальний токен.
+        decode_access_token(token): Перевіряє токен доступу з використанням кешу.
+        verify_access_token(token): Перевіряє токен доступу та його версію.
+        revoke_access_token(token): Видаляє токен доступу з кешу перевірених токенів.
         get_current_user(token, db): Отримує поточного користувача на основі переданого токену.
+        get_principal(token): Повертає користувача лише з даних токену доступу.
+        get_user(email, session): Повертає користувача з кешу або бази даних.
     """
 
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    hasher = password_hasher
 
     SECRET_KEY = settings.secret_key
     ALGORITHM = settings.algorithm
+    keys = key_ring
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
-    r = redis.from_url(settings.redis_host)
+    user_cache = user_cache
+    refresh_tokens = refresh_tokens
+    token_versions = token_versions
+    token_cache = TTLCache(settings.token_cache_size, ttl=0)
 
-    def verify_password(self, plain_password, hashed_password):
+    async def verify_password(self, plain_password, hashed_password):
         """
-        Перевіряє валідність паролю.
+        Перевіряє валідність паролю у пулі потоків.
 
         Args:
             plain_password (str): Пароль у відкритому вигляді.
@@ -66,11 +89,25 @@ class Auth:
         Returns:
             bool: True, якщо пароль валідний, False - в іншому випадку.
         """
-        return self.pwd_context.verify(plain_password, hashed_password)
+        return await self.hasher.verify(plain_password, hashed_password)
+
+    async def verify_and_update_password(self, plain_password, hashed_password):
+        """
+        Перевіряє валідність паролю та визначає, чи потрібно його перехешувати.
+
+        Args:
+            plain_password (str): Пароль у відкритому вигляді.
+            hashed_password (str): Хеш паролю.
+
+        Returns:
+            tuple: (True, новий хеш або None), якщо пароль валідний,
+            (False, None) - в іншому випадку.
+        """
+        return await self.hasher.verify_and_update(plain_password, hashed_password)
 
-    def get_password_hash(self, password: str):
+    async def get_password_hash(self, password: str):
         """
-        Генерує хеш паролю.
+        Генерує хеш паролю у пулі потоків.
 
         Args:
             password (str): Пароль у відкритому вигляді.
@@ -78,7 +115,7 @@ class Auth:
         Returns:
             str: Хеш паролю.
         """
-        return self.pwd_context.hash(password)
+        return await self.hasher.hash(password)
 
     async def create_access_token(self, data: dict, expires_delta: float | None = None):
         """
@@ -102,9 +139,7 @@ class Auth:
             {"iat": datetime.utcnow(), "exp": expire, "scope": "access_token"}
         )
 
-        encoded_access_token = jwt.encode(
-            to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM
-        )
+        encoded_access_token = self.keys.encode(to_encode)
         return encoded_access_token
 
     async def create_refresh_token(
@@ -116,7 +151,7 @@ class Auth:
         Args:
             data (dict): Дані, які будуть закодовані у токені.
             expires_delta (float, optional): Термін дії токену у секундах.
-            За замовчуванням - 7 днів.
+            За замовчуванням - `settings.refresh_token_ttl`.
 
         Returns:
             str: Згенерований оновлювальний токен.
@@ -126,36 +161,72 @@ class Auth:
         if expires_delta:
             expire = datetime.utcnow() + timedelta(seconds=expires_delta)
         else:
-            expire = datetime.utcnow() + timedelta(days=7)
+            expire = datetime.utcnow() + timedelta(seconds=settings.refresh_token_ttl)
 
         to_encode.update(
             {"iat": datetime.utcnow(), "exp": expire, "scope": "refresh_token"}
         )
-        encoded_refresh_token = jwt.encode(
-            to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM
-        )
+        encoded_refresh_token = self.keys.encode(to_encode)
         return encoded_refresh_token
 
-    async def decode_refresh_token(self, refresh_token: str):
+    async def create_session_tokens(
+        self, user, family: str, jti: str
+    ) -> tuple[str, str]:
+        """
+        Генерує токен доступу та оновлювальний токен сесії.
+
+        Токен доступу містить ідентифікатор користувача (`uid`) та поточну
+        версію його токенів (`ver`), тому його можна перевірити без запиту до
+        бази даних.
+
+        Args:
+            user (User | UserPrincipal): Користувач.
+            family (str): Ідентифікатор сімейства оновлювальних токенів.
+            jti (str): Ідентифікатор оновлювального токена.
+
+        Returns:
+            tuple[str, str]: Токен доступу та оновлювальний токен.
+
+        Raises:
+            HTTPException: 503, якщо версію токенів не вдалося прочитати з Redis.
+        """
+        version = await self.token_versions.current(user.id)
+        access_token = await self.create_access_token(
+            data={"sub": user.email, "uid": user.id, "ver": version, "fam": family}
+        )
+        refresh_token = await self.create_refresh_token(
+            data={"sub": user.email, "fam": family, "jti": jti}
+        )
+        return access_token, refresh_token
+
+    async def revoke_sessions(self, user_id: int) -> None:
         """
-        Розшифровує оновлювальний токен.
+        Відкликає всі токени доступу та всі сесії користувача.
+
+        Args:
+            user_id (int): Ідентифікатор користувача.
+        """
+        await self.token_versions.bump(user_id)
+        await self.refresh_tokens.revoke_all(user_id)
+
+    async def decode_refresh_token(self, refresh_token: str) -> dict:
+        """
+        Перевіряє оновлювальний токен.
 
         Args:
             refresh_token (str): Оновлювальний токен.
 
         Returns:
-            str: Електронна пошта, пов'язана з оновлювальним токеном.
+            dict: Дані токену: електронна пошта (`sub`), сімейство (`fam`) та
+            ідентифікатор токена (`jti`).
 
         Raises:
             HTTPException: Виникає, якщо токен недійсний або містить неприпустимий обсяг дій.
         """
         try:
-            payload = jwt.decode(
-                refresh_token, self.SECRET_KEY, algorithms=[self.ALGORITHM]
-            )
-            if payload["scope"] == "refresh_token":
-                email = payload["sub"]
-                return email
+            payload = self.keys.decode(refresh_token)
+            if payload["scope"] == "refresh_token" and "fam" in payload:
+                return payload
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid scope for token",
@@ -166,6 +237,47 @@ class Auth:
                 detail="Could not validate credentials",
             )
 
+    @staticmethod
+    def _token_digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def decode_access_token(self, token: str) -> dict:
+        """
+        Перевіряє токен доступу та повертає його дані.
+
+        Перевірені дані зберігаються в кеші за хешем токену до моменту
+        закінчення його дії, тому повторні запити з тим самим токеном не
+        перевіряють підпис знову.
+
+        Args:
+            token (str): Токен доступу.
+
+        Returns:
+            dict: Дані токену.
+
+        Raises:
+            JWTError: Виникає, якщо токен недійсний.
+        """
+        digest = self._token_digest(token)
+        payload = self.token_cache.get(digest)
+        if payload is not None:
+            return payload
+
+        payload = self.keys.decode(token)
+        ttl = payload.get("exp", 0) - time.time()
+        if ttl > 0:
+            self.token_cache.set(digest, payload, ttl=ttl)
+        return payload
+
+    def revoke_access_token(self, token: str) -> None:
+        """
+        Видаляє токен доступу з кешу перевірених токенів.
+
+        Args:
+            token (str): Токен доступу.
+        """
+        self.token_cache.pop(self._token_digest(token))
+
     async def get_current_user(
         self,
         token: str = Depends(oauth2_scheme),
@@ -178,51 +290,109 @@ class Auth:
             token (str, optional): Токен доступу.
             За замовчуванням використовується залежність "oauth2_scheme".
             session (AsyncSession, optional): Об'єкт сесії бази даних.
+            Сесія основної бази: з'єднання береться лише при промаху кешу.
 
         Returns:
-            User: Об'єкт поточного користувача.
+            UserPrincipal: Проєкція поточного користувача.
 
         Raises:
             HTTPException: Виникає, якщо токен недійсний або не містить ідентифікатора користувача.
         """
-        credentials_exception = HTTPException(
+        payload = await self.verify_access_token(token)
+
+        user = await self.get_user(payload["sub"], session)
+        if user is None:
+            raise self._credentials_exception()
+
+        return user
+
+    async def get_principal(self, token: str = Depends(oauth2_scheme)) -> TokenPrincipal:
+        """
+        Повертає поточного користувача, відновленого лише з даних токену доступу.
+
+        На відміну від `get_current_user` не звертається ні до кешу
+        користувачів, ні до бази даних, тому підходить для маршрутів, яким
+        потрібен лише ідентифікатор користувача.
+
+        Args:
+            token (str, optional): Токен доступу.
+
+        Returns:
+            TokenPrincipal: Ідентифікатор та електронна пошта користувача.
+
+        Raises:
+            HTTPException: Виникає, якщо токен недійсний, відкликаний або не
+            містить ідентифікатора користувача.
+        """
+        payload = await self.verify_access_token(token)
+        if "uid" not in payload:
+            raise self._credentials_exception()
+        return TokenPrincipal(id=payload["uid"], email=payload["sub"])
+
+    @staticmethod
+    def _credentials_exception() -> HTTPException:
+        return HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-        try:
-            # Decode JWT
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+    async def verify_access_token(self, token: str) -> dict:
+        """
+        Перевіряє підпис, призначення та версію токену доступу.
 
-            if payload["scope"] == "access_token":
-                email = payload["sub"]
-                if email is None:
-                    raise credentials_exception
-            else:
-                raise credentials_exception
+        Версія перевіряється лише для токенів з ідентифікатором користувача
+        (`uid`). Якщо Redis недоступний, версія не перевіряється.
 
+        Args:
+            token (str): Токен доступу.
+
+        Returns:
+            dict: Дані токену.
+
+        Raises:
+            HTTPException: Виникає, якщо токен недійсний або відкликаний.
+        """
+        try:
+            payload = self.decode_access_token(token)
         except JWTError:
-            raise credentials_exception
+            raise self._credentials_exception()
+
+        if payload.get("scope") != "access_token" or payload.get("sub") is None:
+            raise self._credentials_exception()
+
+        if "uid" in payload:
+            version = await self.token_versions.get(payload["uid"])
+            if version is not None and payload.get("ver", 0) < version:
+                raise self._credentials_exception()
+
+        return payload
 
-        # user = await repository_users.get_user_by_email(email, session)
-        user = self.r.get(f"user:{email}")
+    async def get_user(self, email: str, session: AsyncSession):
+        """
+        Повертає проєкцію користувача з кешу або, при промаху, з бази даних.
+
+        Прочитаний рядок потрапляє в кеш на `user_cache_ttl`, тому сесія має
+        бути сесією основної бази, а не репліки: інакше відставання репліки
+        повернуло б у кеш щойно інвалідований застарілий запис.
+
+        Args:
+            email (str): Електронна пошта користувача.
+            session (AsyncSession): Об'єкт сесії бази даних.
+
+        Returns:
+            UserPrincipal | None: Проєкція користувача або None, якщо його немає.
+        """
+        user = await self.user_cache.get(email)
         if user is None:
             user = await repository_users.get_user_by_email(email, session)
-            if user is None:
-                raise credentials_exception
-            self.r.set(f"user:{email}", pickle.dumps(user))
-            self.r.expire(f"user:{email}", 900)
-        else:
-            user = pickle.loads(user)
-
+            if user is not None:
+                user = await self.user_cache.set(user)
         return user
 
     def extract_email_from_token(self, token):
         try:
-            decoded_token = jwt.decode(
-                token, self.SECRET_KEY, algorithms=[self.ALGORITHM]
-            )
+            decoded_token = self.keys.decode(token)
             email = decoded_token.get("sub")
             return email
         except JWTError:
@@ -232,12 +402,12 @@ class Auth:
         to_encode = data.copy()
         expire = datetime.utcnow() + timedelta(days=7)
         to_encode.update({"iat": datetime.utcnow(), "exp": expire})
-        token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
+        token = self.keys.encode(to_encode)
         return token
 
     async def get_email_from_token(self, token: str):
         try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = self.keys.decode(token)
 
             email = payload["sub"]
 
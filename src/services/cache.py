@@ -0,0 +1,318 @@
+"""
+Файл `cache.py` містить дворівневий кеш користувачів: обмежений кеш у пам'яті
+процесу (L1) перед Redis (L2).
+
+Замість серіалізованого через `pickle` ORM-об'єкта в кеші зберігається
+компактна JSON-проєкція `UserPrincipal`. Версія схеми входить у ключ, тому
+після зміни проєкції старі записи просто ігноруються. Зміни користувача
+публікуються в канал Redis, і кожен воркер видаляє запис зі свого L1.
+
+Також тут знаходиться необов'язковий кеш готових JSON-відповідей зі списками
+контактів (`ResponseCache`).
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from pydantic import ValidationError
+
+from conf import settings
+from schemas import UserPrincipal
+
+
+USER_CACHE_VERSION = 1
+USER_CACHE_CHANNEL = f"user:v{USER_CACHE_VERSION}:invalidate"
+
+
+class TTLCache:
+    """
+    Обмежений LRU-кеш у пам'яті процесу з часом життя для кожного запису.
+
+    Attributes:
+        maxsize (int): Максимальна кількість записів.
+        ttl (float): Час життя запису за замовчуванням у секундах.
+
+    Methods:
+        get(key): Повертає значення або None, якщо запису немає чи він застарів.
+        set(key, value, ttl): Зберігає значення, витісняючи найстаріший запис.
+        pop(key): Видаляє запис.
+        clear(): Очищає кеш.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class UserCache:
+    """
+    Асинхронний дворівневий кеш користувачів (пам'ять процесу + Redis).
+
+    Attributes:
+        redis (redis.asyncio.Redis): Асинхронний клієнт Redis.
+        ttl (int): Час життя запису в Redis у секундах.
+        local (TTLCache): Кеш у пам'яті процесу.
+
+    Methods:
+        get(email): Повертає користувача з кешу або None.
+        set(user): Зберігає проєкцію користувача в кеші.
+        invalidate(email): Видаляє користувача з кешу всіх воркерів.
+        listen(): Обробляє повідомлення про інвалідацію від інших воркерів.
+    """
+
+    def __init__(self, client: redis.Redis, ttl: int, local: TTLCache):
+        self.redis = client
+        self.ttl = ttl
+        self.local = local
+
+    @staticmethod
+    def key(email: str) -> str:
+        return f"user:v{USER_CACHE_VERSION}:{email}"
+
+    async def get(self, email: str) -> UserPrincipal | None:
+        """
+        Повертає користувача з кешу.
+
+        Args:
+            email (str): Електронна пошта користувача.
+
+        Returns:
+            UserPrincipal | None: Проєкція користувача або None, якщо запису
+            немає, він пошкоджений або Redis недоступний.
+        """
+        user = self.local.get(email)
+        if user is not None:
+            return user
+
+        try:
+            raw = await self.redis.get(self.key(email))
+        except RedisError as err:
+            print(err)
+            return None
+
+        if raw is None:
+            return None
+        try:
+            user = UserPrincipal.model_validate_json(raw)
+        except ValidationError:
+            return None
+
+        self.local.set(email, user)
+        return user
+
+    async def set(self, user) -> UserPrincipal:
+        """
+        Зберігає проєкцію користувача в кеші.
+
+        Args:
+            user (User | UserPrincipal): Користувач, якого потрібно закешувати.
+
+        Returns:
+            UserPrincipal: Проєкція, що була збережена.
+        """
+        principal = UserPrincipal.model_validate(user)
+        self.local.set(principal.email, principal)
+        try:
+            await self.redis.set(
+                self.key(principal.email), principal.model_dump_json(), ex=self.ttl
+            )
+        except RedisError as err:
+            print(err)
+        return principal
+
+    async def invalidate(self, email: str) -> None:
+        """
+        Видаляє користувача з кешу та повідомляє інші воркери.
+
+        Викликається після кожної зміни користувача в базі даних.
+
+        Args:
+            email (str): Електронна пошта користувача.
+        """
+        self.local.pop(email)
+        try:
+            await self.redis.delete(self.key(email))
+            await self.redis.publish(USER_CACHE_CHANNEL, email)
+        except RedisError as err:
+            print(err)
+
+    async def listen(self) -> None:
+        """
+        Слухає канал інвалідації та видаляє відповідні записи з L1.
+
+        Після втрати з'єднання L1 очищається повністю, оскільки частина
+        повідомлень могла бути пропущена.
+        """
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(USER_CACHE_CHANNEL)
+                    self.local.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        email = message["data"]
+                        if isinstance(email, bytes):
+                            email = email.decode()
+                        self.local.pop(email)
+            except RedisError as err:
+                print(err)
+                self.local.clear()
+                await asyncio.sleep(1)
+
+
+class ResponseCache:
+    """
+    Кеш серіалізованих відповідей зі списками контактів у Redis.
+
+    Відповіді користувача зберігаються в одному хеші Redis, поле якого
+    складається з версії контактів користувача та параметрів запиту. Тому
+    запис, збережений конкурентним читачем після зміни контактів, ніколи не
+    буде виданий для нової версії, а видалення хешу лише звільняє пам'ять.
+
+    Attributes:
+        redis (redis.asyncio.Redis): Асинхронний клієнт Redis.
+        ttl (int): Час життя хешу користувача в секундах.
+        enabled (bool): Чи увімкнено кеш.
+        hits (int): Кількість влучань.
+        misses (int): Кількість промахів.
+        errors (int): Кількість помилок Redis.
+
+    Methods:
+        get(user_id, field): Повертає збережені байти відповіді або None.
+        set(user_id, field, body): Зберігає байти відповіді.
+        invalidate(user_id): Видаляє всі відповіді користувача.
+        stats(): Повертає лічильники кешу.
+    """
+
+    def __init__(self, client: redis.Redis, ttl: int, enabled: bool):
+        self.redis = client
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def key(user_id: int) -> str:
+        return f"contacts:v1:{user_id}"
+
+    async def get(self, user_id: int, field: str) -> bytes | None:
+        """
+        Повертає збережену відповідь.
+
+        Args:
+            user_id (int): Ідентифікатор власника контактів.
+            field (str): Версія контактів та параметри запиту.
+
+        Returns:
+            bytes | None: Тіло відповіді або None, якщо кеш вимкнено, запису
+            немає чи Redis недоступний.
+        """
+        if not self.enabled:
+            return None
+        try:
+            body = await self.redis.hget(self.key(user_id), field)
+        except RedisError as err:
+            print(err)
+            self.errors += 1
+            return None
+
+        if body is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return body
+
+    async def set(self, user_id: int, field: str, body: bytes) -> None:
+        """
+        Зберігає відповідь.
+
+        Args:
+            user_id (int): Ідентифікатор власника контактів.
+            field (str): Версія контактів та параметри запиту.
+            body (bytes): Серіалізоване тіло відповіді.
+        """
+        if not self.enabled:
+            return
+        key = self.key(user_id)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hset(key, field, body)
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except RedisError as err:
+            print(err)
+            self.errors += 1
+
+    async def invalidate(self, user_id: int) -> None:
+        """
+        Видаляє всі відповіді користувача.
+
+        Викликається після кожної зміни контактів у базі даних.
+
+        Args:
+            user_id (int): Ідентифікатор власника контактів.
+        """
+        if not self.enabled:
+            return
+        try:
+            await self.redis.delete(self.key(user_id))
+        except RedisError as err:
+            print(err)
+            self.errors += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
+
+user_cache = UserCache(
+    redis.from_url(settings.redis_host),
+    ttl=settings.user_cache_ttl,
+    local=TTLCache(settings.user_cache_local_size, settings.user_cache_local_ttl),
+)
+
+response_cache = ResponseCache(
+    redis.from_url(settings.redis_host),
+    ttl=settings.contacts_cache_ttl,
+    enabled=settings.contacts_cache_enabled,
+)
@@ -1,60 +1,43 @@
-from pathlib import Path
-
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
 from pydantic import EmailStr
 
 
 from services.auth import auth_service
-from conf.config import settings
-
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.mail_username,
-    MAIL_PASSWORD=settings.mail_password,
-    MAIL_FROM=settings.mail_username,
-    MAIL_PORT=settings.mail_port,
-    MAIL_SERVER=settings.mail_server,
-    MAIL_FROM_NAME=settings.mail_from,
-    MAIL_STARTTLS=False,
-    MAIL_SSL_TLS=True,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-    TEMPLATE_FOLDER=Path(__file__).parent / 'templates',
-)
-
-
-async def send_email(email: EmailStr, username: str, host: str):
-    try:
-        token_verification = auth_service.create_email_token({"sub": email})
-        message = MessageSchema(
+from services.mail_queue import EmailJob, deliver
+
+
+async def send_email(email: EmailStr, username: str, host: str) -> bool:
+    """
+    Ставить у чергу лист з посиланням для підтвердження електронної пошти.
+
+    Лист надсилає воркер `src/email_worker.py`. Повертає False, якщо лист не
+    вдалося ні поставити в чергу, ні надіслати напряму.
+    """
+    token_verification = auth_service.create_email_token({"sub": email})
+    return await deliver(
+        EmailJob(
+            recipient=email,
             subject="Confirm your email ",
-            recipients=[email],
-            template_body={"host": host, "username": username, 
-                           "token": token_verification},
-            subtype=MessageType.html
+            template="email_template.html",
+            body={"host": str(host), "username": username, "token": token_verification},
         )
+    )
 
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="email_template.html")
-    except ConnectionErrors as err:
-        print(err)
 
 async def reset_password_by_email(email: EmailStr, 
                                   username: str, 
                                   reset_token: str, 
-                                  host: str):
-    try:
-
-        message = MessageSchema(
+                                  host: str) -> bool:
+    """
+    Ставить у чергу лист з токеном скидання пароля.
+
+    Лист надсилає воркер `src/email_worker.py`. Повертає False, якщо лист не
+    вдалося ні поставити в чергу, ні надіслати напряму.
+    """
+    return await deliver(
+        EmailJob(
+            recipient=email,
             subject="Reset account ",
-            recipients=[email],
-            template_body={"host": host, "username": username, 
-                           "token": reset_token},
-            subtype=MessageType.html
+            template="reset_password_by_email_template.html",
+            body={"host": str(host), "username": username, "token": reset_token},
         )
-
-        fm = FastMail(conf)
-        await fm.send_message(message,
-                              template_name="reset_password_by_email_template.html")
-    except ConnectionErrors as err:
-        print(err)
\ No newline at end of file
+    )
@@ -0,0 +1,150 @@
+"""
+Файл `jwt_keys.py` містить набір ключів для підпису та перевірки JWT.
+
+Якщо в `settings.jwt_key_files` вказано закриті ключі (PEM), токени
+підписуються асиметрично (`settings.jwt_key_algorithm`, за замовчуванням
+ES256) першим ключем зі списку, а в заголовок токена додається його `kid`
+(ім'я файлу без розширення). Решта ключів використовуються лише для
+перевірки, що дозволяє змінювати ключі без розлогінення користувачів:
+
+1. додати новий ключ у кінець списку - він з'являється в JWKS;
+2. коли кеші JWKS клієнтів оновилися, перенести його на початок списку;
+3. після закінчення дії виданих токенів прибрати старий ключ.
+
+Відкриті ключі публікуються маршрутом `/.well-known/jwks.json`, тож інші
+сервіси можуть перевіряти токени самостійно без спільного секрету.
+
+Без ключів токени, як і раніше, підписуються HMAC (`settings.secret_key`).
+Токени без `kid` приймаються, доки `settings.jwt_accept_hmac` увімкнено, щоб
+під час переходу не анулювати вже видані токени.
+"""
+
+import pathlib
+
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    PublicFormat,
+    load_pem_private_key,
+)
+from jose import JWTError, jwk, jwt
+
+from conf import settings
+
+
+class KeyRing:
+    """
+    Набір ключів для підпису та перевірки JWT.
+
+    Attributes:
+        algorithm (str): Асиметричний алгоритм підпису.
+        signing_kid (str | None): Ідентифікатор ключа підпису або None, якщо
+            токени підписуються HMAC.
+        secret (str): Секрет HMAC.
+        hmac_algorithm (str): Алгоритм HMAC.
+        accept_hmac (bool): Чи приймати токени без `kid`, підписані HMAC.
+
+    Methods:
+        encode(claims): Підписує дані токена.
+        decode(token): Перевіряє токен та повертає його дані.
+        jwks(): Повертає відкриті ключі у форматі JWKS.
+    """
+
+    def __init__(
+        self,
+        keys: list[tuple[str, bytes]],
+        secret: str,
+        hmac_algorithm: str,
+        algorithm: str = "ES256",
+        accept_hmac: bool = True,
+    ):
+        self.algorithm = algorithm
+        self.secret = secret
+        self.hmac_algorithm = hmac_algorithm
+        self.accept_hmac = accept_hmac
+        # Ключі jose будуються один раз, а не розбираються з PEM для кожного токена.
+        self._private = {kid: jwk.construct(pem, algorithm) for kid, pem in keys}
+        self._public = {
+            kid: jwk.construct(
+                load_pem_private_key(pem, None)
+                .public_key()
+                .public_bytes(Encoding.PEM, PublicFormat.SubjectPublicKeyInfo),
+                algorithm,
+            )
+            for kid, pem in keys
+        }
+        self.signing_kid = keys[0][0] if keys else None
+
+    @classmethod
+    def from_files(cls, paths: list[str], **kwargs) -> "KeyRing":
+        """
+        Завантажує закриті ключі з PEM-файлів. `kid` - ім'я файлу без розширення.
+        """
+        keys = [(pathlib.Path(path).stem, pathlib.Path(path).read_bytes()) for path in paths]
+        return cls(keys, **kwargs)
+
+    def encode(self, claims: dict) -> str:
+        """
+        Підписує дані токена поточним ключем підпису.
+
+        Args:
+            claims (dict): Дані токена.
+
+        Returns:
+            str: Підписаний токен.
+        """
+        if self.signing_kid is None:
+            return jwt.encode(claims, self.secret, algorithm=self.hmac_algorithm)
+        return jwt.encode(
+            claims,
+            self._private[self.signing_kid],
+            algorithm=self.algorithm,
+            headers={"kid": self.signing_kid},
+        )
+
+    def decode(self, token: str) -> dict:
+        """
+        Перевіряє підпис і термін дії токена ключем з його заголовка `kid`.
+
+        Args:
+            token (str): Токен.
+
+        Returns:
+            dict: Дані токена.
+
+        Raises:
+            JWTError: Якщо токен недійсний, підписаний невідомим ключем або
+            підписаний HMAC, коли такі токени не приймаються.
+        """
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            if self.signing_kid is not None and not self.accept_hmac:
+                raise JWTError("Token has no key id")
+            return jwt.decode(token, self.secret, algorithms=[self.hmac_algorithm])
+
+        key = self._public.get(kid)
+        if key is None:
+            raise JWTError("Unknown key id")
+        return jwt.decode(token, key, algorithms=[self.algorithm])
+
+    def jwks(self) -> dict:
+        """
+        Повертає відкриті ключі для перевірки токенів.
+
+        Returns:
+            dict: Документ JWKS `{"keys": [...]}`.
+        """
+        keys = []
+        for kid, key in self._public.items():
+            data = key.to_dict()
+            data.update(kid=kid, use="sig")
+            keys.append(data)
+        return {"keys": keys}
+
+
+key_ring = KeyRing.from_files(
+    settings.jwt_key_files,
+    secret=settings.secret_key,
+    hmac_algorithm=settings.algorithm,
+    algorithm=settings.jwt_key_algorithm,
+    accept_hmac=settings.jwt_accept_hmac,
+)
@@ -0,0 +1,415 @@
+"""
+Файл `mail_queue.py` містить надійну чергу вихідних листів у Redis та
+воркер, що її обробляє.
+
+Застосунок лише додає завдання в чергу (`EmailQueue.enqueue`), а листи
+надсилає окремий процес (`src/email_worker.py`). Структури в Redis:
+
+- `email:queue` - список завдань, що очікують надсилання;
+- `email:processing:{worker_id}` - завдання, взяті воркером в роботу. Після
+  перезапуску воркер повертає їх у чергу, тому листи не губляться;
+- `email:retry` - відсортована множина завдань для повторної спроби, оцінка
+  дорівнює часу наступної спроби (експоненційна затримка);
+- `email:dead` - завдання, які не вдалося надіслати за `email_max_attempts`
+  спроб.
+
+Воркер бере завдання пакетами і надсилає їх через одне SMTP-з'єднання, яке
+перевикористовується між пакетами.
+
+Якщо Redis недоступний, `deliver` надсилає лист одразу з процесу застосунку,
+щоб запит користувача не завершувався помилкою.
+"""
+
+import asyncio
+import logging
+import random
+import time
+import uuid
+from email.message import EmailMessage
+from email.utils import formataddr
+from pathlib import Path
+
+import aiosmtplib
+import redis.asyncio as redis
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from pydantic import BaseModel, Field, ValidationError
+from redis.exceptions import RedisError
+
+from conf import settings
+
+
+QUEUE_KEY = "email:queue"
+RETRY_KEY = "email:retry"
+DEAD_KEY = "email:dead"
+
+logger = logging.getLogger(__name__)
+
+
+class EmailJob(BaseModel):
+    """
+    Завдання на надсилання одного листа за HTML-шаблоном.
+    """
+
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    recipient: str
+    subject: str
+    template: str
+    body: dict
+    attempts: int = 0
+    last_error: str | None = None
+
+
+class EmailQueue:
+    """
+    Черга завдань на надсилання листів у Redis.
+
+    Attributes:
+        redis (redis.asyncio.Redis): Асинхронний клієнт Redis.
+        worker_id (str): Ідентифікатор воркера, що входить у ключ списку
+            завдань в роботі.
+        max_attempts (int): Кількість спроб, після якої завдання потрапляє до
+            `email:dead`.
+        base_delay (float): Затримка перед першою повторною спробою в секундах.
+        max_delay (float): Максимальна затримка між спробами в секундах.
+
+    Methods:
+        enqueue(job): Додає завдання в чергу.
+        recover(): Повертає в чергу завдання, що залишилися в роботі.
+        promote_due(): Переносить у чергу завдання, час повторної спроби яких настав.
+        fetch(count, timeout): Бере в роботу до `count` завдань.
+        ack(raw): Позначає завдання виконаним.
+        retry(raw, job, error): Планує повторну спробу або переносить до `email:dead`.
+        stats(): Повертає довжини черг.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        worker_id: str,
+        max_attempts: int,
+        base_delay: float,
+        max_delay: float,
+    ):
+        self.redis = client
+        self.worker_id = worker_id
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @property
+    def processing_key(self) -> str:
+        return f"email:processing:{self.worker_id}"
+
+    async def enqueue(self, job: EmailJob) -> None:
+        """
+        Додає завдання в чергу.
+
+        Args:
+            job (EmailJob): Завдання на надсилання листа.
+        """
+        await self.redis.lpush(QUEUE_KEY, job.model_dump_json())
+
+    async def recover(self) -> int:
+        """
+        Повертає в чергу завдання, які воркер не завершив до перезапуску.
+
+        Returns:
+            int: Кількість повернутих завдань.
+        """
+        count = 0
+        while await self.redis.lmove(self.processing_key, QUEUE_KEY, "LEFT", "RIGHT"):
+            count += 1
+        return count
+
+    async def promote_due(self, now: float | None = None) -> int:
+        """
+        Переносить у чергу завдання, час повторної спроби яких настав.
+
+        Завдання переноситься лише тим воркером, якому вдалося видалити його з
+        `email:retry`, тому кілька воркерів не дублюють листи.
+
+        Returns:
+            int: Кількість перенесених завдань.
+        """
+        now = time.time() if now is None else now
+        due = await self.redis.zrangebyscore(RETRY_KEY, "-inf", now, start=0, num=100)
+        count = 0
+        for raw in due:
+            if await self.redis.zrem(RETRY_KEY, raw):
+                await self.redis.lpush(QUEUE_KEY, raw)
+                count += 1
+        return count
+
+    async def fetch(self, count: int, timeout: int) -> list[bytes]:
+        """
+        Бере в роботу до `count` завдань.
+
+        Чекає на перше завдання не довше `timeout` секунд, решту пакета
+        забирає без очікування.
+
+        Returns:
+            list[bytes]: Серіалізовані завдання.
+        """
+        first = await self.redis.blmove(
+            QUEUE_KEY, self.processing_key, timeout, "RIGHT", "LEFT"
+        )
+        if first is None:
+            return []
+        batch = [first]
+        while len(batch) < count:
+            raw = await self.redis.lmove(QUEUE_KEY, self.processing_key, "RIGHT", "LEFT")
+            if raw is None:
+                break
+            batch.append(raw)
+        return batch
+
+    async def ack(self, raw: bytes) -> None:
+        await self.redis.lrem(self.processing_key, 1, raw)
+
+    def delay(self, attempts: int) -> float:
+        """
+        Повертає затримку перед спробою номер `attempts + 1`.
+        """
+        delay = min(self.base_delay * 2 ** (attempts - 1), self.max_delay)
+        return delay + random.uniform(0, delay / 10)
+
+    async def retry(self, raw: bytes, job: EmailJob | None, error: str) -> bool:
+        """
+        Планує повторну спробу надсилання або переносить завдання до `email:dead`.
+
+        Args:
+            raw (bytes): Завдання в тому вигляді, в якому його взято в роботу.
+            job (EmailJob | None): Розібране завдання або None, якщо завдання
+                пошкоджене (воно одразу потрапляє до `email:dead`).
+            error (str): Опис помилки.
+
+        Returns:
+            bool: True, якщо завдання перенесено до `email:dead`.
+        """
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lrem(self.processing_key, 1, raw)
+            dead = job is None or job.attempts + 1 >= self.max_attempts
+            if job is None:
+                pipe.lpush(DEAD_KEY, raw)
+            else:
+                job = job.model_copy(
+                    update={"attempts": job.attempts + 1, "last_error": error}
+                )
+                if dead:
+                    pipe.lpush(DEAD_KEY, job.model_dump_json())
+                else:
+                    pipe.zadd(
+                        RETRY_KEY,
+                        {job.model_dump_json(): time.time() + self.delay(job.attempts)},
+                    )
+            await pipe.execute()
+        return dead
+
+    async def stats(self) -> dict:
+        return {
+            "queued": await self.redis.llen(QUEUE_KEY),
+            "processing": await self.redis.llen(self.processing_key),
+            "retrying": await self.redis.zcard(RETRY_KEY),
+            "dead": await self.redis.llen(DEAD_KEY),
+        }
+
+
+class SmtpSender:
+    """
+    Надсилає листи через одне постійне SMTP-з'єднання.
+
+    З'єднання відкривається під час першого надсилання і перевикористовується
+    для наступних листів. Якщо сервер його закрив, воно відкривається знову.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: str | None = None,
+        password: str | None = None,
+        use_tls: bool = False,
+        start_tls: bool = False,
+        timeout: float = 30,
+    ):
+        self.username = username
+        self.password = password
+        self.smtp = aiosmtplib.SMTP(
+            hostname=hostname,
+            port=port,
+            use_tls=use_tls,
+            start_tls=start_tls,
+            timeout=timeout,
+        )
+        self.connections = 0
+
+    async def _connect(self) -> None:
+        if self.smtp.is_connected:
+            return
+        await self.smtp.connect()
+        self.connections += 1
+        if self.username:
+            await self.smtp.login(self.username, self.password)
+
+    async def send(self, message: EmailMessage) -> None:
+        """
+        Надсилає лист, за потреби відкриваючи з'єднання заново.
+
+        Raises:
+            aiosmtplib.SMTPException: Якщо лист не вдалося надіслати.
+        """
+        await self._connect()
+        try:
+            await self.smtp.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            await self._connect()
+            await self.smtp.send_message(message)
+
+    async def close(self) -> None:
+        if self.smtp.is_connected:
+            try:
+                await self.smtp.quit()
+            except aiosmtplib.SMTPException as err:
+                logger.warning("SMTP QUIT failed: %s", err)
+                self.smtp.close()
+
+
+class EmailWorker:
+    """
+    Обробляє чергу листів: бере завдання пакетами, формує листи за шаблонами,
+    надсилає їх і планує повторні спроби для невдалих.
+    """
+
+    def __init__(
+        self,
+        queue: EmailQueue,
+        sender: SmtpSender,
+        sender_address: str,
+        batch_size: int,
+        templates: Path = Path(__file__).parent / "templates",
+    ):
+        self.queue = queue
+        self.sender = sender
+        self.sender_address = sender_address
+        self.batch_size = batch_size
+        self.templates = Environment(
+            loader=FileSystemLoader(templates), autoescape=select_autoescape()
+        )
+
+    def render(self, job: EmailJob) -> EmailMessage:
+        """
+        Формує HTML-лист для завдання.
+        """
+        message = EmailMessage()
+        message["From"] = self.sender_address
+        message["To"] = job.recipient
+        message["Subject"] = job.subject
+        message.set_content(
+            self.templates.get_template(job.template).render(**job.body), subtype="html"
+        )
+        return message
+
+    async def run_once(self, timeout: int = 1) -> int:
+        """
+        Обробляє один пакет завдань.
+
+        Returns:
+            int: Кількість успішно надісланих листів.
+        """
+        await self.queue.promote_due()
+        sent = 0
+        for raw in await self.queue.fetch(self.batch_size, timeout):
+            try:
+                job = EmailJob.model_validate_json(raw)
+            except ValidationError as err:
+                logger.error("Invalid email job moved to %s: %s", DEAD_KEY, err)
+                await self.queue.retry(raw, None, "Invalid job")
+                continue
+            try:
+                await self.sender.send(self.render(job))
+            except (aiosmtplib.SMTPException, OSError) as err:
+                if await self.queue.retry(raw, job, str(err)):
+                    logger.error(
+                        "Email %s to %s moved to %s after %d attempts: %s",
+                        job.id, job.recipient, DEAD_KEY, job.attempts + 1, err,
+                    )
+                else:
+                    logger.warning(
+                        "Email %s to %s failed (attempt %d), will retry: %s",
+                        job.id, job.recipient, job.attempts + 1, err,
+                    )
+                continue
+            await self.queue.ack(raw)
+            sent += 1
+        return sent
+
+    async def run(self) -> None:
+        """
+        Обробляє чергу до скасування задачі.
+        """
+        recovered = await self.queue.recover()
+        if recovered:
+            logger.info("Recovered %d email jobs", recovered)
+        try:
+            while True:
+                try:
+                    await self.run_once()
+                except RedisError as err:
+                    logger.error("Email queue is unavailable: %s", err)
+                    await asyncio.sleep(1)
+        finally:
+            await self.sender.close()
+
+
+email_queue = EmailQueue(
+    redis.from_url(settings.redis_host),
+    worker_id=settings.email_worker_id,
+    max_attempts=settings.email_max_attempts,
+    base_delay=settings.email_retry_base_delay,
+    max_delay=settings.email_retry_max_delay,
+)
+
+
+def create_worker() -> EmailWorker:
+    """
+    Створює воркер з налаштувань застосунку.
+    """
+    return EmailWorker(
+        email_queue,
+        SmtpSender(
+            settings.mail_server,
+            settings.mail_port,
+            username=settings.mail_username,
+            password=settings.mail_password,
+            use_tls=True,
+        ),
+        sender_address=formataddr((settings.mail_from, settings.mail_username)),
+        batch_size=settings.email_batch_size,
+    )
+
+
+async def deliver(job: EmailJob) -> bool:
+    """
+    Ставить лист у чергу, а якщо Redis недоступний - надсилає його одразу.
+
+    Args:
+        job (EmailJob): Завдання на надсилання листа.
+
+    Returns:
+        bool: False, якщо лист не вдалося ні поставити в чергу, ні надіслати.
+    """
+    try:
+        await email_queue.enqueue(job)
+        return True
+    except RedisError as err:
+        logger.warning("Email queue is unavailable, sending %s directly: %s", job.id, err)
+
+    worker = create_worker()
+    try:
+        await worker.sender.send(worker.render(job))
+        return True
+    except (aiosmtplib.SMTPException, OSError) as err:
+        logger.error("Email %s to %s could not be sent: %s", job.id, job.recipient, err)
+        return False
+    finally:
+        await worker.sender.close()
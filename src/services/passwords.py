@@ -0,0 +1,134 @@
+"""
+Файл `passwords.py` містить хешування паролів bcrypt в обмеженому пулі потоків.
+
+bcrypt звільняє GIL під час обчислення, тому хешування у пулі потоків не
+блокує цикл подій і не серіалізує інші запити воркера. Кількість запитів,
+що очікують у черзі, обмежена: під час сплеску логінів зайві запити
+отримують 503 замість того, щоб накопичуватися.
+
+Для невідомих користувачів пароль перевіряється з фіктивним хешем тієї ж
+вартості, тому час відповіді не розкриває, чи існує обліковий запис.
+"""
+
+import asyncio
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from conf import settings
+
+
+class PasswordHasher:
+    """
+    Асинхронний хешувальник паролів з обмеженим пулом потоків.
+
+    Attributes:
+        context (CryptContext): Контекст шифрування паролей з налаштованою вартістю bcrypt.
+        workers (int): Кількість потоків пулу.
+        max_queue (int): Максимальна кількість запитів, що очікують вільного потоку.
+
+    Methods:
+        hash(password): Генерує хеш паролю.
+        verify(plain_password, hashed_password): Перевіряє валідність паролю.
+        verify_and_update(plain_password, hashed_password): Перевіряє пароль та
+            повертає новий хеш, якщо змінилась вартість bcrypt.
+        verify_dummy(plain_password): Перевіряє пароль з фіктивним хешем.
+        stats(): Повертає метрики пулу.
+    """
+
+    def __init__(self, rounds: int, workers: int, max_queue: int):
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hash"
+        )
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+        self._dummy_hash = None
+
+    async def _run(self, fn, *args):
+        if self._in_flight >= self.workers + self.max_queue:
+            self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, try again later",
+                headers={"Retry-After": "1"},
+            )
+
+        self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, fn, *args
+            )
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+            self._busy_seconds += time.perf_counter() - started
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, plain_password, hashed_password)
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        return await self._run(
+            self.context.verify_and_update, plain_password, hashed_password
+        )
+
+    async def verify_dummy(self, plain_password: str) -> bool:
+        """
+        Перевіряє пароль з фіктивним хешем тієї ж вартості, що й справжні.
+
+        Використовується, коли користувача не знайдено, щоб відповідь
+        займала стільки ж часу, як і для існуючого облікового запису.
+
+        Returns:
+            bool: Завжди False.
+        """
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash(secrets.token_hex(16))
+        await self.verify(plain_password, self._dummy_hash)
+        return False
+
+    def stats(self) -> dict:
+        """
+        Повертає метрики пулу хешування.
+
+        Returns:
+            dict: Кількість потоків, запитів у роботі та в черзі, відхилених і
+            завершених запитів, а також середній час виконання у мілісекундах.
+        """
+        return {
+            "workers": self.workers,
+            "in_flight": self._in_flight,
+            "queued": max(0, self._in_flight - self.workers),
+            "max_queue": self.max_queue,
+            "rejected": self._rejected,
+            "completed": self._completed,
+            "avg_ms": round(self._busy_seconds * 1000 / self._completed, 3)
+            if self._completed
+            else 0.0,
+        }
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.bcrypt_rounds,
+    workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+)
@@ -0,0 +1,398 @@
+"""
+Файл `rate_limit.py` містить розподілене обмеження частоти запитів за
+алгоритмом token bucket.
+
+Стан кожного відра (кількість токенів та час останнього поповнення)
+зберігається в хеші Redis і змінюється одним Lua-скриптом, тому рішення
+атомарне для всіх воркерів. Час береться з Redis (`TIME`), а не з годинника
+воркера. Повне відро не зберігається: ключ живе лише доки відро не
+наповниться знову.
+
+Політики маршрутів задаються в `settings.rate_limit_policies` і
+підключаються залежністю `rate_limit(name)`. Рішення "заблоковано"
+кешується в пам'яті процесу до моменту, коли з'явиться наступний токен, тому
+повторні запити клієнта, що перевищив ліміт, відхиляються без звернення до
+Redis. Якщо Redis недоступний, запити пропускаються.
+
+`LoginGuard` захищає вхід від перебору паролів: рахує невдалі спроби окремо
+для облікового запису та для IP-адреси і після порогу блокує їх на час, що
+подвоюється з кожною наступною невдачею. Перевірка блокування виконується
+до запиту в базу даних і хешування паролю.
+"""
+
+import hashlib
+import math
+import time
+
+import redis.asyncio as redis
+from fastapi import Depends, HTTPException, Request, status
+from redis.exceptions import NoScriptError, RedisError
+
+from conf import settings
+from conf.config import RateLimitPolicy
+from services.auth import auth_service
+from services.cache import TTLCache
+
+
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * capacity / period)
+
+if tokens < 1 then
+    return {0, math.ceil((1 - tokens) * period / capacity)}
+end
+
+tokens = tokens - 1
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) * period / capacity) + 1)
+return {1, 0}
+"""
+TOKEN_BUCKET_SHA = hashlib.sha1(TOKEN_BUCKET_SCRIPT.encode()).hexdigest()
+
+LOGIN_FAILURE_SCRIPT = """
+local window = tonumber(ARGV[1])
+local base = tonumber(ARGV[2])
+local max = tonumber(ARGV[3])
+local locks = {}
+for pair = 1, #KEYS / 2 do
+    local counter = KEYS[pair * 2 - 1]
+    local threshold = tonumber(ARGV[3 + pair])
+    local failures = redis.call('INCR', counter)
+    redis.call('EXPIRE', counter, window)
+    local lock = 0
+    if failures >= threshold then
+        lock = math.floor(math.min(base * 2 ^ (failures - threshold), max))
+        redis.call('SET', KEYS[pair * 2], failures, 'PX', lock)
+    end
+    locks[pair] = lock
+end
+return locks
+"""
+LOGIN_FAILURE_SHA = hashlib.sha1(LOGIN_FAILURE_SCRIPT.encode()).hexdigest()
+
+
+async def eval_script(
+    client: redis.Redis, script: str, sha: str, keys: list[str], args: list
+):
+    """
+    Виконує Lua-скрипт через EVALSHA, завантажуючи його при першому виклику.
+    """
+    try:
+        return await client.evalsha(sha, len(keys), *keys, *args)
+    except NoScriptError:
+        return await client.eval(script, len(keys), *keys, *args)
+
+
+def too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many requests",
+        headers={"Retry-After": str(math.ceil(retry_after))},
+    )
+
+
+class RateLimiter:
+    """
+    Обмежувач частоти запитів з відрами токенів у Redis.
+
+    Attributes:
+        redis (redis.asyncio.Redis): Асинхронний клієнт Redis.
+        local (TTLCache): Кеш заблокованих відер у пам'яті процесу.
+        enabled (bool): Чи увімкнено обмеження.
+        allowed (int): Кількість пропущених запитів.
+        blocked (int): Кількість відхилених запитів.
+        local_blocked (int): Кількість запитів, відхилених без звернення до Redis.
+        errors (int): Кількість помилок Redis.
+
+    Methods:
+        hit(name, identity, policy): Забирає токен з відра.
+        check(name, identity, policy): Забирає токен або відповідає 429.
+        stats(): Повертає лічильники.
+    """
+
+    def __init__(self, client: redis.Redis, local: TTLCache, enabled: bool = True):
+        self.local = local
+        self.enabled = enabled
+        self.allowed = 0
+        self.blocked = 0
+        self.local_blocked = 0
+        self.errors = 0
+        self.redis = client
+
+    @staticmethod
+    def key(name: str, identity: str) -> str:
+        return f"rl:v1:{name}:{identity}"
+
+    async def hit(self, name: str, identity: str, policy: RateLimitPolicy) -> float:
+        """
+        Забирає один токен з відра клієнта.
+
+        Args:
+            name (str): Назва політики, вона ж назва відра.
+            identity (str): IP-адреса або ідентифікатор користувача.
+            policy (RateLimitPolicy): Розмір відра та швидкість поповнення.
+
+        Returns:
+            float: 0, якщо запит дозволено, інакше кількість секунд до
+            появи наступного токена.
+        """
+        if not self.enabled:
+            return 0
+
+        key = self.key(name, identity)
+        retry_at = self.local.get(key)
+        if retry_at is not None:
+            self.local_blocked += 1
+            return max(retry_at - time.monotonic(), 0.001)
+
+        try:
+            allowed, retry_after_ms = await eval_script(
+                self.redis,
+                TOKEN_BUCKET_SCRIPT,
+                TOKEN_BUCKET_SHA,
+                [key],
+                [policy.times, int(policy.seconds * 1000)],
+            )
+        except RedisError as err:
+            print(err)
+            self.errors += 1
+            return 0
+
+        if allowed:
+            self.allowed += 1
+            return 0
+
+        self.blocked += 1
+        retry_after = retry_after_ms / 1000
+        self.local.set(key, time.monotonic() + retry_after, ttl=retry_after)
+        return retry_after
+
+    async def check(self, name: str, identity: str, policy: RateLimitPolicy) -> None:
+        """
+        Забирає токен з відра клієнта.
+
+        Raises:
+            HTTPException: 429 із заголовком `Retry-After`, якщо відро порожнє.
+        """
+        retry_after = await self.hit(name, identity, policy)
+        if retry_after:
+            raise too_many_requests(retry_after)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "allowed": self.allowed,
+            "blocked": self.blocked,
+            "local_blocked": self.local_blocked,
+            "errors": self.errors,
+        }
+
+
+class LoginGuard:
+    """
+    Блокування входу після серії невдалих спроб.
+
+    Невдалі спроби рахуються в Redis окремо для облікового запису та для
+    IP-адреси. Лічильник живе `window` секунд після останньої невдачі. Коли
+    лічильник досягає порогу, ключ блокується на `base_lockout` секунд, і
+    кожна наступна невдача подвоює час блокування до `max_lockout`.
+    Блокування кешуються в пам'яті процесу до їх закінчення.
+
+    Attributes:
+        redis (redis.asyncio.Redis): Асинхронний клієнт Redis.
+        local (TTLCache): Кеш заблокованих ключів у пам'яті процесу.
+        max_account_failures (int): Поріг невдач для облікового запису.
+        max_ip_failures (int): Поріг невдач для IP-адреси.
+        window (int): Час життя лічильника невдач у секундах.
+        base_lockout (float): Перше блокування в секундах.
+        max_lockout (float): Максимальне блокування в секундах.
+
+    Methods:
+        check(email, ip): Відповідає 429, якщо вхід заблоковано.
+        failed(email, ip): Реєструє невдалу спробу.
+        succeeded(email): Скидає лічильник невдач облікового запису.
+        stats(): Повертає лічильники.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        local: TTLCache,
+        max_account_failures: int,
+        max_ip_failures: int,
+        window: int,
+        base_lockout: float,
+        max_lockout: float,
+    ):
+        self.redis = client
+        self.local = local
+        self.max_account_failures = max_account_failures
+        self.max_ip_failures = max_ip_failures
+        self.window = window
+        self.base_lockout = base_lockout
+        self.max_lockout = max_lockout
+        self.locked = 0
+        self.local_locked = 0
+        self.failures = 0
+        self.errors = 0
+
+    @staticmethod
+    def keys(email: str, ip: str) -> tuple[str, str]:
+        return f"login:acct:{email.strip().lower()}", f"login:ip:{ip}"
+
+    def _lock_locally(self, key: str, seconds: float) -> None:
+        self.local.set(key, time.monotonic() + seconds, ttl=seconds)
+
+    async def check(self, email: str, ip: str) -> None:
+        """
+        Перевіряє, чи не заблоковано вхід для облікового запису або IP-адреси.
+
+        Args:
+            email (str): Електронна пошта, з якою виконується вхід.
+            ip (str): IP-адреса клієнта.
+
+        Raises:
+            HTTPException: 429 із заголовком `Retry-After`, якщо вхід заблоковано.
+        """
+        keys = self.keys(email, ip)
+        now = time.monotonic()
+        for key in keys:
+            retry_at = self.local.get(key)
+            if retry_at is not None:
+                self.local_locked += 1
+                raise too_many_requests(max(retry_at - now, 0.001))
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.pttl(f"{key}:lock")
+                ttls = await pipe.execute()
+        except RedisError as err:
+            print(err)
+            self.errors += 1
+            return
+
+        retry_after = 0
+        for key, ttl in zip(keys, ttls):
+            if ttl > 0:
+                self._lock_locally(key, ttl / 1000)
+                retry_after = max(retry_after, ttl / 1000)
+        if retry_after:
+            self.locked += 1
+            raise too_many_requests(retry_after)
+
+    async def failed(self, email: str, ip: str) -> None:
+        """
+        Реєструє невдалу спробу входу та за потреби блокує вхід.
+
+        Args:
+            email (str): Електронна пошта, з якою виконувався вхід.
+            ip (str): IP-адреса клієнта.
+        """
+        self.failures += 1
+        account, address = self.keys(email, ip)
+        try:
+            locks = await eval_script(
+                self.redis,
+                LOGIN_FAILURE_SCRIPT,
+                LOGIN_FAILURE_SHA,
+                [account, f"{account}:lock", address, f"{address}:lock"],
+                [
+                    self.window,
+                    int(self.base_lockout * 1000),
+                    int(self.max_lockout * 1000),
+                    self.max_account_failures,
+                    self.max_ip_failures,
+                ],
+            )
+        except RedisError as err:
+            print(err)
+            self.errors += 1
+            return
+
+        for key, lock in zip((account, address), locks):
+            if lock:
+                self._lock_locally(key, lock / 1000)
+
+    async def succeeded(self, email: str) -> None:
+        """
+        Скидає лічильник невдач облікового запису після успішного входу.
+
+        Лічильник IP-адреси не скидається, щоб успішний вхід в один
+        обліковий запис не відкривав перебір інших.
+        """
+        account, _ = self.keys(email, "")
+        try:
+            await self.redis.delete(account)
+        except RedisError as err:
+            print(err)
+            self.errors += 1
+
+    def stats(self) -> dict:
+        return {
+            "failures": self.failures,
+            "locked": self.locked,
+            "local_locked": self.local_locked,
+            "errors": self.errors,
+        }
+
+
+rate_limiter = RateLimiter(
+    redis.from_url(settings.redis_host),
+    local=TTLCache(settings.rate_limit_local_size, ttl=1),
+    enabled=settings.rate_limit_enabled,
+)
+
+login_guard = LoginGuard(
+    redis.from_url(settings.redis_host),
+    local=TTLCache(settings.rate_limit_local_size, ttl=1),
+    max_account_failures=settings.login_max_failures_account,
+    max_ip_failures=settings.login_max_failures_ip,
+    window=settings.login_failure_window,
+    base_lockout=settings.login_lockout_base,
+    max_lockout=settings.login_lockout_max,
+)
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(name: str):
+    """
+    Створює залежність FastAPI, що застосовує політику `name` з
+    `settings.rate_limit_policies`.
+
+    Політики з `per="user"` рахують запити за ідентифікатором поточного
+    користувача, решта - за IP-адресою клієнта.
+
+    Args:
+        name (str): Назва політики.
+
+    Returns:
+        Callable: Залежність для `dependencies=[Depends(...)]`.
+    """
+    policy = settings.rate_limit_policies[name]
+
+    if policy.per == "user":
+
+        async def limit_user(user=Depends(auth_service.get_principal)) -> None:
+            await rate_limiter.check(name, str(user.id), policy)
+
+        return limit_user
+
+    async def limit_ip(request: Request) -> None:
+        await rate_limiter.check(name, client_ip(request), policy)
+
+    return limit_ip
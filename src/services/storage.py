@@ -0,0 +1,197 @@
+"""
+Файл `storage.py` містить сховища файлів користувачів (мініатюр аватарів).
+
+`StorageBackend` описує інтерфейс сховища. `CloudinaryStorage` завантажує
+файли до Cloudinary, `LocalStorage` зберігає їх у локальному каталозі (для
+розробки та тестів). Усі блокуючі операції виконуються в пулі потоків, тому
+цикл подій не зупиняється на час завантаження. Сховище застосунку
+створюється один раз функцією `create_storage` відповідно до налаштувань.
+
+Сховище з CDN повертає публічну адресу файлу (`url`), і застосунок
+перенаправляє клієнтів туди замість того, щоб завантажувати файл сам.
+"""
+
+import pathlib
+import shutil
+import time
+import urllib.error
+import urllib.request
+from abc import ABC, abstractmethod
+from typing import BinaryIO
+
+import cloudinary
+import cloudinary.uploader
+import cloudinary.utils
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+
+from conf import settings
+
+
+class StorageBackend(ABC):
+    """
+    Інтерфейс сховища файлів.
+
+    Methods:
+        save(key, file, content_type): Зберігає файл і повертає його публічну URL-адресу.
+        read(key): Повертає вміст файлу або None, якщо файлу немає.
+    """
+
+    @abstractmethod
+    async def save(self, key: str, file: BinaryIO, content_type: str) -> str:
+        """
+        Зберігає файл під вказаним ключем, перезаписуючи попередній.
+
+        Args:
+            key (str): Ключ файлу з розширенням, наприклад `avatars/1/ab12/64.webp`.
+            file (BinaryIO): Файл, що читається потоково з поточної позиції.
+            content_type (str): MIME-тип файлу.
+
+        Returns:
+            str: Публічна URL-адреса збереженого файлу.
+        """
+
+    @abstractmethod
+    async def read(self, key: str) -> bytes | None:
+        """
+        Читає файл зі сховища.
+
+        Args:
+            key (str): Ключ файлу.
+
+        Returns:
+            bytes | None: Вміст файлу або None, якщо файлу немає.
+
+        Raises:
+            HTTPException: 502, якщо зовнішнє сховище недоступне.
+        """
+
+    def url(self, key: str) -> str | None:
+        """
+        Повертає публічну адресу, за якою клієнти можуть отримати файл
+        напряму, або None, якщо файл віддає сам застосунок.
+
+        Args:
+            key (str): Ключ файлу.
+        """
+        return None
+
+
+class CloudinaryStorage(StorageBackend):
+    """
+    Сховище в Cloudinary.
+
+    Клієнт Cloudinary налаштовується один раз під час створення сховища, а
+    завантаження та читання виконуються в пулі потоків. Файли зберігаються як
+    ресурси `raw`, тобто без трансформацій на боці Cloudinary.
+    """
+
+    def __init__(self, cloud_name: str, api_key: str, api_secret: str):
+        cloudinary.config(
+            cloud_name=cloud_name,
+            api_key=api_key,
+            api_secret=api_secret,
+            secure=True,
+        )
+
+    async def save(self, key: str, file: BinaryIO, content_type: str) -> str:
+        result = await run_in_threadpool(
+            cloudinary.uploader.upload,
+            file,
+            public_id=key,
+            resource_type="raw",
+            overwrite=True,
+        )
+        return result["secure_url"]
+
+    @staticmethod
+    def _download(url: str) -> bytes | None:
+        try:
+            with urllib.request.urlopen(url, timeout=10) as response:
+                return response.read()
+        except urllib.error.HTTPError as err:
+            if err.code == 404:
+                return None
+            print(err)
+        except OSError as err:
+            print(err)
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY, detail="File storage is unavailable"
+        )
+
+    async def read(self, key: str) -> bytes | None:
+        return await run_in_threadpool(self._download, self.url(key))
+
+    def url(self, key: str) -> str:
+        url, _ = cloudinary.utils.cloudinary_url(key, resource_type="raw")
+        return url
+
+
+class LocalStorage(StorageBackend):
+    """
+    Сховище в локальному каталозі.
+
+    Attributes:
+        root (pathlib.Path): Каталог, у якому зберігаються файли.
+        base_url (str): URL-префікс, за яким каталог доступний клієнтам.
+    """
+
+    def __init__(self, root: str | pathlib.Path, base_url: str):
+        self.root = pathlib.Path(root).resolve()
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, key: str) -> pathlib.Path:
+        """
+        Повертає шлях файлу для ключа.
+
+        Raises:
+            HTTPException: Якщо ключ виводить за межі каталогу сховища.
+        """
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid file name"
+            )
+        return path
+
+    def _write(self, path: pathlib.Path, file: BinaryIO) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(path.name + ".part")
+        with partial.open("wb") as target:
+            shutil.copyfileobj(file, target)
+        partial.replace(path)
+
+    async def save(self, key: str, file: BinaryIO, content_type: str) -> str:
+        path = self.path(key)
+        await run_in_threadpool(self._write, path, file)
+        relative = path.relative_to(self.root).as_posix()
+        return f"{self.base_url}/{relative}?v={time.time_ns()}"
+
+    @staticmethod
+    def _read(path: pathlib.Path) -> bytes | None:
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    async def read(self, key: str) -> bytes | None:
+        return await run_in_threadpool(self._read, self.path(key))
+
+
+def create_storage() -> StorageBackend:
+    """
+    Створює сховище відповідно до `settings.storage_backend`.
+
+    Returns:
+        StorageBackend: `LocalStorage` для значення `local`, інакше `CloudinaryStorage`.
+    """
+    if settings.storage_backend == "local":
+        return LocalStorage(settings.storage_local_root, settings.storage_local_url)
+    return CloudinaryStorage(
+        settings.cloudinary_name,
+        settings.cloudinary_api_key,
+        settings.cloudinary_api_secret,
+    )
+
+
+storage = create_storage()
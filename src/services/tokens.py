@@ -0,0 +1,273 @@
+"""
+Файл `tokens.py` містить сховища стану токенів у Redis: сімейства
+оновлювальних токенів та версії токенів доступу користувачів.
+
+Кожен вхід створює сімейство (сесію) з випадковим ідентифікатором `fam`.
+Оновлювальний токен містить `fam` та власний ідентифікатор `jti`, а в Redis
+для сімейства зберігається лише `jti` його поточного токена з часом життя
+оновлювального токена. Під час оновлення `jti` атомарно замінюється новим
+(`SET ... XX GET`), тому кожен оновлювальний токен можна використати лише
+один раз. Повторне використання вже заміненого токена означає, що його
+викрадено, і все сімейство відкликається. Вихід також відкликає сімейство.
+
+Так вхід, оновлення та вихід не змінюють таблицю користувачів.
+
+Токен доступу містить версію токенів користувача (`ver`). Вихід і скидання
+паролю збільшують версію в Redis, після чого всі раніше видані токени доступу
+користувача відхиляються. Версії кешуються в пам'яті процесу на кілька
+секунд, тому перевірка токена зазвичай не звертається до Redis.
+"""
+
+import secrets
+
+import redis.asyncio as redis
+from fastapi import HTTPException, status
+from redis.exceptions import RedisError
+
+from conf import settings
+from services.cache import TTLCache
+
+
+def _unavailable(err: RedisError) -> HTTPException:
+    print(err)
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Token store is unavailable",
+        headers={"Retry-After": "1"},
+    )
+
+
+class RefreshTokenStore:
+    """
+    Сховище сімейств оновлювальних токенів.
+
+    Attributes:
+        redis (redis.asyncio.Redis): Асинхронний клієнт Redis.
+        ttl (int): Час життя оновлювального токена та сімейства в секундах.
+        reused (int): Кількість виявлених повторних використань токенів.
+
+    Methods:
+        start(user_id): Створює сімейство та ідентифікатор його першого токена.
+        rotate(family, jti, user_id): Замінює поточний токен сімейства новим.
+        revoke(family, user_id): Відкликає сімейство.
+        revoke_all(user_id): Відкликає всі сімейства користувача.
+        stats(): Повертає лічильники.
+    """
+
+    def __init__(self, client: redis.Redis, ttl: int):
+        self.redis = client
+        self.ttl = ttl
+        self.reused = 0
+
+    @staticmethod
+    def key(family: str) -> str:
+        return f"rt:family:{family}"
+
+    @staticmethod
+    def user_key(user_id: int) -> str:
+        return f"rt:user:{user_id}"
+
+    async def start(self, user_id: int) -> tuple[str, str]:
+        """
+        Створює нове сімейство токенів.
+
+        Args:
+            user_id (int): Ідентифікатор користувача, якому належить сімейство.
+
+        Returns:
+            tuple[str, str]: Ідентифікатор сімейства та `jti` першого токена.
+
+        Raises:
+            HTTPException: 503, якщо Redis недоступний.
+        """
+        family, jti = secrets.token_urlsafe(16), secrets.token_urlsafe(16)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.set(self.key(family), jti, ex=self.ttl)
+                pipe.sadd(self.user_key(user_id), family)
+                pipe.expire(self.user_key(user_id), self.ttl)
+                await pipe.execute()
+        except RedisError as err:
+            raise _unavailable(err)
+        return family, jti
+
+    async def rotate(self, family: str, jti: str, user_id: int) -> str:
+        """
+        Замінює поточний токен сімейства новим.
+
+        Разом із сімейством продовжується і час життя множини сімейств
+        користувача, інакше сесія, яку підтримують оновленнями, пережила б
+        множину і `revoke_all` її б не знайшов.
+
+        Args:
+            family (str): Ідентифікатор сімейства з оновлювального токена.
+            jti (str): Ідентифікатор пред'явленого оновлювального токена.
+            user_id (int): Ідентифікатор користувача, якому належить сімейство.
+
+        Returns:
+            str: `jti` нового оновлювального токена.
+
+        Raises:
+            HTTPException: 401, якщо сімейство відкликано або токен уже
+            використано (тоді сімейство відкликається); 503, якщо Redis
+            недоступний.
+        """
+        new_jti = secrets.token_urlsafe(16)
+        key = self.key(family)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.set(key, new_jti, xx=True, get=True, ex=self.ttl)
+                pipe.expire(self.user_key(user_id), self.ttl)
+                current, _ = await pipe.execute()
+            if current is not None and current.decode() != jti:
+                self.reused += 1
+                await self.revoke(family, user_id)
+                current = None
+        except RedisError as err:
+            raise _unavailable(err)
+
+        if current is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token",
+            )
+        return new_jti
+
+    async def revoke(self, family: str, user_id: int | None = None) -> None:
+        """
+        Відкликає сімейство, після чого жоден його токен не можна оновити.
+
+        Args:
+            family (str): Ідентифікатор сімейства.
+            user_id (int | None): Ідентифікатор власника сімейства. Якщо вказано,
+                сімейство також видаляється з множини сімейств користувача.
+        """
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.delete(self.key(family))
+                if user_id is not None:
+                    pipe.srem(self.user_key(user_id), family)
+                await pipe.execute()
+        except RedisError as err:
+            raise _unavailable(err)
+
+    async def revoke_all(self, user_id: int) -> None:
+        """
+        Відкликає всі сімейства користувача, наприклад після скидання паролю.
+
+        Args:
+            user_id (int): Ідентифікатор користувача.
+        """
+        try:
+            families = await self.redis.smembers(self.user_key(user_id))
+            await self.redis.delete(
+                self.user_key(user_id),
+                *(self.key(family.decode()) for family in families),
+            )
+        except RedisError as err:
+            raise _unavailable(err)
+
+    def stats(self) -> dict:
+        return {"reused": self.reused}
+
+
+class TokenVersionStore:
+    """
+    Версії токенів доступу користувачів у Redis з кешем у пам'яті процесу.
+
+    Відсутній ключ означає версію 0. Токен доступу дійсний, доки його версія
+    не менша за поточну версію користувача.
+
+    Attributes:
+        redis (redis.asyncio.Redis): Асинхронний клієнт Redis.
+        local (TTLCache): Кеш версій у пам'яті процесу. Його час життя
+            обмежує, як довго інші воркери приймають відкликані токени.
+
+    Methods:
+        get(user_id): Повертає поточну версію або None, якщо Redis недоступний.
+        current(user_id): Читає поточну версію з Redis, оминаючи кеш.
+        bump(user_id): Збільшує версію, відкликаючи видані токени доступу.
+    """
+
+    def __init__(self, client: redis.Redis, local: TTLCache):
+        self.redis = client
+        self.local = local
+
+    @staticmethod
+    def key(user_id: int) -> str:
+        return f"tokver:{user_id}"
+
+    async def get(self, user_id: int) -> int | None:
+        """
+        Повертає поточну версію токенів користувача.
+
+        Args:
+            user_id (int): Ідентифікатор користувача.
+
+        Returns:
+            int | None: Версія або None, якщо Redis недоступний.
+        """
+        version = self.local.get(user_id)
+        if version is not None:
+            return version
+        try:
+            version = int(await self.redis.get(self.key(user_id)) or 0)
+        except RedisError as err:
+            print(err)
+            return None
+        self.local.set(user_id, version)
+        return version
+
+    async def current(self, user_id: int) -> int:
+        """
+        Читає поточну версію токенів користувача з Redis, оминаючи кеш.
+
+        Використовується під час видачі токенів: версія з кешу іншого
+        воркера могла застаріти після виходу або скидання паролю, і щойно
+        виданий токен відразу виявився б відкликаним.
+
+        Args:
+            user_id (int): Ідентифікатор користувача.
+
+        Returns:
+            int: Версія.
+
+        Raises:
+            HTTPException: 503, якщо Redis недоступний.
+        """
+        try:
+            version = int(await self.redis.get(self.key(user_id)) or 0)
+        except RedisError as err:
+            raise _unavailable(err)
+        self.local.set(user_id, version)
+        return version
+
+    async def bump(self, user_id: int) -> int:
+        """
+        Збільшує версію токенів користувача.
+
+        Args:
+            user_id (int): Ідентифікатор користувача.
+
+        Returns:
+            int: Нова версія.
+
+        Raises:
+            HTTPException: 503, якщо Redis недоступний.
+        """
+        try:
+            version = await self.redis.incr(self.key(user_id))
+        except RedisError as err:
+            raise _unavailable(err)
+        self.local.set(user_id, version)
+        return version
+
+
+refresh_tokens = RefreshTokenStore(
+    redis.from_url(settings.redis_host), ttl=settings.refresh_token_ttl
+)
+
+token_versions = TokenVersionStore(
+    redis.from_url(settings.redis_host),
+    local=TTLCache(settings.user_cache_local_size, settings.token_version_local_ttl),
+)
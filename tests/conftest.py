@@ -12,7 +12,11 @@ from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, Asyn
 from sqlalchemy.pool import StaticPool
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import text, select
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock
+
+from anyio.from_thread import start_blocking_portal
+from fakeredis import FakeServer
+from fakeredis import aioredis as fake_aioredis
 
 
 # Добавляем папку src в PYTHONPATH
@@ -22,7 +26,11 @@ sys.path.insert(
 
 
 from main import app
-from database import get_session, DatabaseSessionManager, Base, User
+from database import get_session, get_read_session, DatabaseSessionManager, Base, User
+from services.cache import response_cache, user_cache
+from services.mail_queue import email_queue
+from services.rate_limit import login_guard, rate_limiter
+from services.tokens import refresh_tokens, token_versions
 
 
 SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
@@ -49,6 +57,24 @@ def init_models_fixture():
     asyncio.run(init_models())
 
 
+@pytest.fixture(autouse=True)
+def fake_redis(monkeypatch):
+    redis = fake_aioredis.FakeRedis()
+    monkeypatch.setattr(user_cache, "redis", redis)
+    monkeypatch.setattr(response_cache, "redis", redis)
+    monkeypatch.setattr(email_queue, "redis", redis)
+    monkeypatch.setattr(refresh_tokens, "redis", redis)
+    monkeypatch.setattr(token_versions, "redis", redis)
+    token_versions.local.clear()
+    user_cache.local.clear()
+    limits = fake_aioredis.FakeRedis(server=FakeServer())
+    monkeypatch.setattr(rate_limiter, "redis", limits)
+    monkeypatch.setattr(login_guard, "redis", limits)
+    rate_limiter.local.clear()
+    login_guard.local.clear()
+    return redis
+
+
 @pytest.fixture(scope="module")
 def client():
     async def override_get_session():
@@ -62,8 +88,14 @@ def client():
             await session.close()
 
     app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_read_session] = override_get_session
 
-    yield TestClient(app)
+    # Усі запити модуля виконуються в одному циклі подій (без запуску подій
+    # startup), щоб з'єднання fakeredis можна було використовувати повторно
+    with start_blocking_portal() as portal:
+        test_client = TestClient(app)
+        test_client.portal = portal
+        yield test_client
 
 
 @pytest.fixture(scope="module")
@@ -97,7 +129,7 @@ def credentials():
 
 @pytest.fixture()
 async def token(client, user, monkeypatch):
-    mock_send_email = MagicMock()
+    mock_send_email = AsyncMock()
     monkeypatch.setattr("routes.auth_routs.send_email", mock_send_email)
     client.post("/users/signup", json=user)
 
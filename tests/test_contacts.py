@@ -1,11 +1,11 @@
-import pickle
 import pytest
 from fastapi import status
 from unittest.mock import patch
 from services.auth import auth_service
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from sqlalchemy import select
 from database import User
+from schemas import UserPrincipal
 from datetime import date
 
 pytestmark = pytest.mark.order(2)
@@ -17,8 +17,7 @@ pytestmark = pytest.mark.order(2)
 async def test_create_contact(client, test_contact):
     access_token = "wrong_token"
 
-    with patch.object(auth_service, "r") as redis_mock:
-        redis_mock.get.return_value = None
+    with patch.object(auth_service.user_cache, "get", AsyncMock(return_value=None)):
 
         # Запит на створення контакту з переданим access_token
         response = client.post(
@@ -41,8 +40,7 @@ async def test_create_contact(client, test_contact):
 async def test_create_contact(client, test_contact, token):
     access_token = await token
 
-    with patch.object(auth_service, "r") as redis_mock:
-        redis_mock.get.return_value = None
+    with patch.object(auth_service.user_cache, "get", AsyncMock(return_value=None)):
 
         # Запит на створення контакту з переданим access_token
         response = client.post(
@@ -55,6 +53,8 @@ async def test_create_contact(client, test_contact, token):
         assert response.status_code == status.HTTP_201_CREATED
         data = response.json()
         assert "id" in data
+        assert data["birthday"] == test_contact["birthday"]
+        assert not {"user_id", "birthday_md", "version", "deleted_at"} & set(data)
 
 
 # ============================== Test get contacts ============================
@@ -64,8 +64,7 @@ async def test_create_contact(client, test_contact, token):
 async def test_get_contacts(client, token):
     access_token = await token
 
-    with patch.object(auth_service, "r") as redis_mock:
-        redis_mock.get.return_value = None
+    with patch.object(auth_service.user_cache, "get", AsyncMock(return_value=None)):
         response = client.get(
             "/contacts/",
             headers={"Authorization": f"Bearer {access_token}"},
@@ -73,8 +72,9 @@ async def test_get_contacts(client, token):
 
         data = response.json()
         assert response.status_code == status.HTTP_200_OK
-        assert isinstance(data, list)
-        assert data[0]["first_name"] == "John"
+        assert isinstance(data["items"], list)
+        assert data["items"][0]["first_name"] == "John"
+        assert data["next_cursor"] is None
 
 
 # ============================ Test Update contact ============================
@@ -86,8 +86,8 @@ async def test_update_contact(client, test_contact, user, token):
 
     contact_id = 1
 
-    user = User(
-        id=1, email=user["email"], password=user["password"], username=user["username"]
+    user = UserPrincipal(
+        id=1, email=user["email"], username=user["username"], confirmed=True
     )
 
     updated_contact_data = {
@@ -99,8 +99,7 @@ async def test_update_contact(client, test_contact, user, token):
         "additional_data": "Updated additional data",
     }
 
-    with patch.object(auth_service, "r") as redis_mock:
-        redis_mock.get.return_value = pickle.dumps(user)
+    with patch.object(auth_service.user_cache, "get", AsyncMock(return_value=user)):
         response = client.put(
             f"/contacts/{contact_id}",
             json=updated_contact_data,
@@ -117,14 +116,13 @@ async def test_update_contact(client, test_contact, user, token):
 
 @pytest.mark.asyncio
 async def test_get_upcoming_birthdays(client, user, token):
-    user = User(
-        id=1, email=user["email"], password=user["password"], username=user["username"]
+    user = UserPrincipal(
+        id=1, email=user["email"], username=user["username"], confirmed=True
     )
 
     access_token = await token
 
-    with patch.object(auth_service, "r") as redis_mock:
-        redis_mock.get.return_value = pickle.dumps(user)
+    with patch.object(auth_service.user_cache, "get", AsyncMock(return_value=user)):
         response = client.get(
             "/contacts/birthdays/365",
             headers={"Authorization": f"Bearer {access_token}"},
@@ -144,12 +142,11 @@ async def test_remove_unexisting_contact(client, test_contact, user, token):
 
     contact_id = 2
 
-    user = User(
-        id=1, email=user["email"], password=user["password"], username=user["username"]
+    user = UserPrincipal(
+        id=1, email=user["email"], username=user["username"], confirmed=True
     )
 
-    with patch.object(auth_service, "r") as redis_mock:
-        redis_mock.get.return_value = pickle.dumps(user)
+    with patch.object(auth_service.user_cache, "get", AsyncMock(return_value=user)):
         # Надсилаємо запит на видалення контакту із зазначенням access token
         response = client.delete(
             f"/contacts/{contact_id}",
@@ -167,29 +164,21 @@ async def test_remove_unexisting_contact(client, test_contact, user, token):
 async def test_remove_contact_access_denied(
     client, test_contact, user, token, monkeypatch
 ):
-    access_token = await token
+    await token
 
     contact_id = 1
 
-    user = User(
-        id=3, 
-        email=user["email"],
-        password=user["password"],
-        username=user["username"],
+    # Токен іншого користувача: маршрути контактів беруть його з даних токена
+    access_token = await auth_service.create_access_token(
+        {"sub": user["email"], "uid": 3, "ver": 0}
     )
 
-    # Mock the session's `get` method to return the contact
-    async def mock_get(*args, **kwargs):
-        return Contact(id=1, user_id=1)  # Assuming contact exists
-
-    with patch.object(auth_service, "r") as redis_mock:
-        redis_mock.get.return_value = pickle.dumps(user)
-        response = client.delete(
-            f"/contacts/{contact_id}",
-            headers={"Authorization": f"Bearer {access_token}"},
-        )
+    response = client.delete(
+        f"/contacts/{contact_id}",
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
 
-        assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert response.status_code == status.HTTP_403_FORBIDDEN
 
 
 # ============================ Test Remove contact ============================
@@ -201,12 +190,11 @@ async def test_remove_contact(client, test_contact, user, token):
 
     contact_id = 1
 
-    user = User(
-        id=1, email=user["email"], password=user["password"], username=user["username"]
+    user = UserPrincipal(
+        id=1, email=user["email"], username=user["username"], confirmed=True
     )
 
-    with patch.object(auth_service, "r") as redis_mock:
-        redis_mock.get.return_value = pickle.dumps(user)
+    with patch.object(auth_service.user_cache, "get", AsyncMock(return_value=user)):
         # Надсилаємо запит на видалення контакту із зазначенням access token
         response = client.delete(
             f"/contacts/{contact_id}",
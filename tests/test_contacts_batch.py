@@ -0,0 +1,97 @@
+import pytest
+from fastapi import status
+
+
+pytestmark = pytest.mark.order(4)
+
+
+def contact(email, first_name="Eve"):
+    return {
+        "first_name": first_name,
+        "last_name": "Batch",
+        "email": email,
+        "phone_number": "777",
+        "birthday": "1999-09-09",
+    }
+
+
+def contact_ids(client, headers):
+    items = client.get("/contacts/", params={"limit": 500}, headers=headers).json()["items"]
+    return {item["email"]: item["id"] for item in items}
+
+
+# ============================ Test batch operations ==========================
+
+
+@pytest.mark.asyncio
+async def test_batch_mixed_operations(client, token):
+    access_token = await token
+    headers = {"Authorization": f"Bearer {access_token}"}
+    ids = contact_ids(client, headers)
+
+    response = client.post(
+        "/contacts/batch",
+        json={
+            "operations": [
+                {"op": "create", "contact": contact("eve@example.com")},
+                {"op": "update", "id": ids["ann@example.com"],
+                 "contact": contact("ann@example.com", first_name="Annie")},
+                {"op": "delete", "id": ids["dan@example.com"]},
+                {"op": "delete", "id": ids["dan@example.com"]},
+                {"op": "delete", "id": 9999},
+            ]
+        },
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == [201, 200, 200, 409, 404]
+
+    ids_after = contact_ids(client, headers)
+    assert ids_after["eve@example.com"] == results[0]["id"]
+    assert "dan@example.com" not in ids_after
+    first_names = {
+        item["email"]: item["first_name"]
+        for item in client.get("/contacts/", headers=headers).json()["items"]
+    }
+    assert first_names["ann@example.com"] == "Annie"
+
+
+# ======================= Test batch is a single transaction ==================
+
+
+@pytest.mark.asyncio
+async def test_batch_conflict_rolls_back_everything(client, token):
+    access_token = await token
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    response = client.post(
+        "/contacts/batch",
+        json={
+            "operations": [
+                {"op": "create", "contact": contact("fay@example.com")},
+                {"op": "create", "contact": contact("eve@example.com")},
+            ]
+        },
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert "fay@example.com" not in contact_ids(client, headers)
+
+
+# ========================== Test batch validation ============================
+
+
+@pytest.mark.asyncio
+async def test_batch_requires_id_for_delete(client, token):
+    access_token = await token
+
+    response = client.post(
+        "/contacts/batch",
+        json={"operations": [{"op": "delete"}]},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,115 @@
+import pytest
+from fastapi import status
+
+
+pytestmark = pytest.mark.order(7)
+
+
+def contact(email, first_name="Gil"):
+    return {
+        "first_name": first_name,
+        "last_name": "Delta",
+        "email": email,
+        "phone_number": "555",
+        "birthday": "1985-03-03",
+    }
+
+
+def changes(client, headers, **params):
+    response = client.get("/contacts/changes", params=params, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+def sync(client, headers, since=None, limit=500):
+    upserts, deleted = {}, set()
+    while True:
+        params = {"limit": limit} if since is None else {"since": since, "limit": limit}
+        data = changes(client, headers, **params)
+        for item in data["upserts"]:
+            upserts[item["email"]] = item
+        deleted.update(data["deleted"])
+        since = data["next_cursor"]
+        if not data["has_more"]:
+            return upserts, deleted, since
+
+
+# ============================== Test delta sync ==============================
+
+
+@pytest.mark.asyncio
+async def test_full_sync_returns_live_contacts(client, token):
+    access_token = await token
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    upserts, deleted, _ = sync(client, headers)
+    listed = client.get("/contacts/", params={"limit": 500}, headers=headers).json()
+    assert set(upserts) == {item["email"] for item in listed["items"]}
+    assert deleted == set()
+
+    paged, _, _ = sync(client, headers, limit=1)
+    assert set(paged) == set(upserts)
+
+
+@pytest.mark.asyncio
+async def test_changes_since_cursor(client, token):
+    access_token = await token
+    headers = {"Authorization": f"Bearer {access_token}"}
+    _, _, cursor = sync(client, headers)
+
+    created = client.post("/contacts/", json=contact("gil@example.com"), headers=headers)
+    assert created.status_code == status.HTTP_201_CREATED
+    contact_id = created.json()["id"]
+
+    response = client.put(
+        f"/contacts/{contact_id}",
+        json=contact("gil@example.com", first_name="Gilbert"),
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    upserts, deleted, cursor = sync(client, headers, since=cursor)
+    assert list(upserts) == ["gil@example.com"]
+    assert upserts["gil@example.com"]["first_name"] == "Gilbert"
+    assert deleted == set()
+
+    response = client.delete(f"/contacts/{contact_id}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["contact"]["updated_at"] is not None
+
+    upserts, deleted, cursor = sync(client, headers, since=cursor)
+    assert upserts == {}
+    assert deleted == {contact_id}
+
+    data = changes(client, headers, since=cursor)
+    assert data == {"upserts": [], "deleted": [], "next_cursor": cursor, "has_more": False}
+
+
+@pytest.mark.asyncio
+async def test_deleted_contact_is_hidden(client, token):
+    access_token = await token
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    created = client.post("/contacts/", json=contact("hal@example.com"), headers=headers)
+    contact_id = created.json()["id"]
+    assert client.delete(f"/contacts/{contact_id}", headers=headers).status_code == 200
+
+    items = client.get("/contacts/", params={"limit": 500}, headers=headers).json()["items"]
+    assert contact_id not in [item["id"] for item in items]
+    response = client.put(f"/contacts/{contact_id}", json=contact("hal@example.com"), headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    response = client.delete(f"/contacts/{contact_id}", headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    # Видалений контакт не блокує повторне використання електронної пошти
+    response = client.post("/contacts/", json=contact("hal@example.com"), headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+
+
+@pytest.mark.asyncio
+async def test_invalid_changes_cursor(client, token):
+    access_token = await token
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    response = client.get("/contacts/changes", params={"since": "bogus"}, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,111 @@
+import pytest
+from fastapi import status
+
+from services.cache import response_cache
+
+
+pytestmark = pytest.mark.order(6)
+
+
+# ======================== Test conditional contact reads =====================
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url", ["/contacts/?limit=10", "/contacts/birthdays/30"])
+async def test_if_none_match_returns_304(client, token, url):
+    access_token = await token
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    response = client.get(url, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    etag = response.headers["ETag"]
+    assert etag.startswith('"') and etag.endswith('"')
+
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+
+@pytest.mark.asyncio
+async def test_etag_depends_on_query(client, token):
+    access_token = await token
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    first = client.get("/contacts/?limit=10", headers=headers).headers["ETag"]
+    second = client.get("/contacts/?limit=1", headers=headers).headers["ETag"]
+    assert first != second
+
+
+@pytest.mark.asyncio
+async def test_etag_changes_after_mutation(client, token):
+    access_token = await token
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    etag = client.get("/contacts/", headers=headers).headers["ETag"]
+
+    response = client.post(
+        "/contacts/",
+        json={
+            "first_name": "Fay",
+            "last_name": "Etag",
+            "email": "fay@example.com",
+            "phone_number": "+380501234567",
+            "birthday": "1990-05-05",
+            "additional_data": "etag",
+        },
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.get("/contacts/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+    assert "fay@example.com" in [item["email"] for item in response.json()["items"]]
+
+    contact_id = next(
+        item["id"] for item in response.json()["items"] if item["email"] == "fay@example.com"
+    )
+    etag = response.headers["ETag"]
+    response = client.delete(f"/contacts/{contact_id}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.get("/contacts/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+
+
+# ========================== Test listing response cache ======================
+
+
+@pytest.mark.asyncio
+async def test_listing_served_from_response_cache(client, token, monkeypatch):
+    access_token = await token
+    headers = {"Authorization": f"Bearer {access_token}"}
+    monkeypatch.setattr(response_cache, "enabled", True)
+    hits = response_cache.hits
+
+    first = client.get("/contacts/", headers=headers)
+    second = client.get("/contacts/", headers=headers)
+    assert second.status_code == status.HTTP_200_OK
+    assert second.content == first.content
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert response_cache.hits == hits + 1
+
+    response = client.post(
+        "/contacts/",
+        json={
+            "first_name": "Ivy",
+            "last_name": "Cache",
+            "email": "ivy@example.com",
+            "phone_number": "+380501234567",
+            "birthday": "1991-06-06",
+        },
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    third = client.get("/contacts/", headers=headers)
+    assert "ivy@example.com" in [item["email"] for item in third.json()["items"]]
+    assert response_cache.hits == hits + 1
+
+    client.delete(f"/contacts/{response.json()['id']}", headers=headers)
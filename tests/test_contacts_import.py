@@ -0,0 +1,196 @@
+import json
+import tempfile
+
+import pytest
+from fastapi import status
+
+
+pytestmark = pytest.mark.order(3)
+
+
+CSV_FILE = (
+    "first_name,last_name,email,phone_number,birthday,additional_data\n"
+    "Ann,Lee,ann@example.com,111,1990-02-28,\n"
+    "Bob,Ray,bob@example.com,222,not-a-date,Friend\n"
+    "Ann,Twice,ann@example.com,333,1991-03-01,\n"
+    "Cid,Moe,cid@example.com,444,1985-12-31,Colleague\n"
+)
+
+
+# ============================ Test import CSV ================================
+
+
+@pytest.mark.asyncio
+async def test_import_csv(client, token):
+    access_token = await token
+
+    response = client.post(
+        "/contacts/import",
+        files={"file": ("contacts.csv", CSV_FILE, "text/csv")},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["inserted"] == 2
+    assert data["failed"] == 2
+    assert [error["row"] for error in data["errors"]] == [2, 3]
+
+    response = client.get(
+        "/contacts/",
+        params={"email": "cid@"},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    assert response.json()["items"][0]["additional_data"] == "Colleague"
+
+
+# ===================== Test import NDJSON with conflicts =====================
+
+
+@pytest.mark.asyncio
+async def test_import_ndjson_reports_existing_contacts(client, token):
+    access_token = await token
+    lines = [
+        {"first_name": "Cid", "last_name": "Moe", "email": "cid@example.com",
+         "phone_number": "444", "birthday": "1985-12-31"},
+        {"first_name": "Dan", "last_name": "Poe", "email": "dan@example.com",
+         "phone_number": "555", "birthday": "1970-07-07"},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines) + "\n\n[1, 2]\n"
+
+    response = client.post(
+        "/contacts/import",
+        params={"format": "ndjson"},
+        files={"file": ("upload.txt", body, "application/x-ndjson")},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["inserted"] == 1
+    assert data["errors"] == [
+        {"row": 1, "errors": ["Contact with the same email already exists"]},
+        {"row": 4, "errors": ["Invalid row"]},
+    ]
+
+
+# =================== Test import without readable() (3.10) ===================
+
+
+@pytest.mark.asyncio
+async def test_import_spooled_file_without_readable(client, token, monkeypatch):
+    # У Python 3.10 SpooledTemporaryFile, в якому Starlette зберігає
+    # завантаження, не має readable()
+    monkeypatch.delattr(tempfile.SpooledTemporaryFile, "readable", raising=False)
+    access_token = await token
+    body = (
+        "﻿first_name,last_name,email,phone_number,birthday,additional_data\r\n"
+        'Kim,Roe,kim@example.com,666,1992-04-04,"Line one\r\nline two"\r\n'
+    ).encode()
+
+    response = client.post(
+        "/contacts/import",
+        files={"file": ("contacts.csv", body, "text/csv")},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["inserted"] == 1
+
+    response = client.get(
+        "/contacts/",
+        params={"email": "kim@"},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    contact = response.json()["items"][0]
+    assert contact["additional_data"] == "Line one\r\nline two"
+
+    # Наступні тести розраховують на попередній набір контактів
+    response = client.delete(
+        f"/contacts/{contact['id']}",
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+# ================== Test import stops at a broken file byte ==================
+
+
+@pytest.mark.asyncio
+async def test_import_reports_partial_result_for_broken_file(client, token, monkeypatch):
+    monkeypatch.setattr("repository.contacts.settings.contacts_import_batch_size", 2)
+    access_token = await token
+    headers = {"Authorization": f"Bearer {access_token}"}
+    body = (
+        b"first_name,last_name,email,phone_number,birthday\n"
+        b"Lea,Roe,lea@example.com,101,1990-01-01\n"
+        b"Max,Roe,max@example.com,102,1990-01-02\n"
+        b"Ned,R\xffe,ned@example.com,103,1990-01-03\n"
+    )
+
+    response = client.post(
+        "/contacts/import",
+        files={"file": ("contacts.csv", body, "text/csv")},
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert (data["inserted"], data["failed"]) == (2, 1)
+    assert data["errors"][0]["row"] == 3
+    assert data["errors"][0]["errors"][0].startswith("Invalid csv file, import stopped")
+
+    # Наступні тести розраховують на попередній набір контактів
+    for email in ("lea@", "max@"):
+        contact = client.get("/contacts/", params={"email": email}, headers=headers)
+        contact_id = contact.json()["items"][0]["id"]
+        assert client.delete(f"/contacts/{contact_id}", headers=headers).status_code == 200
+
+
+# ========================= Test unknown import format ========================
+
+
+@pytest.mark.asyncio
+async def test_import_unknown_format(client, token):
+    access_token = await token
+
+    response = client.post(
+        "/contacts/import",
+        files={"file": ("contacts.xlsx", b"data", "application/octet-stream")},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+# ============================ Test export formats ============================
+
+
+@pytest.mark.asyncio
+async def test_export_csv_round_trips_import(client, token):
+    access_token = await token
+
+    response = client.get(
+        "/contacts/export",
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[0] == "first_name,last_name,email,phone_number,birthday,additional_data"
+    assert "Cid,Moe,cid@example.com,444,1985-12-31,Colleague" in lines
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson_and_vcard(client, token):
+    access_token = await token
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    response = client.get("/contacts/export", params={"format": "ndjson"}, headers=headers)
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert {row["email"] for row in rows} >= {"ann@example.com", "dan@example.com"}
+
+    response = client.get("/contacts/export", params={"format": "vcard"}, headers=headers)
+    assert response.text.count("BEGIN:VCARD") == len(rows)
+    assert "N:Lee;Ann;;;" in response.text
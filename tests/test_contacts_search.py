@@ -0,0 +1,49 @@
+import pytest
+from fastapi import status
+
+
+pytestmark = pytest.mark.order(5)
+
+
+def search(client, headers, **params):
+    response = client.get("/contacts/search", params=params, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+# ============================ Test prefix search =============================
+
+
+@pytest.mark.asyncio
+async def test_search_by_prefix(client, token):
+    access_token = await token
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    data = search(client, headers, q="Ann")
+    assert [item["email"] for item in data["items"]] == ["ann@example.com"]
+
+    data = search(client, headers, q="coll")
+    assert [item["email"] for item in data["items"]] == ["cid@example.com"]
+
+    data = search(client, headers, q="eve batch")
+    assert [item["email"] for item in data["items"]] == ["eve@example.com"]
+
+    assert search(client, headers, q="nobody")["items"] == []
+    assert search(client, headers, q="!!!")["items"] == []
+
+
+# ========================== Test search pagination ===========================
+
+
+@pytest.mark.asyncio
+async def test_search_pagination(client, token):
+    access_token = await token
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    first = search(client, headers, q="example", limit=2)
+    assert len(first["items"]) == 2
+    second = search(client, headers, q="example", limit=2, after=first["next_cursor"])
+
+    emails = [item["email"] for item in first["items"] + second["items"]]
+    assert len(emails) == len(set(emails)) == 3
+    assert second["next_cursor"] is None
@@ -1,7 +1,14 @@
+import io
+
 import pytest
 
+from fakeredis import FakeServer
+from fakeredis import aioredis as fake_aioredis
 from fastapi import status
+from PIL import Image
 from services.auth import auth_service
+from services.mail_queue import email_queue
+from services.storage import LocalStorage
 from pytest_mock import MockFixture
 from unittest.mock import MagicMock, AsyncMock, patch
 
@@ -11,15 +18,32 @@ pytestmark = pytest.mark.order(1)
 # =================================== Test root ===============================
 
 
-def test_root(client, monkeypatch):
-    monkeypatch.setattr('fastapi_limiter.FastAPILimiter.redis', AsyncMock())
-    monkeypatch.setattr('fastapi_limiter.FastAPILimiter.identifier', AsyncMock())
-    monkeypatch.setattr('fastapi_limiter.FastAPILimiter.http_callback', AsyncMock())
+def test_root(client):
     response = client.get("/")
     assert response.status_code == 200
     assert response.json() == {"message": "Hello World!"}
 
 
+def test_root_rate_limited(client):
+    assert client.get("/").status_code == 200
+    assert client.get("/").status_code == 200
+
+    response = client.get("/")
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_jwks(client, monkeypatch):
+    keys = MagicMock()
+    keys.jwks.return_value = {"keys": [{"kid": "2024-01", "kty": "EC"}]}
+    monkeypatch.setattr(auth_service, "keys", keys)
+
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"keys": [{"kid": "2024-01", "kty": "EC"}]}
+    assert response.headers["Cache-Control"] == "public, max-age=300"
+
+
 # ================================= Test signup ===============================
 
 
@@ -46,6 +70,35 @@ def test_repeat_create_user(client, user):
     assert response.json()["detail"] == "Account already exists"
 
 
+# ====================== Test signup with email queue down ====================
+
+
+def test_signup_when_email_delivery_is_down(client, monkeypatch):
+    # Redis недоступний, пряме надсилання теж не вдається
+    server = FakeServer()
+    server.connected = False
+    monkeypatch.setattr(email_queue, "redis", fake_aioredis.FakeRedis(server=server))
+    worker = MagicMock()
+    worker.sender.send = AsyncMock(side_effect=OSError("Connection refused"))
+    worker.sender.close = AsyncMock()
+    monkeypatch.setattr("services.mail_queue.create_worker", lambda: worker)
+    user = {"username": "pending", "email": "pending@example.com", "password": "qwer1234"}
+
+    response = client.post("/users/signup", json=user)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert "could not be sent" in response.json()["detail"]
+
+    response = client.post("/users/request_email", json={"email": user["email"]})
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json()["detail"] == "Email delivery is temporarily unavailable"
+
+    # Повтор після відновлення пошти не впирається в 409: лист запитується окремо
+    worker.sender.send = AsyncMock()
+    response = client.post("/users/request_email", json={"email": user["email"]})
+    assert response.status_code == status.HTTP_200_OK
+    worker.sender.send.assert_awaited_once()
+
+
 # ======================= Test login not confirmed ============================
 
 
@@ -123,7 +176,40 @@ async def test_login_wrong_user(client, credentials, user):
 
     data = response.json()
 
-    assert data["detail"] == "Invalid password"
+    assert data["detail"] == "Invalid email or password"
+
+
+def test_login_unknown_email_checks_dummy_hash(client, monkeypatch):
+    verify_dummy = AsyncMock(return_value=False)
+    monkeypatch.setattr(auth_service.hasher, "verify_dummy", verify_dummy)
+
+    response = client.post(
+        "/users/login", data={"username": "nobody@example.com", "password": "secret"}
+    )
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["detail"] == "Invalid email or password"
+    verify_dummy.assert_awaited_once_with("secret")
+
+
+def test_login_locked_after_failures(client, credentials, monkeypatch):
+    for _ in range(5):
+        response = client.post(
+            "/users/login",
+            data={"username": credentials["username"], "password": "wrong"},
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    get_user = AsyncMock()
+    verify = AsyncMock()
+    monkeypatch.setattr("repository.users.get_user_by_email", get_user)
+    monkeypatch.setattr(auth_service.hasher, "verify_and_update", verify)
+    response = client.post("/users/login", data=credentials)
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response.headers["Retry-After"]) == 30
+    get_user.assert_not_called()
+    verify.assert_not_called()
 
 
 # ============================== Test logged user =============================
@@ -134,8 +220,7 @@ async def test_current(client, user, token):
     
     access_token = await token
 
-    with patch.object(auth_service, "r") as redis_mock:
-        redis_mock.get.return_value = None
+    with patch.object(auth_service.user_cache, "get", AsyncMock(return_value=None)):
 
         # Запитуємо маршрут /current з токеном доступу
         response = client.get(
@@ -144,3 +229,99 @@ async def test_current(client, user, token):
 
         # Перевіряємо успішну відповідь
         assert response.status_code == status.HTTP_200_OK
+
+
+# ========================== Test refresh and logout ==========================
+
+
+def refresh(client, refresh_token):
+    return client.get(
+        "/users/refresh_token", headers={"Authorization": f"Bearer {refresh_token}"}
+    )
+
+
+def test_refresh_token_rotation(client, credentials, monkeypatch):
+    first = client.post("/users/login", data=credentials).json()["refresh_token"]
+    commit = AsyncMock()
+    monkeypatch.setattr("sqlalchemy.ext.asyncio.AsyncSession.commit", commit)
+
+    response = refresh(client, first)
+    assert response.status_code == status.HTTP_200_OK
+    second = response.json()["refresh_token"]
+    assert second != first
+    assert response.json()["user"]["email"] == credentials["username"]
+    commit.assert_not_called()
+
+    # Повторне використання відкликає всю сесію
+    assert refresh(client, first).status_code == status.HTTP_401_UNAUTHORIZED
+    assert refresh(client, second).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_logout_revokes_refresh_token(client, credentials):
+    tokens = client.post("/users/login", data=credentials).json()
+
+    response = client.get(
+        "/users/logout", headers={"Authorization": f"Bearer {tokens['access_token']}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = refresh(client, tokens["refresh_token"])
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    response = client.get(
+        "/contacts/", headers={"Authorization": f"Bearer {tokens['access_token']}"}
+    )
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+# ============================= Test avatar upload ============================
+
+
+@pytest.mark.asyncio
+async def test_update_avatar(client, user, token, tmp_path, monkeypatch):
+    access_token = await token
+    headers = {"Authorization": f"Bearer {access_token}"}
+    monkeypatch.setattr("services.storage.storage", LocalStorage(tmp_path, "/media"))
+    buffer = io.BytesIO()
+    Image.new("RGB", (500, 400), "blue").save(buffer, "PNG")
+
+    response = client.patch(
+        "/users/avatar",
+        files={"file": ("avatar.png", buffer.getvalue(), "image/png")},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    avatar = response.json()["avatar"]
+    assert avatar.endswith("/256.jpeg")
+
+    response = client.get(avatar)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "image/jpeg"
+    assert "immutable" in response.headers["cache-control"]
+
+    response = client.get(avatar.replace("/256.jpeg", "/64.webp"))
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "image/webp"
+    with Image.open(io.BytesIO(response.content)) as image:
+        assert image.size == (64, 64)
+
+    response = client.get(avatar.replace("/256.jpeg", "/100.webp"))
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    # Сховище з CDN: маршрут лише перенаправляє на незмінну адресу мініатюри
+    cdn = MagicMock()
+    cdn.url.side_effect = lambda key: f"https://cdn.example.com/{key}"
+    monkeypatch.setattr("services.storage.storage", cdn)
+    response = client.get(avatar, follow_redirects=False)
+    assert response.status_code == status.HTTP_308_PERMANENT_REDIRECT
+    assert response.headers["location"].startswith("https://cdn.example.com/avatars/")
+    assert response.headers["location"].endswith("/256.jpeg")
+    assert "immutable" in response.headers["cache-control"]
+    cdn.read.assert_not_called()
+
+    response = client.patch(
+        "/users/avatar",
+        files={"file": ("avatar.txt", b"hello", "text/plain")},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
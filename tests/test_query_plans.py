@@ -0,0 +1,112 @@
+import re
+import unittest
+from datetime import date
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+import repository
+from repository import contacts
+from database import Base, Contact, User
+from schemas import UserPrincipal
+
+
+FULL_SCAN = re.compile(r"\bSCAN (contacts|users)\b(?!_)")
+
+
+class TestQueryPlans(unittest.IsolatedAsyncioTestCase):
+    """Перевіряє, що гарячі запити репозиторію використовують індекси."""
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine(
+            "sqlite+aiosqlite:///:memory:", poolclass=StaticPool
+        )
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(
+                User.__table__.insert().values(
+                    id=1,
+                    username="owner",
+                    email="owner@example.com",
+                    password="x",
+                    reset_token="reset",
+                )
+            )
+            await conn.execute(
+                Contact.__table__.insert(),
+                [
+                    {
+                        "first_name": f"Name{i}",
+                        "last_name": "Doe",
+                        "email": f"c{i}@example.com",
+                        "phone_number": str(i),
+                        "birthday": date(2000, 1 + i % 12, 1 + i % 28),
+                        "birthday_md": (1 + i % 12) * 100 + 1 + i % 28,
+                        "user_id": 1,
+                    }
+                    for i in range(20)
+                ],
+            )
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.user = UserPrincipal(id=1, email="owner@example.com", username="owner")
+        self.statements = []
+        event.listen(self.engine.sync_engine, "before_cursor_execute", self._capture)
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    def _capture(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.statements.append((statement, parameters))
+
+    async def _plans(self):
+        event.remove(self.engine.sync_engine, "before_cursor_execute", self._capture)
+        plans = []
+        async with self.engine.connect() as conn:
+            for statement, parameters in self.statements:
+                result = await conn.exec_driver_sql(
+                    "EXPLAIN QUERY PLAN " + statement, parameters
+                )
+                plans.append(" | ".join(row[-1] for row in result))
+        self.assertTrue(plans, "no queries were captured")
+        return plans
+
+    async def assertUsesIndexes(self):
+        for plan in await self._plans():
+            self.assertIsNone(FULL_SCAN.search(plan), plan)
+
+    async def test_contacts_page(self):
+        async with self.sessionmaker() as session:
+            page = await contacts.get_all_contacts(self.user, session, limit=5)
+            await contacts.get_all_contacts(
+                self.user, session, limit=5, after=page["next_cursor"], name="Na"
+            )
+        await self.assertUsesIndexes()
+
+    async def test_upcoming_birthdays(self):
+        async with self.sessionmaker() as session:
+            await contacts.get_upcoming_birthdays(30, self.user, session)
+        await self.assertUsesIndexes()
+
+    async def test_changes_feed(self):
+        async with self.sessionmaker() as session:
+            changes = await contacts.get_contact_changes(self.user, session, limit=5)
+            await contacts.get_contact_changes(
+                self.user, session, since=changes["next_cursor"], limit=5
+            )
+        await self.assertUsesIndexes()
+
+    async def test_search(self):
+        async with self.sessionmaker() as session:
+            await contacts.search_contacts("nam", self.user, session)
+        await self.assertUsesIndexes()
+
+    async def test_user_lookups(self):
+        async with self.sessionmaker() as session:
+            await repository.get_user_by_email("owner@example.com", session)
+            await repository.get_user_by_reset_token("reset", session)
+        plans = await self._plans()
+        for plan in plans:
+            self.assertIsNone(FULL_SCAN.search(plan), plan)
+        self.assertTrue(any("ix_users_reset_token" in plan for plan in plans), plans)
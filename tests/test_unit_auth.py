@@ -0,0 +1,117 @@
+import inspect
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fakeredis import FakeServer
+from fakeredis import aioredis as fake_aioredis
+from fastapi import HTTPException
+from jose import jwt
+
+from database import get_session
+from schemas import TokenPrincipal
+from services.auth import auth_service
+from services.cache import TTLCache
+from services.tokens import TokenVersionStore
+
+
+class TestAccessTokenCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        auth_service.token_cache.clear()
+
+    async def test_verified_claims_are_cached(self):
+        token = await auth_service.create_access_token({"sub": "testuser@example.com"})
+
+        with patch("services.jwt_keys.jwt.decode", wraps=jwt.decode) as decode:
+            first = auth_service.decode_access_token(token)
+            second = auth_service.decode_access_token(token)
+
+        self.assertEqual(first, second)
+        self.assertEqual(first["sub"], "testuser@example.com")
+        decode.assert_called_once()
+
+    async def test_revoke_evicts_cached_claims(self):
+        token = await auth_service.create_access_token({"sub": "testuser@example.com"})
+        auth_service.decode_access_token(token)
+
+        auth_service.revoke_access_token(token)
+
+        with patch("services.jwt_keys.jwt.decode", wraps=jwt.decode) as decode:
+            auth_service.decode_access_token(token)
+        decode.assert_called_once()
+
+    async def test_expired_token_is_not_cached(self):
+        token = await auth_service.create_access_token(
+            {"sub": "testuser@example.com"}, expires_delta=-1
+        )
+        with self.assertRaises(jwt.JWTError):
+            auth_service.decode_access_token(token)
+        self.assertEqual(len(auth_service.token_cache), 0)
+
+
+class TestTokenPrincipal(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        auth_service.token_cache.clear()
+        self.server = FakeServer()
+        self.versions = TokenVersionStore(
+            fake_aioredis.FakeRedis(server=self.server), local=TTLCache(100, ttl=60)
+        )
+        patcher = patch.object(auth_service, "token_versions", self.versions)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def token(self, **claims):
+        return await auth_service.create_access_token(
+            {"sub": "testuser@example.com", **claims}
+        )
+
+    async def test_principal_is_built_from_claims(self):
+        token = await self.token(uid=7, ver=0)
+        await auth_service.get_principal(token)
+
+        self.server.connected = False
+        with patch.object(auth_service.user_cache, "get", AsyncMock()) as cache_get:
+            principal = await auth_service.get_principal(token)
+
+        self.assertEqual((principal.id, principal.email), (7, "testuser@example.com"))
+        cache_get.assert_not_called()
+
+    async def test_bumped_version_revokes_token(self):
+        token = await self.token(uid=7, ver=0)
+        await self.versions.bump(7)
+
+        with self.assertRaises(HTTPException) as context:
+            await auth_service.get_principal(token)
+        self.assertEqual(context.exception.status_code, 401)
+        self.assertEqual(
+            (await auth_service.get_principal(await self.token(uid=7, ver=1))).id, 7
+        )
+
+    async def test_session_tokens_carry_current_version(self):
+        user = TokenPrincipal(id=7, email="testuser@example.com")
+        self.assertEqual(await self.versions.get(7), 0)
+        # Вихід на іншому воркері: локальний кеш цього воркера ще містить 0
+        await self.versions.redis.incr(self.versions.key(7))
+
+        access_token, _ = await auth_service.create_session_tokens(user, "fam", "jti")
+        self.assertEqual(auth_service.decode_access_token(access_token)["ver"], 1)
+        self.assertEqual((await auth_service.get_principal(access_token)).id, 7)
+
+        self.server.connected = False
+        with self.assertRaises(HTTPException) as context:
+            await auth_service.create_session_tokens(user, "fam", "jti")
+        self.assertEqual(context.exception.status_code, 503)
+
+    async def test_token_without_uid_is_rejected(self):
+        with self.assertRaises(HTTPException):
+            await auth_service.get_principal(await self.token())
+
+
+class TestCurrentUser(unittest.TestCase):
+    def test_cache_miss_reads_primary(self):
+        # Рядок з репліки, що відстає, повернув би в кеш інвалідований запис
+        session = inspect.signature(auth_service.get_current_user).parameters["session"]
+        self.assertIs(session.default.dependency, get_session)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import asyncio
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+from fakeredis import aioredis as fake_aioredis
+from redis.exceptions import ConnectionError
+
+from database import User
+from schemas import UserPrincipal
+from services.cache import ResponseCache, TTLCache, UserCache
+
+
+class TestUserCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.redis = fake_aioredis.FakeRedis()
+        self.cache = UserCache(self.redis, ttl=60, local=TTLCache(100, 30))
+        self.user = User(
+            id=1,
+            username="testuser",
+            email="testuser@example.com",
+            password="hashed",
+            confirmed=True,
+            avatar="https://example.com/avatar.jpg",
+            created_at=datetime(2023, 7, 11, 10, 30),
+        )
+
+    async def test_set_and_get_projection(self):
+        principal = await self.cache.set(self.user)
+        self.assertIsInstance(principal, UserPrincipal)
+
+        cached = await self.cache.get(self.user.email)
+        self.assertEqual(cached, principal)
+        self.assertEqual(cached.id, 1)
+        self.assertEqual(cached.created_at, self.user.created_at)
+
+        raw = await self.redis.get(self.cache.key(self.user.email))
+        self.assertNotIn(b"password", raw)
+        self.assertLessEqual(await self.redis.ttl(self.cache.key(self.user.email)), 60)
+
+    async def test_local_hit_skips_redis(self):
+        await self.cache.set(self.user)
+        with patch.object(self.redis, "get", AsyncMock()) as redis_get:
+            self.assertIsNotNone(await self.cache.get(self.user.email))
+            redis_get.assert_not_called()
+
+    async def test_get_ignores_unknown_payload(self):
+        await self.redis.set(self.cache.key(self.user.email), b"\x80\x04legacy-pickle")
+        self.assertIsNone(await self.cache.get(self.user.email))
+
+    async def test_invalidate(self):
+        await self.cache.set(self.user)
+        await self.cache.invalidate(self.user.email)
+        self.assertIsNone(await self.cache.get(self.user.email))
+
+    async def test_invalidation_reaches_other_workers(self):
+        other = UserCache(self.redis, ttl=60, local=TTLCache(100, 30))
+        listener = asyncio.create_task(other.listen())
+        await asyncio.sleep(0.05)
+
+        await other.set(self.user)
+        await self.cache.invalidate(self.user.email)
+        await asyncio.sleep(0.05)
+
+        self.assertIsNone(other.local.get(self.user.email))
+        listener.cancel()
+
+    async def test_redis_unavailable_is_a_miss(self):
+        self.cache.local.clear()
+        self.cache.redis = AsyncMock()
+        self.cache.redis.get.side_effect = ConnectionError("down")
+        self.assertIsNone(await self.cache.get(self.user.email))
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=30)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+    def test_expired_entry_is_dropped(self):
+        cache = TTLCache(maxsize=2, ttl=30)
+        cache.set("a", 1, ttl=-1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.redis = fake_aioredis.FakeRedis()
+        self.cache = ResponseCache(self.redis, ttl=60, enabled=True)
+
+    async def test_set_get_and_counters(self):
+        self.assertIsNone(await self.cache.get(1, "3:50"))
+        await self.cache.set(1, "3:50", b'{"items":[]}')
+        self.assertEqual(await self.cache.get(1, "3:50"), b'{"items":[]}')
+        self.assertIsNone(await self.cache.get(2, "3:50"))
+        self.assertLessEqual(await self.redis.ttl(self.cache.key(1)), 60)
+        self.assertEqual(
+            self.cache.stats(), {"enabled": True, "hits": 1, "misses": 2, "errors": 0}
+        )
+
+    async def test_invalidate_drops_all_user_entries(self):
+        await self.cache.set(1, "3:50", b"a")
+        await self.cache.set(1, "3:10", b"b")
+        await self.cache.invalidate(1)
+        self.assertIsNone(await self.cache.get(1, "3:50"))
+        self.assertIsNone(await self.cache.get(1, "3:10"))
+
+    async def test_disabled_cache_is_bypassed(self):
+        self.cache.enabled = False
+        await self.cache.set(1, "3:50", b"a")
+        self.assertIsNone(await self.cache.get(1, "3:50"))
+        self.assertEqual(await self.redis.exists(self.cache.key(1)), 0)
+
+    async def test_redis_unavailable_is_a_miss(self):
+        self.cache.redis = AsyncMock()
+        self.cache.redis.hget.side_effect = ConnectionError("down")
+        self.assertIsNone(await self.cache.get(1, "3:50"))
+        self.assertEqual(self.cache.stats()["errors"], 1)
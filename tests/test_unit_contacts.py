@@ -1,10 +1,13 @@
 import unittest
+from datetime import date, datetime
 from unittest.mock import AsyncMock, MagicMock
 
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import User, Contact
 from repository import create_contact, get_all_contacts, delete_contact, update_contact
+from repository.contacts import _birthday_md_ranges
 from schemas import ContactCreate
 
 
@@ -35,7 +38,31 @@ class TestAsync(unittest.IsolatedAsyncioTestCase):
         mock_contacts.scalars.return_value.all.return_value = expected_contacts
         self.session.execute.return_value = mock_contacts
         result = await get_all_contacts(self.user, self.session)
-        self.assertEqual(result, expected_contacts)
+        self.assertEqual(result, {"items": expected_contacts, "next_cursor": None})
+
+    async def test_get_all_contacts_next_page(self):
+        first = Contact(id=1, user_id=self.user.id)
+        second = Contact(id=2, user_id=self.user.id)
+        mock_contacts = MagicMock()
+        mock_contacts.scalars.return_value.all.return_value = [first, second]
+        self.session.execute.return_value = mock_contacts
+
+        page = await get_all_contacts(self.user, self.session, limit=1)
+        self.assertEqual(page["items"], [first])
+        self.assertIsNotNone(page["next_cursor"])
+
+        mock_contacts.scalars.return_value.all.return_value = [second]
+        page = await get_all_contacts(
+            self.user, self.session, limit=1, after=page["next_cursor"]
+        )
+        self.assertEqual(page, {"items": [second], "next_cursor": None})
+        statement = str(self.session.execute.call_args.args[0])
+        self.assertIn("contacts.id >", statement)
+
+    async def test_get_all_contacts_invalid_cursor(self):
+        with self.assertRaises(HTTPException) as ctx:
+            await get_all_contacts(self.user, self.session, after="not-a-cursor")
+        self.assertEqual(ctx.exception.status_code, 400)
 
     async def test_update_contact_successful(self):
         contact_id = 1
@@ -66,12 +93,48 @@ class TestAsync(unittest.IsolatedAsyncioTestCase):
 
         session_mock = AsyncMock(spec=AsyncSession)
         session_mock.get.return_value = contact
+        session_mock.scalar.return_value = 7
 
         result = await delete_contact(contact_id, self.user, session_mock)
 
         self.assertEqual(result, {"message": "Contact deleted", "contact": contact})
-        session_mock.delete.assert_called_once_with(contact)
+        self.assertIsNotNone(contact.deleted_at)
+        self.assertEqual(contact.version, 7)
+        session_mock.delete.assert_not_called()
         session_mock.commit.assert_called_once()
+        session_mock.refresh.assert_called_once_with(contact)
+
+    async def test_delete_already_deleted_contact(self):
+        contact = Contact(id=1, user_id=self.user.id, deleted_at=datetime(2024, 1, 1))
+
+        session_mock = AsyncMock(spec=AsyncSession)
+        session_mock.get.return_value = contact
+
+        with self.assertRaises(HTTPException) as ctx:
+            await delete_contact(1, self.user, session_mock)
+        self.assertEqual(ctx.exception.status_code, 404)
+        session_mock.commit.assert_not_called()
+
+
+class TestBirthdayRanges(unittest.TestCase):
+    def test_birthday_md_follows_birthday(self):
+        contact = Contact(birthday=date(1990, 12, 31))
+        self.assertEqual(contact.birthday_md, 1231)
+
+    def test_range_within_year(self):
+        ranges = _birthday_md_ranges(date(2023, 5, 10), date(2023, 6, 2))
+        self.assertEqual(ranges, [(510, 602)])
+
+    def test_range_wraps_year_end(self):
+        ranges = _birthday_md_ranges(date(2023, 12, 25), date(2024, 1, 7))
+        self.assertEqual(ranges, [(1225, 1231), (101, 107)])
+
+    def test_feb_29_celebrated_on_march_1_in_common_year(self):
+        self.assertEqual(_birthday_md_ranges(date(2023, 3, 1), date(2023, 3, 5)), [(229, 305)])
+        self.assertEqual(_birthday_md_ranges(date(2024, 3, 1), date(2024, 3, 5)), [(301, 305)])
+
+    def test_whole_year(self):
+        self.assertEqual(_birthday_md_ranges(date(2023, 1, 1), date(2024, 1, 1)), [(101, 1231)])
 
 
 if __name__ == "__main__":
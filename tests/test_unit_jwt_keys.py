@@ -0,0 +1,73 @@
+import time
+import unittest
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from jose import JWTError, jwt
+
+from services.jwt_keys import KeyRing
+
+SECRET = "secret"
+
+
+def generate_key() -> bytes:
+    return ec.generate_private_key(ec.SECP256R1()).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+class TestKeyRing(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.old_key = generate_key()
+        cls.new_key = generate_key()
+
+    def setUp(self):
+        self.claims = {"sub": "user@example.com", "exp": int(time.time()) + 60}
+        self.ring = KeyRing([("old", self.old_key)], SECRET, "HS256")
+
+    def test_signs_with_first_key_and_kid(self):
+        token = self.ring.encode(self.claims)
+        self.assertEqual(
+            jwt.get_unverified_header(token), {"alg": "ES256", "typ": "JWT", "kid": "old"}
+        )
+        self.assertEqual(self.ring.decode(token), self.claims)
+
+    def test_rotated_key_still_verifies(self):
+        token = self.ring.encode(self.claims)
+        rotated = KeyRing([("new", self.new_key), ("old", self.old_key)], SECRET, "HS256")
+
+        self.assertEqual(jwt.get_unverified_header(rotated.encode(self.claims))["kid"], "new")
+        self.assertEqual(rotated.decode(token), self.claims)
+
+    def test_removed_key_is_rejected(self):
+        token = self.ring.encode(self.claims)
+        ring = KeyRing([("new", self.new_key)], SECRET, "HS256")
+        with self.assertRaises(JWTError):
+            ring.decode(token)
+
+    def test_hmac_tokens_during_migration(self):
+        token = jwt.encode(self.claims, SECRET, algorithm="HS256")
+        self.assertEqual(self.ring.decode(token), self.claims)
+
+        ring = KeyRing([("old", self.old_key)], SECRET, "HS256", accept_hmac=False)
+        with self.assertRaises(JWTError):
+            ring.decode(token)
+
+    def test_hmac_without_keys(self):
+        ring = KeyRing([], SECRET, "HS256", accept_hmac=False)
+        token = ring.encode(self.claims)
+        self.assertNotIn("kid", jwt.get_unverified_header(token))
+        self.assertEqual(ring.decode(token), self.claims)
+        self.assertEqual(ring.jwks(), {"keys": []})
+
+    def test_jwks_contains_only_public_keys(self):
+        ring = KeyRing([("new", self.new_key), ("old", self.old_key)], SECRET, "HS256")
+        keys = ring.jwks()["keys"]
+
+        self.assertEqual([key["kid"] for key in keys], ["new", "old"])
+        for key in keys:
+            self.assertEqual((key["kty"], key["crv"], key["use"]), ("EC", "P-256", "sig"))
+            self.assertNotIn("d", key)
@@ -0,0 +1,180 @@
+import socket
+import time
+import unittest
+from unittest.mock import patch
+
+from aiosmtpd.controller import Controller
+from fakeredis import FakeServer
+from fakeredis import aioredis as fake_aioredis
+
+from services.mail_queue import (
+    DEAD_KEY,
+    QUEUE_KEY,
+    RETRY_KEY,
+    EmailJob,
+    EmailQueue,
+    EmailWorker,
+    SmtpSender,
+    deliver,
+)
+
+
+class RecordingHandler:
+    """Локальний SMTP-сервер для тестів: запам'ятовує листи та сесії."""
+
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+        self.reject = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.reject:
+            return "550 Mailbox unavailable"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        self.messages.append(envelope)
+        return "250 Message accepted for delivery"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def job(recipient="user@example.com"):
+    return EmailJob(
+        recipient=recipient,
+        subject="Confirm your email ",
+        template="email_template.html",
+        body={"host": "http://testserver/", "username": "user", "token": "abc"},
+    )
+
+
+class TestEmailWorker(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.handler = RecordingHandler()
+        port = free_port()
+        self.controller = Controller(self.handler, hostname="127.0.0.1", port=port)
+        self.controller.start()
+        self.redis = fake_aioredis.FakeRedis(server=FakeServer())
+        self.queue = EmailQueue(
+            self.redis, worker_id="test", max_attempts=2, base_delay=10, max_delay=60
+        )
+        self.sender = SmtpSender("127.0.0.1", port)
+        self.worker = EmailWorker(
+            self.queue, self.sender, sender_address="noreply@example.com", batch_size=10
+        )
+
+    async def asyncTearDown(self):
+        await self.sender.close()
+
+    def tearDown(self):
+        self.controller.stop()
+
+    async def test_sends_batch_over_one_connection(self):
+        for index in range(3):
+            await self.queue.enqueue(job(f"user{index}@example.com"))
+
+        self.assertEqual(await self.worker.run_once(timeout=1), 3)
+        await self.queue.enqueue(job("late@example.com"))
+        self.assertEqual(await self.worker.run_once(timeout=1), 1)
+
+        self.assertEqual(len(self.handler.messages), 4)
+        self.assertEqual(self.sender.connections, 1)
+        self.assertIn(b"users/confirmed_email/abc", self.handler.messages[0].content)
+        self.assertEqual(
+            await self.queue.stats(),
+            {"queued": 0, "processing": 0, "retrying": 0, "dead": 0},
+        )
+
+    async def test_failed_message_is_retried_then_dead_lettered(self):
+        self.handler.reject.add("bad@example.com")
+        await self.queue.enqueue(job("bad@example.com"))
+        await self.queue.enqueue(job("good@example.com"))
+
+        with self.assertLogs("services.mail_queue", "WARNING") as logs:
+            self.assertEqual(await self.worker.run_once(timeout=1), 1)
+        self.assertEqual([record.levelname for record in logs.records], ["WARNING"])
+        retries = await self.redis.zrange(RETRY_KEY, 0, -1, withscores=True)
+        self.assertEqual(len(retries), 1)
+        raw, due = retries[0]
+        self.assertEqual(EmailJob.model_validate_json(raw).attempts, 1)
+        self.assertGreaterEqual(due, time.time() + 9)
+
+        self.assertEqual(await self.queue.promote_due(now=due), 1)
+        with self.assertLogs("services.mail_queue", "ERROR"):
+            self.assertEqual(await self.worker.run_once(timeout=1), 0)
+
+        dead = await self.redis.lrange(DEAD_KEY, 0, -1)
+        self.assertEqual(len(dead), 1)
+        dead_job = EmailJob.model_validate_json(dead[0])
+        self.assertEqual((dead_job.recipient, dead_job.attempts), ("bad@example.com", 2))
+        self.assertIsNotNone(dead_job.last_error)
+
+    async def test_invalid_job_goes_to_dead_letter(self):
+        await self.redis.lpush(QUEUE_KEY, b"not json")
+        self.assertEqual(await self.worker.run_once(timeout=1), 0)
+        self.assertEqual(await self.redis.lrange(DEAD_KEY, 0, -1), [b"not json"])
+
+    async def test_recover_returns_unfinished_jobs(self):
+        await self.queue.enqueue(job())
+        self.assertEqual(len(await self.queue.fetch(10, timeout=1)), 1)
+        self.assertEqual((await self.queue.stats())["processing"], 1)
+
+        self.assertEqual(await self.queue.recover(), 1)
+        self.assertEqual(await self.worker.run_once(timeout=1), 1)
+        self.assertEqual(len(self.handler.messages), 1)
+
+    async def test_backoff_grows_exponentially(self):
+        self.assertLess(self.queue.delay(1), self.queue.delay(2))
+        self.assertLessEqual(self.queue.delay(10), 60 * 1.1)
+
+
+class TestDeliver(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.handler = RecordingHandler()
+        self.port = free_port()
+        self.controller = Controller(self.handler, hostname="127.0.0.1", port=self.port)
+        self.controller.start()
+        server = FakeServer()
+        self.redis = fake_aioredis.FakeRedis(server=server)
+        self.queue = EmailQueue(
+            self.redis, worker_id="test", max_attempts=2, base_delay=10, max_delay=60
+        )
+        patch("services.mail_queue.email_queue", self.queue).start()
+        patch("services.mail_queue.create_worker", self.create_worker).start()
+        self.server = server
+
+    def tearDown(self):
+        patch.stopall()
+        self.controller.stop()
+
+    def create_worker(self, port=None):
+        sender = SmtpSender("127.0.0.1", port or self.port)
+        return EmailWorker(
+            self.queue, sender, sender_address="noreply@example.com", batch_size=10
+        )
+
+    async def test_enqueues_when_redis_is_available(self):
+        self.assertTrue(await deliver(job()))
+        self.assertEqual((await self.queue.stats())["queued"], 1)
+        self.assertEqual(self.handler.messages, [])
+
+    async def test_sends_directly_when_redis_is_down(self):
+        self.server.connected = False
+        with self.assertLogs("services.mail_queue", "WARNING"):
+            self.assertTrue(await deliver(job()))
+        self.assertEqual(len(self.handler.messages), 1)
+
+    async def test_reports_failure_when_smtp_is_down_too(self):
+        self.server.connected = False
+        closed_port = free_port()
+        with patch(
+            "services.mail_queue.create_worker", lambda: self.create_worker(closed_port)
+        ):
+            with self.assertLogs("services.mail_queue", "ERROR"):
+                self.assertFalse(await deliver(job()))
@@ -0,0 +1,46 @@
+import asyncio
+import unittest
+
+from fastapi import HTTPException
+
+from services.passwords import PasswordHasher
+
+
+class TestPasswordHasher(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.hasher = PasswordHasher(rounds=4, workers=1, max_queue=1)
+
+    async def test_hash_and_verify(self):
+        hashed = await self.hasher.hash("qwer1234")
+        self.assertTrue(await self.hasher.verify("qwer1234", hashed))
+        self.assertFalse(await self.hasher.verify("wrong", hashed))
+        self.assertEqual(self.hasher.stats()["completed"], 3)
+
+    async def test_rehash_when_cost_changes(self):
+        old_hash = await PasswordHasher(rounds=5, workers=1, max_queue=1).hash("qwer1234")
+
+        valid, new_hash = await self.hasher.verify_and_update("qwer1234", old_hash)
+        self.assertTrue(valid)
+        self.assertTrue(new_hash.startswith("$2b$04$"))
+
+        valid, new_hash = await self.hasher.verify_and_update("qwer1234", new_hash)
+        self.assertEqual((valid, new_hash), (True, None))
+
+    async def test_verify_dummy_costs_one_verification(self):
+        self.assertFalse(await self.hasher.verify_dummy("qwer1234"))
+        completed = self.hasher.stats()["completed"]
+        self.assertFalse(await self.hasher.verify_dummy("qwer1234"))
+        self.assertEqual(self.hasher.stats()["completed"], completed + 1)
+
+    async def test_rejects_when_queue_is_full(self):
+        results = await asyncio.gather(
+            *(self.hasher.hash("qwer1234") for _ in range(3)), return_exceptions=True
+        )
+        rejected = [r for r in results if isinstance(r, HTTPException)]
+        self.assertEqual(len(rejected), 1)
+        self.assertEqual(rejected[0].status_code, 503)
+        self.assertEqual(self.hasher.stats()["rejected"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import asyncio
+import unittest
+
+from fakeredis import FakeServer
+from fakeredis import aioredis as fake_aioredis
+from fastapi import HTTPException
+
+from conf.config import RateLimitPolicy
+from services.cache import TTLCache
+from services.rate_limit import LoginGuard, RateLimiter
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = FakeServer()
+        self.redis = fake_aioredis.FakeRedis(server=self.server)
+        self.limiter = RateLimiter(self.redis, local=TTLCache(100, ttl=1))
+        self.policy = RateLimitPolicy(times=3, seconds=60)
+
+    async def test_bucket_allows_burst_then_blocks(self):
+        for _ in range(3):
+            self.assertEqual(await self.limiter.hit("login", "1.2.3.4", self.policy), 0)
+
+        retry_after = await self.limiter.hit("login", "1.2.3.4", self.policy)
+        self.assertGreater(retry_after, 19)
+        self.assertLessEqual(retry_after, 20)
+        self.assertEqual(await self.limiter.hit("login", "5.6.7.8", self.policy), 0)
+        self.assertEqual(await self.limiter.hit("signup", "1.2.3.4", self.policy), 0)
+
+    async def test_bucket_refills(self):
+        policy = RateLimitPolicy(times=2, seconds=0.2)
+        await self.limiter.hit("root", "ip", policy)
+        await self.limiter.hit("root", "ip", policy)
+        self.assertGreater(await self.limiter.hit("root", "ip", policy), 0)
+
+        await asyncio.sleep(0.15)
+        self.assertEqual(await self.limiter.hit("root", "ip", policy), 0)
+        self.assertLessEqual(await self.redis.pttl(self.limiter.key("root", "ip")), 201)
+
+    async def test_blocked_decision_is_cached_locally(self):
+        for _ in range(4):
+            await self.limiter.hit("login", "ip", self.policy)
+
+        self.server.connected = False
+        self.assertGreater(await self.limiter.hit("login", "ip", self.policy), 0)
+        self.assertEqual(
+            self.limiter.stats(),
+            {
+                "enabled": True,
+                "allowed": 3,
+                "blocked": 1,
+                "local_blocked": 1,
+                "errors": 0,
+            },
+        )
+
+    async def test_fails_open_when_redis_is_unavailable(self):
+        self.server.connected = False
+        await self.limiter.check("login", "ip", self.policy)
+        self.assertEqual(self.limiter.stats()["errors"], 1)
+
+    async def test_check_raises_429_with_retry_after(self):
+        policy = RateLimitPolicy(times=1, seconds=30)
+        await self.limiter.check("email", "ip", policy)
+        with self.assertRaises(HTTPException) as context:
+            await self.limiter.check("email", "ip", policy)
+        self.assertEqual(context.exception.status_code, 429)
+        self.assertEqual(context.exception.headers, {"Retry-After": "30"})
+
+
+class TestLoginGuard(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = FakeServer()
+        self.redis = fake_aioredis.FakeRedis(server=self.server)
+        self.guard = LoginGuard(
+            self.redis,
+            local=TTLCache(100, ttl=1),
+            max_account_failures=3,
+            max_ip_failures=5,
+            window=900,
+            base_lockout=30,
+            max_lockout=100,
+        )
+
+    async def assertLocked(self, email, ip, retry_after):
+        with self.assertRaises(HTTPException) as context:
+            await self.guard.check(email, ip)
+        self.assertEqual(context.exception.status_code, 429)
+        self.assertEqual(context.exception.headers, {"Retry-After": str(retry_after)})
+
+    async def test_account_lockout_doubles(self):
+        for _ in range(2):
+            await self.guard.failed("User@example.com", "1.1.1.1")
+        await self.guard.check("user@example.com", "1.1.1.1")
+
+        await self.guard.failed("user@example.com", "2.2.2.2")
+        self.guard.local.clear()
+        await self.assertLocked("user@example.com", "3.3.3.3", 30)
+        await self.guard.check("other@example.com", "1.1.1.1")
+
+        await self.guard.failed("user@example.com", "3.3.3.3")
+        self.guard.local.clear()
+        await self.assertLocked("user@example.com", "4.4.4.4", 60)
+
+        for _ in range(2):
+            await self.guard.failed("user@example.com", "5.5.5.5")
+        lock = await self.redis.pttl("login:acct:user@example.com:lock")
+        self.assertLessEqual(lock, 100_000)
+        self.assertGreater(lock, 60_000)
+
+    async def test_ip_lockout_across_accounts(self):
+        for index in range(5):
+            await self.guard.failed(f"user{index}@example.com", "1.1.1.1")
+        self.guard.local.clear()
+        await self.assertLocked("new@example.com", "1.1.1.1", 30)
+        await self.guard.check("new@example.com", "2.2.2.2")
+
+    async def test_success_resets_account_counter(self):
+        for _ in range(2):
+            await self.guard.failed("user@example.com", "1.1.1.1")
+        await self.guard.succeeded("user@example.com")
+        for _ in range(2):
+            await self.guard.failed("user@example.com", "2.2.2.2")
+        await self.guard.check("user@example.com", "3.3.3.3")
+
+    async def test_lock_is_checked_locally(self):
+        for _ in range(3):
+            await self.guard.failed("user@example.com", "1.1.1.1")
+        self.server.connected = False
+        await self.assertLocked("user@example.com", "2.2.2.2", 30)
+        self.assertEqual(self.guard.stats()["local_locked"], 1)
+        self.assertEqual(self.guard.stats()["errors"], 0)
+
+    async def test_fails_open_when_redis_is_unavailable(self):
+        self.server.connected = False
+        await self.guard.failed("user@example.com", "1.1.1.1")
+        await self.guard.check("user@example.com", "1.1.1.1")
+        self.assertEqual(self.guard.stats()["errors"], 2)
@@ -0,0 +1,146 @@
+import io
+import tempfile
+import unittest
+import urllib.error
+from unittest.mock import MagicMock, patch
+
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+from starlette.datastructures import Headers
+
+from repository.avatars import check_avatar, read_avatar, render_thumbnails, upload_avatar
+from schemas import UserPrincipal
+from services.storage import CloudinaryStorage, LocalStorage
+
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+def image_bytes(size=(400, 300), mode="RGB", image_format="PNG") -> bytes:
+    buffer = io.BytesIO()
+    Image.new(mode, size, "red").save(buffer, image_format)
+    return buffer.getvalue()
+
+
+def upload(content: bytes, content_type: str = "image/png") -> UploadFile:
+    return UploadFile(
+        io.BytesIO(content),
+        size=len(content),
+        filename="avatar",
+        headers=Headers({"content-type": content_type}),
+    )
+
+
+class TestLocalStorage(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.storage = LocalStorage(self.tmp.name, "/media/")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    async def test_save_streams_file_to_disk(self):
+        url = await self.storage.save("avatars/1/v/64.png", io.BytesIO(PNG), "image/png")
+        self.assertTrue(url.startswith("/media/avatars/1/v/64.png?v="))
+        self.assertEqual(await self.storage.read("avatars/1/v/64.png"), PNG)
+        self.assertIsNone(await self.storage.read("avatars/1/v/128.png"))
+
+    async def test_save_overwrites(self):
+        await self.storage.save("avatars/1/v/64.png", io.BytesIO(b"old"), "image/png")
+        await self.storage.save("avatars/1/v/64.png", io.BytesIO(PNG), "image/png")
+        self.assertEqual(self.storage.path("avatars/1/v/64.png").read_bytes(), PNG)
+
+    async def test_rejects_path_traversal(self):
+        with self.assertRaises(HTTPException) as ctx:
+            await self.storage.save("../outside.png", io.BytesIO(PNG), "image/png")
+        self.assertEqual(ctx.exception.status_code, 400)
+
+
+class TestCloudinaryStorage(unittest.IsolatedAsyncioTestCase):
+    async def test_configures_once_and_uploads_in_thread(self):
+        with patch("services.storage.cloudinary.config") as config:
+            storage = CloudinaryStorage("cloud", "key", "secret")
+        config.assert_called_once()
+
+        url = "https://res.cloudinary.com/cloud/raw/upload/v7/avatars/1/v/64.png"
+        with patch(
+            "services.storage.cloudinary.uploader.upload",
+            MagicMock(return_value={"secure_url": url}),
+        ) as upload_mock:
+            result = await storage.save("avatars/1/v/64.png", io.BytesIO(PNG), "image/png")
+        upload_mock.assert_called_once()
+        self.assertEqual(upload_mock.call_args.kwargs["resource_type"], "raw")
+        self.assertEqual(result, url)
+
+    def test_url_points_to_cdn(self):
+        with patch("services.storage.cloudinary.config"):
+            storage = CloudinaryStorage("cloud", "key", "secret")
+        with patch("services.storage.cloudinary.utils.cloudinary_url") as cloudinary_url:
+            cloudinary_url.return_value = ("https://res.cloudinary.com/cloud/raw/upload/k", {})
+            self.assertEqual(storage.url("k"), "https://res.cloudinary.com/cloud/raw/upload/k")
+        cloudinary_url.assert_called_once_with("k", resource_type="raw")
+
+    async def test_read_maps_upstream_failures(self):
+        with patch("services.storage.cloudinary.config"):
+            storage = CloudinaryStorage("cloud", "key", "secret")
+        not_found = urllib.error.HTTPError("url", 404, "Not Found", {}, None)
+        server_error = urllib.error.HTTPError("url", 503, "Unavailable", {}, None)
+
+        with patch("services.storage.urllib.request.urlopen", side_effect=not_found):
+            self.assertIsNone(await storage.read("avatars/1/v/64.png"))
+        for error in (server_error, urllib.error.URLError("timed out")):
+            with patch("services.storage.urllib.request.urlopen", side_effect=error):
+                with self.assertRaises(HTTPException) as ctx:
+                    await storage.read("avatars/1/v/64.png")
+            self.assertEqual(ctx.exception.status_code, 502)
+
+
+class TestAvatarChecks(unittest.IsolatedAsyncioTestCase):
+    def test_accepts_png(self):
+        check_avatar(upload(PNG))
+
+    def test_rejects_unsupported_type(self):
+        with self.assertRaises(HTTPException) as ctx:
+            check_avatar(upload(b"%PDF-1.7", "application/pdf"))
+        self.assertEqual(ctx.exception.status_code, 415)
+
+    def test_rejects_content_not_matching_type(self):
+        with self.assertRaises(HTTPException) as ctx:
+            check_avatar(upload(b"not an image at all", "image/png"))
+        self.assertEqual(ctx.exception.status_code, 415)
+
+    def test_rejects_too_large_file(self):
+        with patch("repository.avatars.settings.avatar_max_size", 16):
+            with self.assertRaises(HTTPException) as ctx:
+                check_avatar(upload(PNG))
+        self.assertEqual(ctx.exception.status_code, 413)
+
+    async def test_upload_avatar_stores_thumbnails(self):
+        user = UserPrincipal(id=1, email="u@example.com", username="user")
+        with tempfile.TemporaryDirectory() as root:
+            with patch("services.storage.storage", LocalStorage(root, "/media")):
+                version = await upload_avatar(upload(image_bytes()), user)
+                for name in ("64.jpeg", "64.webp", "256.jpeg", "256.webp"):
+                    data = await read_avatar(1, version, name)
+                    with Image.open(io.BytesIO(data)) as image:
+                        size = int(name.split(".")[0])
+                        self.assertEqual(image.size, (size, size))
+                        self.assertEqual(image.format, name.split(".")[1].upper())
+
+
+class TestRenderThumbnails(unittest.TestCase):
+    def test_transparent_image_is_flattened(self):
+        thumbnails = render_thumbnails(io.BytesIO(image_bytes(mode="RGBA")))
+        with Image.open(io.BytesIO(thumbnails["128.jpeg"])) as image:
+            self.assertEqual(image.mode, "RGB")
+
+    def test_rejects_broken_image(self):
+        with self.assertRaises(HTTPException) as ctx:
+            render_thumbnails(io.BytesIO(PNG))
+        self.assertEqual(ctx.exception.status_code, 415)
+
+    def test_rejects_huge_dimensions(self):
+        with patch("repository.avatars.settings.avatar_max_pixels", 100):
+            with self.assertRaises(HTTPException) as ctx:
+                render_thumbnails(io.BytesIO(image_bytes()))
+        self.assertEqual(ctx.exception.status_code, 413)
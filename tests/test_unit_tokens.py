@@ -0,0 +1,113 @@
+import asyncio
+import unittest
+
+from fakeredis import FakeServer
+from fakeredis import aioredis as fake_aioredis
+from fastapi import HTTPException
+
+from services.cache import TTLCache
+from services.tokens import RefreshTokenStore, TokenVersionStore
+
+
+class TestRefreshTokenStore(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = FakeServer()
+        self.redis = fake_aioredis.FakeRedis(server=self.server)
+        self.store = RefreshTokenStore(self.redis, ttl=3600)
+
+    async def assertRejected(self, family, jti, status_code=401):
+        with self.assertRaises(HTTPException) as context:
+            await self.store.rotate(family, jti, 1)
+        self.assertEqual(context.exception.status_code, status_code)
+
+    async def test_rotation_replaces_current_token(self):
+        family, jti = await self.store.start(1)
+        self.assertGreater(await self.redis.ttl(self.store.key(family)), 3590)
+
+        new_jti = await self.store.rotate(family, jti, 1)
+        self.assertNotEqual(new_jti, jti)
+        self.assertEqual(await self.redis.get(self.store.key(family)), new_jti.encode())
+        self.assertNotEqual(await self.store.rotate(family, new_jti, 1), new_jti)
+
+    async def test_reuse_revokes_family(self):
+        family, jti = await self.store.start(1)
+        new_jti = await self.store.rotate(family, jti, 1)
+
+        await self.assertRejected(family, jti)
+        await self.assertRejected(family, new_jti)
+        self.assertEqual(self.store.stats(), {"reused": 1})
+        self.assertFalse(await self.redis.sismember(self.store.user_key(1), family))
+
+    async def test_revoked_family_is_rejected(self):
+        family, jti = await self.store.start(1)
+        await self.store.revoke(family)
+        await self.assertRejected(family, jti)
+        await self.assertRejected("unknown", jti)
+        self.assertFalse(await self.redis.exists(self.store.key("unknown")))
+
+    async def test_revoke_all_families_of_user(self):
+        first, first_jti = await self.store.start(1)
+        second, second_jti = await self.store.start(1)
+        other, other_jti = await self.store.start(2)
+
+        await self.store.revoke_all(1)
+        await self.assertRejected(first, first_jti)
+        await self.assertRejected(second, second_jti)
+        await self.store.rotate(other, other_jti, 2)
+
+    async def test_rotation_keeps_user_set_alive(self):
+        family, jti = await self.store.start(1)
+        # Сесію підтримують оновленнями довше, ніж жила б множина з входу
+        await self.redis.pexpire(self.store.user_key(1), 50)
+        jti = await self.store.rotate(family, jti, 1)
+        self.assertGreater(await self.redis.ttl(self.store.user_key(1)), 3590)
+        await asyncio.sleep(0.1)
+
+        await self.store.revoke_all(1)
+        await self.assertRejected(family, jti)
+
+    async def test_revoke_removes_family_from_user_set(self):
+        first, _ = await self.store.start(1)
+        second, _ = await self.store.start(1)
+
+        await self.store.revoke(first, 1)
+        self.assertEqual(
+            await self.redis.smembers(self.store.user_key(1)), {second.encode()}
+        )
+
+    async def test_unavailable_store_is_503(self):
+        family, jti = await self.store.start(1)
+        self.server.connected = False
+        await self.assertRejected(family, jti, status_code=503)
+
+
+
+class TestTokenVersionStore(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = FakeServer()
+        # Два воркери з власними кешами та спільним Redis
+        self.worker_a, self.worker_b = (
+            TokenVersionStore(
+                fake_aioredis.FakeRedis(server=self.server), local=TTLCache(100, ttl=60)
+            )
+            for _ in range(2)
+        )
+
+    async def test_current_skips_stale_local_cache(self):
+        self.assertEqual(await self.worker_b.get(1), 0)
+        await self.worker_a.bump(1)
+
+        self.assertEqual(await self.worker_b.get(1), 0)
+        self.assertEqual(await self.worker_b.current(1), 1)
+        self.assertEqual(await self.worker_b.get(1), 1)
+
+    async def test_current_is_503_when_redis_is_unavailable(self):
+        self.server.connected = False
+        self.assertIsNone(await self.worker_a.get(1))
+        with self.assertRaises(HTTPException) as context:
+            await self.worker_a.current(1)
+        self.assertEqual(context.exception.status_code, 503)
+
+
+if __name__ == "__main__":
+    unittest.main()